@@ -1,36 +1,305 @@
 import numpy as np
-import rtreelib
 from rtreelib import Rect
-from skyline import SkylinePoint
+from skyline import SkylinePoint, SkylinePointSet, nonDominatedMask, dominatedByAny
 from rtree import RTreeInstance
 from convex_hull import ConvexHull
+from data_io import loadPointsFromFile, loadQuerySetsFromFile, countPointsInFile, writePointsToFile, writePointSetsToFile
+from metrics import AlgoMetrics
+from result_cache import SkylineResultCache, newDatasetVersion
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
 import heapq
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+import collections
+import contextlib
+import itertools
+import math
 import sys
 import argparse
 import time
 import os
+import cProfile
+import pstats
+import tracemalloc
+
+# inside hull nodes the pre-pass reads per step before it yields their points
+PREPASS_NODES = 256
+
+class B2S2Index(object):
+	"""Data points and their R-tree, built once and shared by every query"""
+	def __init__(self, data_points=None, data_points_file=None, m_value=4, bulk_load=True, rtree_file=None, rtree=None):
+		'''
+			Constructor:
+			Input: data_points/data_points_file/rtree
+				   m_value - M of the R-tree
+				   bulk_load - pack the R-tree with STR instead of inserting point by point
+				   rtree_file - saved R-tree, memory mapped when it is up to date with
+				   data_points_file, otherwise the tree is built and saved there
+				   rtree - an already built or loaded RTreeInstance to wrap
+			Wrapping rtree or mapping rtree_file counts as load time, not build time.
+		'''
+		super(B2S2Index, self).__init__()
+		self.m_value = m_value
+		self.load_time = 0.0
+		built = False
+		build_start_time = time.time()
+		if rtree is not None:
+			self.RTree = rtree
+			self.data_points = rtree.returnPoints()
+		elif rtree_file and data_points is None and self.loadRTree(rtree_file, data_points_file):
+			self.data_points = self.RTree.returnPoints()
+		else:
+			if data_points is not None:
+				self.data_points = data_points
+			else:
+				self.data_points = loadPointsFromFile(data_points_file)
+				self.load_time = abs(time.time() - build_start_time)
+				build_start_time = time.time()
+			self.RTree = RTreeInstance(points=self.data_points, max_entries=m_value)
+			built = True
+			if bulk_load:
+				self.RTree.bulkLoadDataIntoRTree()
+			else:
+				self.RTree.insertDataIntoRTree()
+				self.RTree.traverse(self.RTree.countNodes)
+			if rtree_file:
+				self.RTree.saveToFile(rtree_file, source_file=data_points_file)
+		# the traversal reads these arrays, node objects are never materialized for it
+		self.tree_arrays = self.RTree.flattenToArrays()
+		if built:
+			self.build_time = abs(time.time() - build_start_time)
+		else:
+			# wrapping shared arrays or mapping a saved tree builds nothing
+			self.build_time = 0.0
+			self.load_time = abs(time.time() - build_start_time)
+		self.root_bounding_rect = Rect(*self.tree_arrays[1][0].tolist())
+		self.dataset_version = newDatasetVersion()
+		# inserted points wait in a delta until compact packs them into the tree,
+		# deleted ids stay in the arrays and are only flagged
+		self.base_point_count = len(self.tree_arrays[0])
+		self.point_count = self.base_point_count
+		self.inserted_points = np.empty((64, 2))
+		self.deleted = np.zeros(self.base_point_count, dtype=bool)
+		self.deleted_count = 0
+		self.max_delta = max(1024, self.base_point_count // 64)
+		self.live_points = None
+		self.packed_version = self.dataset_version
+		self.registered_queries = []
+
+	def loadRTree(self, rtree_file, data_points_file):
+		'''
+			Memory maps rtree_file, returns False if it is missing or stale.
+		'''
+		if not os.path.exists(rtree_file):
+			return False
+		rtree = RTreeInstance()
+		try:
+			rtree.loadFromFile(rtree_file, source_file=data_points_file)
+		except ValueError as e:
+			print(e)
+			return False
+		if rtree.max_entries != self.m_value:
+			print("%s was built with M = %d, rebuilding for M = %d" % (rtree_file, rtree.max_entries, self.m_value))
+			return False
+		self.RTree = rtree
+		return True
+
+	def returnDataPoints(self):
+		'''
+			output: the points not deleted, the R-tree's and the delta's, gathered
+			once per change of the data
+		'''
+		if self.point_count == self.base_point_count and not self.deleted_count:
+			return self.data_points
+		if self.live_points is None:
+			points = np.concatenate((self.tree_arrays[0], self.inserted_points[:self.point_count - self.base_point_count]))
+			self.live_points = points[~self.deleted[:self.point_count]]
+		return self.live_points
+
+	def returnPoint(self, point_id):
+		if point_id < self.base_point_count:
+			return tuple(self.tree_arrays[0][point_id].tolist())
+		return tuple(self.inserted_points[point_id - self.base_point_count].tolist())
+
+	def insertPoint(self, point):
+		'''
+			input: point - (x,y)
+			output: id of the new point, ids are never reused
+			process: the point goes to the delta, which the queries read next to
+			the R-tree; the delta is packed into the tree once it holds
+			max_delta points. Every registered query updates its skyline.
+		'''
+		x, y = float(point[0]), float(point[1])
+		point_id = self.point_count
+		slot = point_id - self.base_point_count
+		if slot == len(self.inserted_points):
+			self.inserted_points = np.concatenate((self.inserted_points, np.empty_like(self.inserted_points)))
+		if point_id == len(self.deleted):
+			self.deleted = np.concatenate((self.deleted, np.zeros(max(64, len(self.deleted)), dtype=bool)))
+		self.inserted_points[slot] = (x, y)
+		self.point_count += 1
+		root = self.root_bounding_rect
+		self.root_bounding_rect = Rect(min(root.min_x, x), min(root.min_y, y), max(root.max_x, x), max(root.max_y, y))
+		self.dataChanged()
+		if slot + 1 >= self.max_delta:
+			self.compact()
+		for query in list(self.registered_queries):
+			query.onPointInserted(point_id, (x, y))
+		return point_id
+
+	def deletePoint(self, point_id):
+		'''
+			input: point_id - id of a point of the data or returned by insertPoint
+			process: the point is flagged, the nodes holding it are not changed.
+			Every registered query updates its skyline.
+			Raises ValueError for an unknown or already deleted id.
+		'''
+		if not 0 <= point_id < self.point_count or self.deleted[point_id]:
+			raise ValueError("point %d is not in the index" % point_id)
+		self.deleted[point_id] = True
+		self.deleted_count += 1
+		self.dataChanged()
+		point = self.returnPoint(point_id)
+		for query in list(self.registered_queries):
+			query.onPointDeleted(point_id, point)
+
+	def dataChanged(self):
+		self.live_points = None
+		self.dataset_version = newDatasetVersion()
+
+	def compact(self):
+		'''
+			STR packs the points not deleted, of the R-tree and of the delta, into a
+			new tree. Point ids do not change: the points array keeps the deleted
+			points, only the leaves stop referring to them.
+		'''
+		points = np.concatenate((self.tree_arrays[0], self.inserted_points[:self.point_count - self.base_point_count]))
+		live = np.flatnonzero(~self.deleted[:self.point_count])
+		rtree = RTreeInstance(points=points[live], max_entries=self.m_value)
+		_, node_bounds, child_start, children, node_is_leaf = rtree.packToArrays()
+		in_leaf = np.repeat(node_is_leaf, np.diff(child_start)).astype(bool)
+		children[in_leaf] = live[children[in_leaf]]
+		self.RTree = RTreeInstance(max_entries=self.m_value)
+		self.RTree.loadFromArrays((points, node_bounds, child_start, children, node_is_leaf), self.m_value,
+			len(node_bounds) + len(live))
+		self.tree_arrays = self.RTree.flattenToArrays()
+		self.data_points = points
+		self.base_point_count = len(points)
+		if len(live):
+			self.root_bounding_rect = Rect(*node_bounds[0].tolist())
+		self.max_delta = max(1024, len(live) // 64)
+		self.packed_version = self.dataset_version
+
+	def returnDeltaEntries(self):
+		'''
+			output: (bounds, entry_ids) of the inserted points not yet in the
+			R-tree, in the form of returnNodeEntries
+		'''
+		point_ids = np.arange(self.base_point_count, self.point_count)
+		live = ~self.deleted[point_ids]
+		points = self.inserted_points[:len(point_ids)][live]
+		return np.tile(points, 2), point_ids[live] + self.returnNodeCount()
+
+	def registerQuery(self, query):
+		'''
+			input: query - B2S2Algo whose skyline follows insertPoint and deletePoint
+		'''
+		if query not in self.registered_queries:
+			self.registered_queries.append(query)
+
+	def unregisterQuery(self, query):
+		if query in self.registered_queries:
+			self.registered_queries.remove(query)
+
+	def returnRTree(self):
+		return self.RTree
+
+	def returnPackedRTree(self):
+		'''
+			output: the R-tree holding exactly the points not deleted, for
+			processes that only get its arrays and not the delta nor the
+			deleted flags
+			**IMPORATANT : node ids change when the index is compacted here, so
+			the dataset version changes too
+		'''
+		if self.packed_version != self.dataset_version:
+			self.compact()
+			self.dataChanged()
+			self.packed_version = self.dataset_version
+		return self.RTree
+
+	def returnRootBoundingRect(self):
+		return self.root_bounding_rect
+
+	def returnNodeCount(self):
+		return len(self.tree_arrays[1])
+
+	def returnNodeEntries(self, node_id):
+		'''
+			output: (bounds, entry_ids) of the entries of node_id, bounds is a
+			(k, 4) array and data points get node count + point id as entry id
+		'''
+		points, node_bounds, child_start, children, node_is_leaf = self.tree_arrays
+		child_ids = children[child_start[node_id]:child_start[node_id + 1]]
+		if node_is_leaf[node_id]:
+			if self.deleted_count:
+				child_ids = child_ids[~self.deleted[child_ids]]
+			return np.tile(points[child_ids], 2), child_ids + len(node_bounds)
+		return node_bounds[child_ids], child_ids
+
+	def returnTreeArrays(self):
+		'''
+			output: (points, node_bounds, node_child_start, node_children, node_is_leaf)
+			see RTreeInstance.flattenToArrays, node 0 is the root
+		'''
+		return self.tree_arrays
+
+	def returnTotalNodesInRTree(self):
+		return self.RTree.returnNodesCount()
+
+	def returnBuildTime(self):
+		return self.build_time
+
+	def returnLoadTime(self):
+		return self.load_time
+
 
 class B2S2Algo(object):
-	"""docstring for B2S2Algo"""
-	def __init__(self, data_points=None, query_points=None, data_points_file=None, query_points_file=None, output_file=None):
+	"""Per query B2S2 executor, reads the R-tree of a B2S2Index"""
+	def __init__(self, data_points=None, query_points=None, data_points_file=None, query_points_file=None, output_file=None, index=None, cache=None, epsilon=0.0, quantum=0.0, window=None):
 		'''
 			Constructor:
-			Input: data_points/data_points_file
+			Input: data_points/data_points_file/index
 				   query_points/query_points_file
 				   output_file
+				   cache - SkylineResultCache shared by the queries on the index
+				   epsilon, quantum - approximate mode, see isApproximate
+				   window - QueryWindow, the skyline of the data points inside it
+			When index is given the data points and R-tree are taken from it and
+			nothing is rebuilt for this query.
 		'''
 		super(B2S2Algo, self).__init__()
-		if data_points:
+		self.index = index
+		self.cache = cache
+		self.epsilon = epsilon
+		self.quantum = quantum
+		self.window = window
+		# continuous mode: entries pruned by the last run and the data version they hold for
+		self.continuous = False
+		self.frontier = None
+		self.frontier_version = None
+		if index is not None:
+			self.data_points = index.returnDataPoints()
+		elif data_points is not None:
 			self.data_points = data_points
 		else:
 			self.data_points = self.readDataFromFile(data_points_file)
 
-		if query_points:
-			self.data_points = data_points
+		query_load_start_time = time.time()
+		if query_points is not None:
+			self.query_points = query_points
 		else:
 			self.query_points = self.readDataFromFile(query_points_file)
+		self.query_load_time = abs(time.time() - query_load_start_time)
 
 		if output_file:
 			self.output_file = output_file
@@ -38,18 +307,47 @@ class B2S2Algo(object):
 		else:
 			self.output_file = 'output.log'
 			open(self.output_file, 'w').close()
+		self.resetB2S2Algo()
+
+	def resetB2S2Algo(self, query_points=None):
+		'''
+			Clears the per query state so the executor can answer a new query
+			against the same index.
+			input: query_points - new query points, keeps the current ones if None
+		'''
+		if query_points is not None:
+			self.query_points = query_points
 		self.box = None
 		self.skyline_points = set()
+		# SkylinePoint of every row of skyline_set, in row order, rows dropped by the quantization have none
+		self.skyline_records = []
 		self.minheap = []
-		self.min_heap_ele_count = 0
+		# entry id and rect of every heap entry, the heap itself holds (key, slot)
+		self.heap_entry_ids = np.empty(64, dtype=np.int64)
+		self.heap_entry_bounds = np.empty((64, 4))
+		self.heap_entry_count = 0
 		self.count_rtree_nodes_accessed = 0
 		self.dominance_check = 0
+		self.first_result_time = None
+		self.cache_key = None
+		self.cache_hit = False
+		# every data point inside the hull is in the skyline, see emitInsideHullPoints
+		self.inside_hull_emitted = False
+		# quantum grid cells holding a skyline point, approximate mode only
+		self.occupied_cells = set()
+		# pruned entries of this run in continuous mode, as heap slots and (bounds, ids) chunks
+		self.frontier_slots = []
+		self.frontier_chunks = []
+		self.stats = {}
+		self.metrics = AlgoMetrics()
 
 	def writeToOutputFile(self, data_dict):
 		'''
 			function to write stat file of the algo results
 			input: data_dict, eg.: {'query size' : 2, 'algo time': '100s'}
+			the stats are also kept in self.stats.
 		'''
+		self.stats.update(data_dict)
 		with open(self.output_file, 'a') as file:
 			for key, value in data_dict.items():
 				file.write(str(key) + "\t\t\t= " + str(value) + "\n")
@@ -65,8 +363,71 @@ class B2S2Algo(object):
 		data['Algorithm run time    '] = str(algo_time) + "s"
 		data['No, of Dominance Check'] = str(self.dominance_check)
 		data['R-tree Nodes accessed '] = str(self.returnRtreeNodesAccessCount())
+		if self.first_result_time is not None:
+			data['Time to first result  '] = str(self.first_result_time) + "s"
+		if self.cache is not None:
+			data['Result cache hit      '] = str(self.cache_hit)
+			data.update(self.cache.returnStats())
+		if hasattr(self.index, 'returnIOStats'):
+			data.update(self.index.returnIOStats())
+		if self.continuous:
+			data['Reused skyline points '] = self.metrics.returnCounter('reused skyline points')
+			data['Reused pruned entries '] = self.metrics.returnCounter('reused pruned entries')
+			data['Reexamined entries    '] = self.metrics.returnCounter('reexamined entries')
+			data['Frontier entries      '] = self.metrics.returnCounter('frontier entries')
+		if self.window is not None:
+			data['Pruned outside window '] = self.metrics.returnCounter('pruned outside window')
+		if self.isApproximate():
+			factor, additive = self.returnErrorBound()
+			data['Approximation epsilon '] = self.epsilon
+			data['Quantization step     '] = self.quantum
+			data['Error bound           '] = "d(p,q) <= %.17g * d(x,q) + %.17g" % (factor, additive)
+			data['Quantized points      '] = self.metrics.returnCounter('pruned quantized')
+			data['Result size           '] = len(self.skyline_points)
 		self.writeToOutputFile(data)
 
+	def isApproximate(self):
+		'''
+			Approximate mode, for a speed up on large data:
+			epsilon - an entry is pruned when a skyline point is within a factor
+					  1+epsilon of dominating it, box B shrinks to match
+			quantum - a skyline point is dropped from the result when a point
+					  found before it lies in the same quantum x quantum grid cell,
+					  it still prunes as a dominator; entries lying in such a cell
+					  are pruned
+			Every data point x left out then has a skyline point p with
+			d(p,q) <= (1+epsilon) d(x,q) + quantum*sqrt(2) for every hull vertex q,
+			see returnErrorBound.
+		'''
+		return bool(self.epsilon or self.quantum)
+
+	def returnErrorBound(self):
+		'''
+			output: (factor, additive) of the guarantee in isApproximate
+		'''
+		return (1.0 + self.epsilon, self.quantum * math.sqrt(2))
+
+	def isCellOccupied(self, cell_x, cell_y):
+		'''
+			output: True when the quantum cell already holds a skyline point, the
+			cell is taken otherwise
+		'''
+		cell = (cell_x, cell_y)
+		if cell in self.occupied_cells:
+			return True
+		self.occupied_cells.add(cell)
+		return False
+
+	def isBoundsInOccupiedCell(self, min_x, min_y, max_x, max_y):
+		'''
+			output: True when the rect lies in one quantum cell holding a skyline
+			point, every point of it is within quantum*sqrt(2) of that point
+		'''
+		cell_x = math.floor(min_x / self.quantum)
+		cell_y = math.floor(min_y / self.quantum)
+		return (cell_x == math.floor(max_x / self.quantum) and cell_y == math.floor(max_y / self.quantum) and
+			(cell_x, cell_y) in self.occupied_cells)
+
 	def returnQueryPointsArea(self):
 		'''
 			Function to return Q MBR
@@ -91,47 +452,60 @@ class B2S2Algo(object):
 		return self.count_rtree_nodes_accessed
 
 	def returnTotalNodesInRTree(self):
-		return self.RTree.returnNodesCount()
+		return self.index.returnTotalNodesInRTree()
 
 	def readDataFromFile(self, filename):
 		'''
 			input:-
-			filename: name of the file containing row wise space separated points
+			filename: name of the file containing row wise space separated points,
+			or a .npy/.bin binary file
 			output:-
-			set_of_points = [(x,y),....]
+			(n, 2) numpy array of points
 		'''
-		set_of_points = []
-		try:
-			file = open(filename, 'r')
-			for line in file:
-				tokens = line.strip().split()
-				set_of_points.append((float(tokens[0]), float(tokens[1])))
-		except Exception as e:
-			print(e)
-			exit()
-
-		return set_of_points
+		return loadPointsFromFile(filename)
 
-	def plotPointsOnGraph(self):
+	def plotPointsOnGraph(self, filename=None):
 		'''
 			For visualizing the algo resutls
+			input: filename - image file the plot is saved to, shown when None
+			matplotlib is imported here only, the queries never load it.
 		'''
-		if self.data_points and self.query_points and self.skyline_points:
+		if len(self.data_points) and len(self.query_points) and self.skyline_points:
+			import matplotlib.pyplot as plt
+			import matplotlib.patches as mpatches
 			red_patch = mpatches.Patch(color='red', label='data points')
 			green_patch = mpatches.Patch(color='green', label='query points')
 			blue_patch = mpatches.Patch(color='blue', label='skyline points')
-			plt.legend(handles=[red_patch])
-			for pt in self.data_points:
-				plt.plot(pt[0], pt[1], 'ro')
-			for pt in self.query_points:
-				plt.plot(pt[0], pt[1], 'go')
-			for pt in self.skyline_points:
-				plt.plot(pt.point[0], pt.point[1], 'bo')
+			data_points = np.asarray(self.data_points)
+			query_points = np.asarray(self.query_points)
+			skyline_points = self.returnSkylineArray()
+			# one call per group, a plot call per point does not finish on large data
+			plt.plot(data_points[:, 0], data_points[:, 1], 'ro')
+			plt.plot(query_points[:, 0], query_points[:, 1], 'go')
+			plt.plot(skyline_points[:, 0], skyline_points[:, 1], 'bo')
 			plt.legend(handles=[red_patch, green_patch, blue_patch])
-			plt.show()
+			if filename:
+				plt.savefig(filename)
+			else:
+				plt.show()
 		else:
 			print('data not available')
 
+	def returnSkylineArray(self):
+		'''
+			output: (k, 2) array of the skyline points in increasing x then y,
+			the same for every run
+		'''
+		return sortPoints([sp.point for sp in self.skyline_points])
+
+	def writeResultToFile(self, filename):
+		'''
+			input: filename - skyline points file, the format is picked by the
+			extension: .npy, .csv, .bin/.f64 (raw float64) or "x y" text lines
+		'''
+		with self.metrics.phase('export'):
+			writePointsToFile(self.returnSkylineArray(), filename)
+
 	def findDistanceBetweenPoints(self, point1, point2):
 		if point1 is not None and point2 is not None:
 			return np.sqrt(np.square(point1[0] - point2[0]) + np.square(point1[1] - point2[1]))
@@ -191,6 +565,30 @@ class B2S2Algo(object):
 
 		return total_dist
 
+	def returnSearchRect(self):
+		'''
+			output: the root rect of the index, cut by the bounding rect of the
+			window when there is one; box B starts from it
+		'''
+		root = self.index.returnRootBoundingRect()
+		if self.window is None:
+			return root
+		return Rect(max(root.min_x, self.window.min_x), max(root.min_y, self.window.min_y),
+			min(root.max_x, self.window.max_x), min(root.max_y, self.window.max_y))
+
+	def areEntriesInWindow(self, bounds, entry_ids):
+		'''
+			output: bool array, True for the nodes meeting the window and the
+			data points inside it; all True without a window
+		'''
+		if self.window is None:
+			return np.ones(len(entry_ids), dtype=bool)
+		is_point = entry_ids >= self.index.returnNodeCount()
+		in_window = np.empty(len(entry_ids), dtype=bool)
+		in_window[is_point] = self.window.arePointsInside(bounds[is_point, :2])
+		in_window[~is_point] = self.window.areRectanglesMeeting(bounds[~is_point])
+		return in_window
+
 	def isRectIntersectsBoxB(self, rect):
 		'''
 			Assumes that your self.box is not None
@@ -217,58 +615,228 @@ class B2S2Algo(object):
 			return rect
 
 	def isEntryDominated(self, entry_rect):
+		'''
+			Single vectorized test of entry_rect against every skyline point found so far.
+		'''
+		return self.isBoundsDominated(entry_rect.min_x, entry_rect.min_y, entry_rect.max_x, entry_rect.max_y)
+
+	def isBoundsDominated(self, min_x, min_y, max_x, max_y):
 		self.dominance_check += 1
-		for sp in self.skyline_points:
-			if entry_rect.min_x == entry_rect.max_x and entry_rect.min_y == entry_rect.max_y:
-				if sp.isPointDominated((entry_rect.min_x, entry_rect.min_y)):
-					return True
-			else:
-				if sp.isRectangleDominated(entry_rect):
-					return True
+		if self.skyline_set.isBoundsDominated(min_x, min_y, max_x, max_y):
+			self.metrics.increment('pruned dominated')
+			return True
 		return False
 
-	def addToSkyline(self, entry_rect):
-		x = entry_rect.min_x
-		y = entry_rect.min_y
-		sp = SkylinePoint((x,y))
-		sp.calculateMBR(self.convexHullPoints)
-		self.skyline_points.add(sp)
-		return sp.returnMBR()
+	def areBoundsDominated(self, bounds):
+		'''
+			input: bounds - (k, 4) array of entry rects
+			output: (k,) bool array, one dominance check per entry
+		'''
+		self.dominance_check += len(bounds)
+		dominated = self.skyline_set.areRectanglesDominated(bounds)
+		self.metrics.increment('pruned dominated', int(dominated.sum()))
+		return dominated
+
+	def addToSkyline(self, x, y, point_id=-1, in_result=True):
+		'''
+			input: in_result - False for a point dropped by the quantization, it
+			still prunes as a dominator but is not a skyline point of the result
+			output: MBR of the circles of (x,y), computed by the skyline set so the
+			SkylinePoint stays a bare record
+		'''
+		if in_result:
+			skyline_point = SkylinePoint((x,y))
+			self.skyline_points.add(skyline_point)
+			self.skyline_records.append(skyline_point)
+		return Rect(*self.skyline_set.addPoint((x,y), point_id))
 
-	def insertIntoHeap(self, priority, entry):
+	def addManyToSkyline(self, points, point_ids, result_points=None):
+		'''
+			input: result_points - (k, 2) the points among them that go to the
+			result, all of them when None; the others only prune as dominators,
+			see quantizePoints
+			output: Rect cut from box B by the circles of all the points
+		'''
+		start = len(self.skyline_set)
+		box = Rect(*self.skyline_set.addPoints(points, point_ids))
+		if result_points is None:
+			# the set may reorder the points, the records follow its rows
+			result_points = self.skyline_set.returnPoints()[start:]
+		records = [SkylinePoint((x,y)) for x, y in result_points.tolist()]
+		self.skyline_points.update(records)
+		self.skyline_records.extend(records)
+		return box
+
+	def quantizePoints(self, points):
+		'''
+			output: bool array, True for the first point of every quantum cell
+			not taken yet, the cell is taken by it
+		'''
+		cells = np.floor(points / self.quantum).astype(np.int64)
+		first = np.unique(cells, axis=0, return_index=True)[1]
+		kept = np.zeros(len(points), dtype=bool)
+		for row, cell in zip(first.tolist(), map(tuple, cells[first].tolist())):
+			kept[row] = not self.isCellOccupied(*cell)
+		self.metrics.increment('pruned quantized', len(points) - int(kept.sum()))
+		return kept
+
+	def removeFromSkyline(self, removed):
+		'''
+			input: removed - bool array over the rows of skyline_set
+		'''
+		removed_list = removed.tolist()
+		self.skyline_points.difference_update(sp for sp, r in zip(self.skyline_records, removed_list) if r)
+		self.skyline_records = [sp for sp, r in zip(self.skyline_records, removed_list) if not r]
+		self.skyline_set.removeRows(removed)
+
+	def returnBoxB(self):
+		'''
+			output: box B of the current skyline, the search rect cut by the MBR
+			of the circles of every skyline point
+		'''
+		box = self.returnSearchRect()
+		if not len(self.skyline_set):
+			return box
+		hull = self.skyline_set.query_points[None, :, :]
+		radii = self.skyline_set.returnDistances()[:, :, None]
+		min_x, min_y = (hull - radii).min(axis=1).max(axis=0).tolist()
+		max_x, max_y = (hull + radii).max(axis=1).min(axis=0).tolist()
+		return Rect(max(box.min_x, min_x), max(box.min_y, min_y), min(box.max_x, max_x), min(box.max_y, max_y))
+
+	def addHeapEntries(self, bounds, entry_ids):
+		'''
+			output: slot of the first entry, the entries take consecutive slots
+		'''
+		start = self.heap_entry_count
+		end = start + len(entry_ids)
+		if end > len(self.heap_entry_ids):
+			capacity = max(end, 2 * len(self.heap_entry_ids))
+			self.heap_entry_ids = np.resize(self.heap_entry_ids, capacity)
+			self.heap_entry_bounds = np.resize(self.heap_entry_bounds, (capacity, 4))
+		self.heap_entry_ids[start:end] = entry_ids
+		self.heap_entry_bounds[start:end] = bounds
+		self.heap_entry_count = end
+		return start
+
+	def insertIntoHeap(self, priority, entry_id):
+		'''
+			input:-
+			priority - Rect of the entry
+			entry_id - node id, or node count + point id for a data point
+		'''
 		key = self.mindistRectAndSet(priority, self.convexHullPoints)
-		heapq.heappush(self.minheap, (key, self.min_heap_ele_count , entry))
-		self.min_heap_ele_count += 1
+		slot = self.addHeapEntries([(priority.min_x, priority.min_y, priority.max_x, priority.max_y)], [entry_id])
+		heapq.heappush(self.minheap, (key, slot))
+		self.metrics.increment('heap pushes')
+		self.metrics.updateMax('peak heap size', len(self.minheap))
 
-	def initializeB2S2Algo(self, m_value=4):
+	def insertEntriesIntoHeap(self, bounds, entry_ids):
 		'''
-			Initialize algo elements
-			1. Convex Hull.
-			2. Heap.
-			3. writing available stats of algo to output file.
+			input:-
+			bounds - (k, 4) array with the rects of the entries
+			entry_ids - (k,) ids like insertIntoHeap
+			process: the MINDIST sums of all k rects to all hull vertices are
+			computed in one step, the same keys mindistRectAndSet gives.
 		'''
-		self.dominance_check = 0
+		keys = self.skyline_set.mindistRectanglesToQueryPoints(bounds).sum(axis=1)
+		start = self.addHeapEntries(bounds, entry_ids)
+		for slot, key in enumerate(keys.tolist(), start):
+			heapq.heappush(self.minheap, (key, slot))
+		self.metrics.increment('heap pushes', len(entry_ids))
+		self.metrics.updateMax('peak heap size', len(self.minheap))
+
+	def popFromHeap(self):
+		self.metrics.increment('heap pops')
+		return heapq.heappop(self.minheap)
+
+	def lookupResultCache(self):
+		'''
+			output: True when the skyline of this hull on this index is cached, the
+			skyline is then filled from the cache and no traversal is needed
+		'''
+		if self.cache is None or self.isApproximate():
+			return False
+		self.cache_key = self.cache.makeKey(self.convexHullPoints, self.index.dataset_version, self.window)
+		points = self.cache.get(self.cache_key)
+		if points is None:
+			return False
+		for x, y in points.tolist():
+			self.addToSkyline(x, y)
+		self.cache_hit = True
+		self.metrics.setCounter('result cache hit', 1)
+		return True
+
+	def storeInResultCache(self):
+		if self.cache is not None and self.cache_key is not None and not self.cache_hit and not self.isApproximate():
+			self.cache.put(self.cache_key, [sp.point for sp in self.skyline_points])
+
+	def finalizeMetrics(self):
+		'''
+			Copies the counters kept by the traversal into self.metrics.
+		'''
+		self.metrics.setCounter('dominance checks', self.dominance_check)
+		self.metrics.setCounter('nodes accessed', self.count_rtree_nodes_accessed)
+		self.metrics.setCounter('skyline size', len(self.skyline_points))
+		if hasattr(self.index, 'buffer_pool'):
+			self.metrics.setCounter('logical page reads', self.index.buffer_pool.logical_reads)
+			self.metrics.setCounter('physical page reads', self.index.buffer_pool.physical_reads)
+
+	def initializeQuery(self):
+		'''
+			Per query part shared by the engines: resets the state, computes the
+			convex hull of the query points and the empty skyline set.
+		'''
+		self.resetB2S2Algo()
 		#### Conveh Hull calculation and points retrival
 		convex_hull_start_time = time.time()
 		self.ch = ConvexHull(self.query_points)
 		self.ch.findConvexHull()
 		convex_hull_end_time = time.time()
+		self.convex_hull_time = abs(convex_hull_end_time - convex_hull_start_time)
+		self.metrics.addTime('hull', self.convex_hull_time)
 		self.ch.convertPointsToIndividualCoordinates()
 		self.convexHullPoints = self.ch.returnConvexHullPoints()
+		self.skyline_set = SkylinePointSet(self.convexHullPoints, slack=1.0 + self.epsilon)
+
+	def initializeB2S2Algo(self, m_value=4, bulk_load=True):
+		'''
+			Initialize algo elements
+			1. Convex Hull.
+			2. Heap.
+			3. writing available stats of algo to output file.
+			m_value, bulk_load: used to build the index when the executor was not given one.
+		'''
+		self.initializeQuery()
 
 		#### RTree Initialization and heap initialization
-		self.RTree = RTreeInstance(points=self.data_points, max_entries=m_value)
-		self.RTree.insertDataIntoRTree()
-		rtree_root = self.RTree.root
-		dp_root_bb = self.RTree.root.get_bounding_rect()
-		self.insertIntoHeap(dp_root_bb, rtree_root)
-		self.box = dp_root_bb
-		self.RTree.traverse(self.RTree.countNodes)
-		# file = open('out.txt', 'w')
-		# file.write(str(self.RTree.returnNodesCount()))
-		# file.close()
-
-		#### Writing pre-stats to supplied output file
+		if self.index is None:
+			self.index = B2S2Index(data_points=self.data_points, m_value=m_value, bulk_load=bulk_load)
+		self.metrics.addTime('load', self.query_load_time + self.index.returnLoadTime())
+		self.metrics.addTime('index build', self.index.returnBuildTime())
+		self.RTree = self.index.returnRTree()
+		self.box = self.returnSearchRect()
+		self.seedHeap()
+
+		self.writeInitialStats()
+
+	def seedHeap(self):
+		'''
+			Pushes the root of the R-tree and the inserted points the index holds
+			outside of it, those meeting the window.
+		'''
+		root = self.index.returnRootBoundingRect()
+		if self.window is None or self.window.areRectanglesMeeting([(root.min_x, root.min_y, root.max_x, root.max_y)])[0]:
+			self.insertIntoHeap(root, 0)
+		bounds, entry_ids = self.index.returnDeltaEntries()
+		in_window = self.areEntriesInWindow(bounds, entry_ids)
+		if in_window.any():
+			self.insertEntriesIntoHeap(bounds[in_window], entry_ids[in_window])
+
+	def writeInitialStats(self):
+		'''
+			Writing pre-stats of the query to supplied output file
+		'''
+		dp_root_bb = self.index.returnRootBoundingRect()
 		dp_l1 = abs(dp_root_bb.min_x - dp_root_bb.max_x)
 		dp_l2 = abs(dp_root_bb.min_y - dp_root_bb.max_y)
 
@@ -277,15 +845,20 @@ class B2S2Algo(object):
 		data = {}
 		data['No. Of Data Points   ']  = len(self.returnDataPoints())
 		data['No. Of Query Points  '] = len(self.returnQueryPoints())
-		data['Value of M in R-tree '] = m_value
+		data['Value of M in R-tree '] = self.index.m_value
 		data['Total Convex Hull pts'] = len(self.convexHullPoints)
-		data['Convex Hull exec time'] = str(abs(convex_hull_end_time - convex_hull_start_time)) + 's'
-		data['Total Nodes in RTree '] = self.RTree.returnNodesCount()
+		data['Convex Hull exec time'] = str(self.convex_hull_time) + 's'
+		data['Total Nodes in RTree '] = self.returnTotalNodesInRTree()
+		data['RTree build time     '] = str(self.index.returnBuildTime()) + 's'
 		data['Data points MBR area '] = str(dp_l1 * dp_l2) + "units"
 		data['Query points MBR area'] = str(qp_area) + "units"
 		data['Data Points Rect     '] = str([(dp_root_bb.min_x, dp_root_bb.min_y), (dp_root_bb.max_x, dp_root_bb.max_y)])
 		data['Query Points Rect    '] = str(qp_rect)
 		data['Query Points MBR %age'] = str(qp_area/(dp_l1 * dp_l2))
+		if self.window is not None:
+			data['Window Rect          '] = str([(self.window.min_x, self.window.min_y), (self.window.max_x, self.window.max_y)])
+			data['Window Vertices      '] = len(self.window.vertices)
+			data['Window area %age     '] = str(self.window.returnArea()/(dp_l1 * dp_l2))
 
 		self.writeToOutputFile(data)
 
@@ -295,39 +868,668 @@ class B2S2Algo(object):
 			i.e. Algorithm other parts are initialized
 			B2S2 Full algo steps.
 		'''
-		self.count_rtree_nodes_accessed = 0
-		while self.minheap:
-			entry = heapq.heappop(self.minheap)[2]
-			bounding_box = None
-			if type(entry) == Rect:
-				bounding_box = entry
+		for _ in self.streamB2S2Algo():
+			pass
+		return self.skyline_points
+
+	def streamB2S2Algo(self):
+		'''
+			**IMPORATANT : call this method after you have called object.initializeB2S2Algo()
+			Generator yielding every skyline point (x,y) as soon as it is accepted,
+			B2S2 never takes a point back. The time from the start of the traversal
+			to the first point is kept in self.first_result_time. A skyline found
+			in the result cache is yielded without any traversal. The traversal
+			timer stops while the consumer holds a point, only the time between
+			resumptions is added to it.
+		'''
+		start = time.time()
+		resumed = start
+		try:
+			if self.lookupResultCache():
+				points = self.skyline_set.returnPoints().tolist()
 			else:
-				bounding_box = entry.get_bounding_rect()
-			if not self.isRectIntersectsBoxB(bounding_box):
-				continue
-			if self.ch.isRectangleInsideConvexHull(bounding_box) or \
-				not self.isEntryDominated(bounding_box):
-				self.count_rtree_nodes_accessed += 1
-				if type(entry) == Rect:
-					mbr_of_entry = self.addToSkyline(entry)
-					self.box = self.newBoxB(mbr_of_entry)
+				points = itertools.chain(self.emitInsideHullPoints(), self.traverseB2S2())
+			for x, y in points:
+				if self.first_result_time is None:
+					self.first_result_time = abs(time.time() - start)
+					self.metrics.addTime('first result', self.first_result_time)
+				self.metrics.addTime('traversal', abs(time.time() - resumed))
+				resumed = None
+				yield (x, y)
+				resumed = time.time()
+			self.storeInResultCache()
+		finally:
+			if resumed is not None:
+				self.metrics.addTime('traversal', abs(time.time() - resumed))
+			self.finalizeMetrics()
+
+	def emitInsideHullPoints(self):
+		'''
+			Pre-pass of the traversal: every data point inside the hull is a
+			skyline point. The tree is read level by level from the root, only
+			through the nodes meeting the MBR of the hull, and every level is
+			classified in one vectorized call: a node with its four corners
+			inside the hull has its whole subtree inside and is collected without
+			any more tests, the points of the leaves are tested directly. With a
+			window only the nodes meeting it are read and a subtree is collected
+			whole when it is inside the window as well.
+			Generator yielding the (x,y) points a chunk at a time as they are
+			found; the subtrees inside the hull are read depth first,
+			PREPASS_NODES nodes per step, so the first points come after a few
+			nodes. All the points are added to the skyline at once at the end,
+			in the x order the skyline set keeps, and cut box B before the
+			traversal starts, which then skips every entry inside the hull.
+		'''
+		node_count = self.index.returnNodeCount()
+		hull_min_x, hull_min_y = self.ch.hull_array.min(axis=0).tolist()
+		hull_max_x, hull_max_y = self.ch.hull_array.max(axis=0).tolist()
+		inside_nodes = []
+		point_chunks = []
+		result_chunks = []
+
+		def collectPoints(bounds, entry_ids, tested):
+			if not len(entry_ids):
+				return []
+			if not tested:
+				inside = self.ch.arePointsInsideConvexHull(bounds[:, :2])
+				if self.window is not None:
+					inside[inside] = self.window.arePointsInside(bounds[inside, :2])
+				if not inside.any():
+					return []
+				bounds = bounds[inside]
+				entry_ids = entry_ids[inside]
+			points = bounds[:, :2]
+			point_chunks.append((points, entry_ids - node_count))
+			if self.quantum:
+				points = points[self.quantizePoints(points)]
+				result_chunks.append(points)
+			return points.tolist()
+
+		delta_bounds, delta_ids = self.index.returnDeltaEntries()
+		yield from collectPoints(np.asarray(delta_bounds, dtype=np.float64).reshape(-1, 4), np.asarray(delta_ids, dtype=np.int64), False)
+		level = [0]
+		root = self.index.returnRootBoundingRect()
+		root_bounds = np.array([(root.min_x, root.min_y, root.max_x, root.max_y)])
+		if self.window is not None and not self.window.areRectanglesMeeting(root_bounds)[0]:
+			level = []
+		elif self.ch.isBoundsInsideConvexHull(root.min_x, root.min_y, root.max_x, root.max_y) and \
+				(self.window is None or self.window.areRectanglesInside(root_bounds)[0]):
+			inside_nodes, level = level, []
+		while level:
+			entries = [self.index.returnNodeEntries(node_id) for node_id in level]
+			self.count_rtree_nodes_accessed += len(level)
+			bounds = np.concatenate([node_bounds for node_bounds, _ in entries]).reshape(-1, 4)
+			entry_ids = np.concatenate([node_entry_ids for _, node_entry_ids in entries]).astype(np.int64)
+			meets_hull = ~((hull_min_x > bounds[:, 2]) | (bounds[:, 0] > hull_max_x) |
+				(hull_min_y > bounds[:, 3]) | (bounds[:, 1] > hull_max_y))
+			bounds = bounds[meets_hull]
+			entry_ids = entry_ids[meets_hull]
+			if self.window is not None:
+				in_window = self.areEntriesInWindow(bounds, entry_ids)
+				bounds = bounds[in_window]
+				entry_ids = entry_ids[in_window]
+			is_point = entry_ids >= node_count
+			yield from collectPoints(bounds[is_point], entry_ids[is_point], False)
+			inside = self.ch.areRectanglesInsideConvexHull(bounds[~is_point])
+			if self.window is not None:
+				inside[inside] = self.window.areRectanglesInside(bounds[~is_point][inside])
+			inside_nodes.extend(entry_ids[~is_point][inside].tolist())
+			level = entry_ids[~is_point][~inside].tolist()
+
+		while inside_nodes:
+			batch = inside_nodes[-PREPASS_NODES:]
+			del inside_nodes[-PREPASS_NODES:]
+			entries = [self.index.returnNodeEntries(node_id) for node_id in batch]
+			self.count_rtree_nodes_accessed += len(batch)
+			leaves = []
+			for node_bounds, node_entry_ids in entries:
+				if len(node_entry_ids) and node_entry_ids[0] >= node_count:
+					leaves.append((node_bounds, node_entry_ids))
 				else:
-					for entry_dash in entry.entries:
-						if not self.isRectIntersectsBoxB(entry_dash.rect):
-							continue
-						if self.ch.isRectangleInsideConvexHull(entry_dash.rect) or \
-							not self.isEntryDominated(entry_dash.rect):
-							# print(self.mindistRectAndSet(entry_dash.rect, self.convexHullPoints), )
-							key = self.mindistRectAndSet(entry_dash.rect, self.convexHullPoints)
-							if entry_dash.child:
-								# heapq.heappush(self.minheap, (key, entry_dash.child))
-								self.insertIntoHeap(entry_dash.rect, entry_dash.child)
-							else:
-								# heapq.heappush(self.minheap, (key, entry_dash.rect))
-								self.insertIntoHeap(entry_dash.rect, entry_dash.rect)
+					inside_nodes.extend(node_entry_ids.tolist())
+			if leaves:
+				yield from collectPoints(np.concatenate([node_bounds for node_bounds, _ in leaves]).reshape(-1, 4),
+					np.concatenate([node_entry_ids for _, node_entry_ids in leaves]).astype(np.int64), True)
+
+		self.inside_hull_emitted = True
+		if not point_chunks:
+			return
+		points = np.concatenate([points for points, _ in point_chunks])
+		point_ids = np.concatenate([point_ids for _, point_ids in point_chunks]).astype(np.int64)
+		self.metrics.increment('accepted inside hull', len(points))
+		result_points = np.concatenate(result_chunks) if self.quantum else None
+		self.box = self.newBoxB(self.addManyToSkyline(points, point_ids, result_points))
 
+	def traverseB2S2(self, radii=None):
+		'''
+			Heap entries are (key, slot) pairs, the slot holds the entry id and
+			rect: ids below the node count are R-tree nodes, the others are data
+			points shifted by the node count. Nodes are read from the index only
+			when they are expanded. Yields the skyline points in the order they
+			are found.
+			radii - circle radii of a deleted skyline point, only the region it
+			dominated is searched: an entry closer than the radius to some hull
+			vertex with all of its rect holds no point that was dominated by it.
+		'''
+		node_count = self.index.returnNodeCount()
+		frontier_slots = self.frontier_slots if self.continuous else None
+		while self.minheap:
+			slot = self.popFromHeap()[1]
+			entry_id = int(self.heap_entry_ids[slot])
+			min_x, min_y, max_x, max_y = self.heap_entry_bounds[slot].tolist()
+			box = self.box
+			if box.min_x > max_x or min_x > box.max_x or box.min_y > max_y or min_y > box.max_y:
+				self.metrics.increment('pruned outside box B')
+				if frontier_slots is not None:
+					frontier_slots.append(slot)
+				continue
+			if radii is not None and (self.skyline_set.maxdistBoundsToQueryPoints(min_x, min_y, max_x, max_y) < radii).any():
+				self.metrics.increment('pruned outside region')
+				continue
+			if self.quantum and entry_id < node_count and self.isBoundsInOccupiedCell(min_x, min_y, max_x, max_y):
+				self.metrics.increment('pruned quantized')
+				continue
+			if self.ch.isBoundsInsideConvexHull(min_x, min_y, max_x, max_y):
+				if self.inside_hull_emitted:
+					continue
+				self.metrics.increment('accepted inside hull')
+			elif self.isBoundsDominated(min_x, min_y, max_x, max_y):
+				if frontier_slots is not None:
+					frontier_slots.append(slot)
+				continue
+			self.count_rtree_nodes_accessed += 1
+			if entry_id >= node_count:
+				point_id = entry_id - node_count
+				if radii is not None and (self.skyline_set.returnIds() == point_id).any():
+					continue
+				if self.quantum and self.isCellOccupied(math.floor(min_x / self.quantum), math.floor(min_y / self.quantum)):
+					self.metrics.increment('pruned quantized')
+					self.box = self.newBoxB(self.addToSkyline(min_x, min_y, point_id, in_result=False))
+					continue
+				mbr_of_entry = self.addToSkyline(min_x, min_y, point_id)
+				self.box = self.newBoxB(mbr_of_entry)
+				yield (min_x, min_y)
+				continue
+
+			bounds, child_ids = self.index.returnNodeEntries(entry_id)
+			if self.window is not None:
+				# outside the window nothing is pushed, not even into the frontier
+				in_window = self.areEntriesInWindow(bounds, child_ids)
+				self.metrics.increment('pruned outside window', int(len(in_window) - in_window.sum()))
+				bounds = bounds[in_window]
+				child_ids = child_ids[in_window]
+			in_box = ~((box.min_x > bounds[:, 2]) | (bounds[:, 0] > box.max_x) |
+				(box.min_y > bounds[:, 3]) | (bounds[:, 1] > box.max_y))
+			self.metrics.increment('pruned outside box B', int(len(in_box) - in_box.sum()))
+			if frontier_slots is not None:
+				self.frontier_chunks.append((bounds[~in_box], child_ids[~in_box]))
+			bounds = bounds[in_box]
+			child_ids = child_ids[in_box]
+			if radii is not None:
+				in_region = (self.skyline_set.maxdistRectanglesToQueryPoints(bounds) >= radii).all(axis=1)
+				self.metrics.increment('pruned outside region', int(len(in_region) - in_region.sum()))
+				bounds = bounds[in_region]
+				child_ids = child_ids[in_region]
+			inside_hull = self.ch.areRectanglesInsideConvexHull(bounds)
+			if self.inside_hull_emitted:
+				bounds = bounds[~inside_hull]
+				child_ids = child_ids[~inside_hull]
+				inside_hull = inside_hull[~inside_hull]
+			self.metrics.increment('accepted inside hull', int(inside_hull.sum()))
+			# the skyline does not change while a node is expanded, its children are tested together
+			keep = inside_hull.copy()
+			keep[~inside_hull] = ~self.areBoundsDominated(bounds[~inside_hull])
+			if frontier_slots is not None:
+				self.frontier_chunks.append((bounds[~keep], child_ids[~keep]))
+			self.insertEntriesIntoHeap(bounds[keep], child_ids[keep])
+
+	def searchIndex(self, radii=None):
+		'''
+			Runs traverseB2S2 again from the root with the current skyline and box
+			B, see traverseB2S2 for radii.
+		'''
+		self.minheap = []
+		self.heap_entry_count = 0
+		self.seedHeap()
+		for _ in self.traverseB2S2(radii):
+			pass
+
+	def runContinuousB2S2Algo(self, query_points=None):
+		'''
+			Continuous query, call it again with the moved query points every tick.
+			The first call is a full B2S2 run that keeps its frontier, the entries
+			it pruned; it initializes the query itself. Every later call
+			1. takes the previous skyline points as initial dominators, they are
+			   data points so whatever they dominate is no skyline point,
+			2. re-tests the whole frontier against them and box B in one step,
+			   only the entries no longer pruned go to the heap,
+			3. drops the seeds outside the new hull that a seed or a point found
+			   in this run dominates, points inside the hull are never dominated.
+			Previous skyline points that are dropped join the frontier, so the
+			frontier and the skyline together always cover every data point. A
+			change of the index falls back to a full run from a fresh heap.
+			Reused and redone work is written to the output file.
+		'''
+		if self.isApproximate():
+			raise ValueError("continuous queries need the exact mode, epsilon and quantum must be 0")
+		self.continuous = True
+		if self.frontier is None or self.frontier_version != self.index.dataset_version:
+			# a full run from a fresh heap and an empty skyline, the frontier of an
+			# older version of the data says nothing about the current one
+			if query_points is not None:
+				self.query_points = query_points
+			self.initializeB2S2Algo()
+			with self.metrics.phase('traversal'):
+				for _ in self.traverseB2S2():
+					pass
+			self.storeFrontier(np.empty((0, 2)), np.zeros(0, dtype=np.int64))
+			self.finalizeMetrics()
+			return self.skyline_points
+
+		previous_points = self.skyline_set.returnPoints().copy()
+		previous_ids = self.skyline_set.returnIds().copy()
+		frontier_bounds, frontier_ids = self.frontier
+		if query_points is not None:
+			self.query_points = query_points
+		self.initializeQuery()
+		self.writeInitialStats()
+		with self.metrics.phase('traversal'):
+			hull = self.skyline_set.query_points
+			# in increasing distance sum, the strongest dominators are tested first
+			order = np.argsort(np.sqrt(np.square(previous_points[:, None, :] - hull[None, :, :]).sum(axis=2)).sum(axis=1))
+			previous_points = previous_points[order]
+			previous_ids = previous_ids[order]
+			for (x, y), point_id in zip(previous_points.tolist(), previous_ids.tolist()):
+				self.addToSkyline(x, y, point_id)
+			seed_count = len(self.skyline_set)
+			self.box = self.returnBoxB()
+
+			box = self.box
+			pruned = ((box.min_x > frontier_bounds[:, 2]) | (frontier_bounds[:, 0] > box.max_x) |
+				(box.min_y > frontier_bounds[:, 3]) | (frontier_bounds[:, 1] > box.max_y))
+			self.metrics.increment('pruned outside box B', int(pruned.sum()))
+			candidates = np.flatnonzero(~pruned)
+			inside_hull = self.ch.areRectanglesInsideConvexHull(frontier_bounds[candidates])
+			self.metrics.increment('accepted inside hull', int(inside_hull.sum()))
+			pruned[candidates[~inside_hull]] = self.areBoundsDominated(frontier_bounds[candidates[~inside_hull]])
+			self.frontier_chunks.append((frontier_bounds[pruned], frontier_ids[pruned]))
+			self.insertEntriesIntoHeap(frontier_bounds[~pruned], frontier_ids[~pruned])
+			for _ in self.traverseB2S2():
+				pass
+
+			distances = self.skyline_set.returnDistances()
+			evicted = np.zeros(len(distances), dtype=bool)
+			outside_hull = np.flatnonzero(~self.ch.arePointsInsideConvexHull(previous_points))
+			evicted[outside_hull] = dominatedByAny(distances, distances[outside_hull])
+			dropped_points = self.skyline_set.returnPoints()[evicted]
+			dropped_ids = self.skyline_set.returnIds()[evicted]
+			self.removeFromSkyline(evicted)
+			self.storeFrontier(dropped_points, dropped_ids)
+		self.metrics.setCounter('reused skyline points', seed_count - int(evicted.sum()))
+		self.metrics.setCounter('reused pruned entries', int(pruned.sum()))
+		self.metrics.setCounter('reexamined entries', int(len(pruned) - pruned.sum()))
+		self.finalizeMetrics()
 		return self.skyline_points
 
+	def storeFrontier(self, dropped_points, dropped_ids):
+		'''
+			input: dropped_points, dropped_ids - previous skyline points no longer in it
+			process: the pruned entries of this run and the dropped points become
+			the frontier the next tick starts from.
+		'''
+		slots = np.array(self.frontier_slots, dtype=np.int64)
+		chunks = self.frontier_chunks + [(self.heap_entry_bounds[slots], self.heap_entry_ids[slots]),
+			(np.tile(dropped_points, 2), dropped_ids + self.index.returnNodeCount())]
+		self.frontier = (np.concatenate([bounds for bounds, _ in chunks]).reshape(-1, 4),
+			np.concatenate([entry_ids for _, entry_ids in chunks]).astype(np.int64))
+		self.frontier_version = self.index.dataset_version
+		self.frontier_slots = []
+		self.frontier_chunks = []
+		self.metrics.setCounter('frontier entries', len(self.frontier[1]))
+
+	def registerForUpdates(self):
+		'''
+			**IMPORATANT : call this method after you have called object.runB2S2Algo()
+			Keeps the skyline current while points are inserted into or deleted
+			from the index, see onPointInserted and onPointDeleted. A skyline from
+			the result cache has no point ids, it is searched once more here.
+		'''
+		if self.isApproximate():
+			raise ValueError("skyline maintenance needs the exact mode, epsilon and quantum must be 0")
+		if (self.skyline_set.returnIds() < 0).any():
+			self.removeFromSkyline(np.ones(len(self.skyline_set), dtype=bool))
+			self.box = self.returnSearchRect()
+			self.searchIndex()
+		self.index.registerQuery(self)
+
+	def onPointInserted(self, point_id, point):
+		'''
+			The new point joins the skyline when it lies inside the hull or no
+			skyline point dominates it, and then evicts the skyline points it
+			dominates. Nothing else changes: any other point it dominates was
+			already dominated by a skyline point.
+		'''
+		with self.metrics.phase('maintenance'):
+			self.metrics.increment('points inserted')
+			x, y = point
+			if self.window is not None and not self.window.isPointInside(x, y):
+				return
+			if not self.ch.isPointInsideConvexHull((x, y)) and self.isBoundsDominated(x, y, x, y):
+				return
+			distances = self.skyline_set.returnDistances()
+			point_distances = np.sqrt(np.square(self.skyline_set.query_points - (x, y)).sum(axis=1))
+			evicted = (distances >= point_distances).all(axis=1) & (distances > point_distances).any(axis=1)
+			if evicted.any():
+				self.removeFromSkyline(evicted)
+				self.metrics.increment('skyline points evicted', int(evicted.sum()))
+			# the MBR of an evicted point holds the MBR of the new one, box B only shrinks
+			self.box = self.newBoxB(self.addToSkyline(x, y, point_id))
+			self.metrics.increment('skyline points found')
+			self.metrics.setCounter('skyline size', len(self.skyline_points))
+
+	def onPointDeleted(self, point_id, point):
+		'''
+			Deleting a point outside the skyline changes nothing, whatever it
+			dominated is dominated by its own dominator. A deleted skyline point
+			leaves its row, box B is recomputed from the remaining skyline and the
+			index is searched only where the point dominated: outside all of its
+			circles, whose radii are its row of skyline_set distances.
+		'''
+		with self.metrics.phase('maintenance'):
+			self.metrics.increment('points deleted')
+			removed = self.skyline_set.returnIds() == point_id
+			if not removed.any():
+				return
+			# the distances of the deleted point bound the region it dominated
+			radii = self.skyline_set.returnDistances()[int(np.flatnonzero(removed)[0])].copy()
+			self.removeFromSkyline(removed)
+			self.box = self.returnBoxB()
+			skyline_size = len(self.skyline_set)
+			nodes_accessed = self.count_rtree_nodes_accessed
+			self.searchIndex(radii)
+			self.metrics.increment('maintenance nodes accessed', self.count_rtree_nodes_accessed - nodes_accessed)
+			self.count_rtree_nodes_accessed = nodes_accessed
+			self.metrics.increment('skyline points found', len(self.skyline_set) - skyline_size)
+			self.metrics.setCounter('skyline size', len(self.skyline_points))
+
+	def initializePartitionedB2S2Algo(self, grid_size=8):
+		'''
+			Initialize algo elements of the partitioned mode
+			1. Convex Hull.
+			2. grid_size x grid_size grid over the data MBR, no global R-tree is
+			   built, every partition gets its own in a worker.
+			3. writing available stats of algo to output file.
+		'''
+		if self.window is not None:
+			raise ValueError("the partitioned mode takes no window")
+		self.initializeQuery()
+		self.metrics.addTime('load', self.query_load_time)
+		with self.metrics.phase('index build'):
+			self.data_points = np.asarray(self.data_points, dtype=np.float64).reshape(-1, 2)
+			self.partition_order, self.partition_start, self.partition_bounds = gridPartitionPoints(self.data_points, grid_size)
+		self.grid_size = grid_size
+
+		qp_area, qp_rect = self.returnQueryPointsArea()
+		data = {}
+		data['No. Of Data Points   '] = len(self.data_points)
+		data['No. Of Query Points  '] = len(self.query_points)
+		data['Total Convex Hull pts'] = len(self.convexHullPoints)
+		data['Convex Hull exec time'] = str(self.convex_hull_time) + 's'
+		data['Partition grid       '] = "%dx%d" % (grid_size, grid_size)
+		data['Query Points Rect    '] = str(qp_rect)
+		self.writeToOutputFile(data)
+
+	def isPartitionSkipped(self, partition, candidates):
+		'''
+			A partition is skipped when its points' MBR lies outside box B or is
+			dominated by a local skyline point of a partition already evaluated;
+			transitivity makes any of those points a valid dominator.
+		'''
+		min_x, min_y, max_x, max_y = self.partition_bounds[partition].tolist()
+		box = self.box
+		if box is not None and (box.min_x > max_x or min_x > box.max_x or box.min_y > max_y or min_y > box.max_y):
+			return True
+		if self.ch.isBoundsInsideConvexHull(min_x, min_y, max_x, max_y):
+			return False
+		self.dominance_check += 1
+		return candidates.isBoundsDominated(min_x, min_y, max_x, max_y)
+
+	def runPartitionedB2S2Algo(self, workers=None, m_value=4):
+		'''
+			**IMPORATANT : call this method after you have called object.initializePartitionedB2S2Algo()
+			Every non empty partition computes its local skyline with B2S2 against
+			the shared hull in a process pool. Partitions are handed out in
+			increasing MINDIST sum to the hull so the early local skylines prune
+			the later partitions before they start. A global skyline point is
+			always a local one, so one final dominance pass over the union of the
+			local skylines gives the skyline. The pass follows the rule of B2S2:
+			of points equal on every hull vertex distance only one is kept, the
+			points inside the hull are all kept.
+		'''
+		workers = workers if workers else os.cpu_count()
+		partitions = np.flatnonzero(np.diff(self.partition_start))
+		keys = self.skyline_set.mindistRectanglesToQueryPoints(self.partition_bounds[partitions]).sum(axis=1)
+		pending = collections.deque(partitions[np.argsort(keys, kind='stable')].tolist())
+		candidates = SkylinePointSet(self.convexHullPoints)
+		skipped = 0
+
+		blocks, specs = createSharedArrays((self.data_points, self.partition_order, self.partition_start))
+		try:
+			with self.metrics.phase('traversal'):
+				with ProcessPoolExecutor(max_workers=workers, initializer=partitionWorkerInit,
+						initargs=(specs, np.asarray(self.query_points, dtype=np.float64), m_value)) as executor:
+					running = {}
+					while pending or running:
+						while pending and len(running) < workers:
+							partition = pending.popleft()
+							if self.isPartitionSkipped(partition, candidates):
+								skipped += 1
+								continue
+							running[executor.submit(partitionWorkerRun, partition)] = partition
+						if not running:
+							break
+						done, _ = wait(running, return_when=FIRST_COMPLETED)
+						for future in done:
+							del running[future]
+							points, dominance_check, nodes_accessed = future.result()
+							self.dominance_check += dominance_check
+							self.count_rtree_nodes_accessed += nodes_accessed
+							for x, y in points.tolist():
+								self.box = self.newBoxB(Rect(*candidates.addPoint((x, y))))
+		finally:
+			for block in blocks:
+				block.close()
+				block.unlink()
+
+		with self.metrics.phase('merge'):
+			distances = candidates.returnDistances()
+			points = candidates.returnPoints()
+			self.dominance_check += len(distances)
+			inside_hull = self.ch.arePointsInsideConvexHull(points)
+			for x, y in points[nonDominatedMask(distances, exempt=inside_hull)].tolist():
+				self.addToSkyline(x, y)
+		self.metrics.setCounter('partitions', len(partitions))
+		self.metrics.setCounter('partitions skipped', skipped)
+		self.writeToOutputFile({'Partitions evaluated ': len(partitions) - skipped, 'Partitions skipped   ': skipped})
+		self.finalizeMetrics()
+		return self.skyline_points
+
+
+def sortPoints(points):
+	'''
+		input: points - sequence of (x,y)
+		output: (k, 2) array in increasing x then y
+	'''
+	points = np.array(points, dtype=np.float64).reshape(-1, 2)
+	return points[np.lexsort((points[:, 1], points[:, 0]))]
+
+
+def createSharedArrays(arrays):
+	'''
+		input: arrays - numpy arrays to publish to worker processes
+		output: (shared memory blocks, specs), a spec is (name, dtype, shape)
+		and is what a worker needs to attach the array again.
+	'''
+	blocks = []
+	specs = []
+	for array in arrays:
+		array = np.ascontiguousarray(array)
+		block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+		np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+		blocks.append(block)
+		specs.append((block.name, array.dtype.str, array.shape))
+	return blocks, specs
+
+
+def attachSharedArrays(specs):
+	'''
+		input: specs from createSharedArrays
+		output: (shared memory blocks, numpy views on them)
+	'''
+	blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+	arrays = tuple(np.ndarray(shape, dtype=dtype, buffer=block.buf) for block, (_, dtype, shape) in zip(blocks, specs))
+	return blocks, arrays
+
+
+batch_index = None
+batch_cache = None
+batch_shared_blocks = None
+
+
+def batchWorkerInit(specs, max_entries, nodes_count, m_value, dataset_version=None, cache=None):
+	'''
+		Runs once in every worker: wraps the R-tree arrays published by the
+		parent in shared memory into a B2S2Index, nothing is copied or rebuilt.
+		Every worker gets its own copy of the parent's result cache, the index
+		keeps the parent's dataset version so the cached keys still match.
+	'''
+	global batch_index, batch_cache, batch_shared_blocks
+	batch_shared_blocks, arrays = attachSharedArrays(specs)
+	rtree = RTreeInstance()
+	rtree.loadFromArrays(arrays, max_entries, nodes_count)
+	batch_index = B2S2Index(rtree=rtree, m_value=m_value)
+	if dataset_version is not None:
+		batch_index.dataset_version = dataset_version
+	batch_cache = cache
+
+
+def batchWorkerRun(query_points):
+	'''
+		input: query_points - one query set
+		output: (skyline points as (x,y) tuples, stats of the query)
+	'''
+	b2s2 = B2S2Algo(index=batch_index, query_points=query_points, output_file=os.devnull, cache=batch_cache)
+	b2s2.initializeB2S2Algo()
+	start = time.time()
+	skyline_points = b2s2.runB2S2Algo()
+	end = time.time()
+	b2s2.writingRemainingStatsofAlgo(abs(end - start))
+	return [sp.point for sp in skyline_points], b2s2.stats
+
+
+def batchWorkerRunMany(query_sets):
+	'''
+		input: query_sets - list of query sets, one micro-batch of the query server
+		output: list of (skyline points, stats) as batchWorkerRun, (None, error
+		message) for a query that failed so the rest of the batch is answered
+	'''
+	results = []
+	for query_points in query_sets:
+		try:
+			results.append(batchWorkerRun(query_points))
+		except Exception as error:
+			results.append((None, "%s: %s" % (type(error).__name__, error)))
+	return results
+
+
+def runBatchQueries(index, query_sets, workers=None, chunksize=1, cache=None):
+	'''
+		input:-
+		index - B2S2Index shared by all queries
+		query_sets - list of query point sets
+		workers - number of worker processes, defaults to the cpu count
+		cache - SkylineResultCache, every worker starts from a copy of it
+		output:-
+		list of (skyline points, stats) in the order of query_sets
+		The R-tree and the data points are placed in shared memory once, the
+		workers map them instead of each pickling or rebuilding the index.
+		Points inserted or deleted since the last compact are packed into the
+		tree first, the workers do not see the delta nor the deleted flags.
+	'''
+	rtree = index.returnPackedRTree()
+	blocks, specs = createSharedArrays(rtree.flattenToArrays())
+	try:
+		with ProcessPoolExecutor(max_workers=workers, initializer=batchWorkerInit,
+				initargs=(specs, rtree.max_entries, rtree.returnNodesCount(), index.m_value, index.dataset_version, cache)) as executor:
+			return list(executor.map(batchWorkerRun, query_sets, chunksize=chunksize))
+	finally:
+		for block in blocks:
+			block.close()
+			block.unlink()
+
+
+def gridPartitionPoints(points, grid_size):
+	'''
+		input:-
+		points - (n, 2) array
+		grid_size - the data MBR is cut into grid_size x grid_size cells
+		output:-
+		(order, partition_start, partition_bounds), partition i holds the points
+		order[partition_start[i]:partition_start[i+1]] and partition_bounds[i]
+		is their MBR, an empty partition gets an empty rect.
+	'''
+	partition_count = grid_size * grid_size
+	partition_bounds = np.empty((partition_count, 4))
+	partition_bounds[:, :2] = np.inf
+	partition_bounds[:, 2:] = -np.inf
+	if len(points) == 0:
+		return np.zeros(0, dtype=np.int64), np.zeros(partition_count + 1, dtype=np.int64), partition_bounds
+
+	low = points.min(axis=0)
+	extent = points.max(axis=0) - low
+	extent[extent == 0] = 1
+	cells = np.clip(((points - low) / extent * grid_size).astype(np.int64), 0, grid_size - 1)
+	partition = cells[:, 0] * grid_size + cells[:, 1]
+	order = np.argsort(partition, kind='stable')
+	counts = np.bincount(partition, minlength=partition_count)
+	partition_start = np.concatenate(([0], np.cumsum(counts)))
+	non_empty = np.flatnonzero(counts)
+	sorted_points = points[order]
+	partition_bounds[non_empty, :2] = np.minimum.reduceat(sorted_points, partition_start[non_empty], axis=0)
+	partition_bounds[non_empty, 2:] = np.maximum.reduceat(sorted_points, partition_start[non_empty], axis=0)
+	return order, partition_start, partition_bounds
+
+
+partition_arrays = None
+partition_query_points = None
+partition_m_value = None
+partition_shared_blocks = None
+
+
+def partitionWorkerInit(specs, query_points, m_value):
+	'''
+		Runs once in every worker: maps the data points and the partition
+		layout published by the parent in shared memory.
+	'''
+	global partition_arrays, partition_query_points, partition_m_value, partition_shared_blocks
+	partition_shared_blocks, partition_arrays = attachSharedArrays(specs)
+	partition_query_points = query_points
+	partition_m_value = m_value
+
+
+def partitionWorkerRun(partition):
+	'''
+		input: partition - partition id
+		output: (local skyline as a (k, 2) array, dominance checks, nodes accessed)
+	'''
+	points, order, partition_start = partition_arrays
+	data_points = points[order[partition_start[partition]:partition_start[partition + 1]]]
+	index = B2S2Index(data_points=data_points, m_value=partition_m_value)
+	b2s2 = B2S2Algo(index=index, query_points=partition_query_points, output_file=os.devnull)
+	b2s2.initializeB2S2Algo()
+	b2s2.runB2S2Algo()
+	return b2s2.skyline_set.returnPoints().copy(), b2s2.dominance_check, b2s2.returnRtreeNodesAccessCount()
+
 
 if __name__ == '__main__':
 
@@ -337,28 +1539,176 @@ if __name__ == '__main__':
 	parser.add_argument("-q", "--query", help = "query points. same format") 
 	parser.add_argument("-M", "--m-value", help = "interger value for M value of R-tree")
 	parser.add_argument("-O", "--output", help = "name of the output file")
+	parser.add_argument("--no-bulk-load", action = "store_true", help = "build the R-tree by inserting points one by one instead of STR packing")
+	parser.add_argument("--rtree-file", help = "saved R-tree to load, rebuilt and saved there when missing or stale")
+	parser.add_argument("--batch", help = "file of query sets separated by blank lines, evaluated in parallel")
+	parser.add_argument("--workers", type = int, help = "number of worker processes for --batch and --partitions, defaults to the cpu count")
+	parser.add_argument("--paged-rtree", help = "disk resident R-tree read page by page through a buffer pool, built there when missing or stale")
+	parser.add_argument("--page-size", type = int, help = "bytes per --paged-rtree page, defaults to the smallest multiple of 512 holding M entries")
+	parser.add_argument("--buffer-pages", type = int, default = 1024, help = "buffer pool capacity of --paged-rtree in pages")
+	parser.add_argument("--cache-entries", type = int, help = "keep the skylines of up to this many distinct hulls per --batch worker")
+	parser.add_argument("--cache-mb", type = float, default = 64, help = "memory limit of the --cache-entries result cache")
+	parser.add_argument("--cache-tolerance", type = float, default = 1e-9, help = "hulls equal after rounding the vertices to this share a cached skyline")
+	parser.add_argument("--partitions", type = int, help = "split the data MBR into a PARTITIONS x PARTITIONS grid and evaluate the partitions in parallel")
+	parser.add_argument("--algo", choices = ["auto", "b2s2", "vs2", "brute"], default = "auto",
+		help = "skyline engine: R-tree based B2S2, Voronoi based VS2, vectorized brute force, or auto to pick by data and hull size")
+	parser.add_argument("--metrics", help = "json file for the per phase timers and counters of the query")
+	parser.add_argument("--profile", help = "cProfile the query and dump the stats to this file")
+	parser.add_argument("--tracemalloc", action = "store_true", help = "trace allocations, peak and top sites go to the --metrics file")
+	parser.add_argument("--stream", nargs = "?", const = "-", help = "write every skyline point as soon as it is found, to this file or to stdout")
+	parser.add_argument("--epsilon", type = float, default = 0.0, help = "approximate mode: prune entries a skyline point is within a factor 1+EPSILON of dominating")
+	parser.add_argument("--quantum", type = float, default = 0.0, help = "approximate mode: keep one skyline point per QUANTUM x QUANTUM grid cell")
+	parser.add_argument("--plot", nargs = "?", const = "", help = "plot the data, query and skyline points, saved to this image file or shown")
+	parser.add_argument("--result", help = "write the skyline points to this file: .npy, .csv, .bin or x y text lines; with --batch every set's skyline in input order")
+	parser.add_argument("--window", type = float, nargs = 4, metavar = ("MIN_X", "MIN_Y", "MAX_X", "MAX_Y"),
+		help = "skyline of the data points inside this rectangle only")
+	parser.add_argument("--window-polygon", help = "skyline of the data points inside the polygon whose vertices, in order, are in this file")
+	parser.add_argument("--moves", help = "file of query point positions, one set per tick separated by blank lines, answered as a continuous query")
 
 	args = parser.parse_args()
 	# print(args)
-	if not args.query or not args.data:
+	if not (args.query or args.batch or args.moves) or not args.data:
 		raise Exception("Please Supply Proper arguments\nuse --help/-h to see options")
 
+	if args.algo == "auto":
+		from brute_force_algo import selectEngine
+		if args.batch or args.partitions or args.stream or args.moves or args.rtree_file or args.paged_rtree or args.epsilon or args.quantum or \
+				args.window or args.window_polygon:
+			args.algo = "b2s2"
+		else:
+			args.algo = selectEngine(countPointsInFile(args.data), loadPointsFromFile(args.query))
+		# stdout may carry the --stream points
+		print("--algo auto picked %s" % args.algo, file=sys.stderr)
+
+	if args.batch and args.algo != "b2s2":
+		raise Exception("--batch is only supported with --algo b2s2")
+
+	if args.paged_rtree and (args.algo != "b2s2" or args.batch or args.partitions):
+		raise Exception("--paged-rtree is only supported for a single unpartitioned --algo b2s2 query")
+
+	if args.partitions and (args.algo != "b2s2" or args.batch):
+		raise Exception("--partitions is only supported for a single --algo b2s2 query")
+
+	if args.stream and (args.algo != "b2s2" or args.batch or args.partitions):
+		raise Exception("--stream is only supported for a single unpartitioned --algo b2s2 query")
+
+	if args.moves and (args.algo != "b2s2" or args.batch or args.partitions or args.stream):
+		raise Exception("--moves is only supported with --algo b2s2, without --batch, --partitions and --stream")
+
+	if (args.epsilon or args.quantum) and (args.algo != "b2s2" or args.batch or args.partitions or args.moves):
+		raise Exception("--epsilon and --quantum are only supported for a single unpartitioned --algo b2s2 query")
+
+	if args.epsilon < 0 or args.quantum < 0:
+		raise Exception("--epsilon and --quantum must not be negative")
+
+	window = None
+	if args.window and args.window_polygon:
+		raise Exception("give either --window or --window-polygon")
+	if args.window or args.window_polygon:
+		if args.algo != "b2s2" or args.batch or args.partitions:
+			raise Exception("--window and --window-polygon are only supported for a single unpartitioned --algo b2s2 query")
+		from query_window import QueryWindow
+		window = QueryWindow(args.window if args.window else loadPointsFromFile(args.window_polygon))
+
+	if args.plot is not None and args.batch:
+		raise Exception("--plot is not supported with --batch")
+
+	if args.tracemalloc:
+		tracemalloc.start()
 	script_start = time.time()
-	b2s2 = B2S2Algo(data_points_file=args.data, query_points_file=args.query, output_file=args.output)
-	if args.m_value:
-		b2s2.initializeB2S2Algo(int(args.m_value))
+	if args.algo == "vs2":
+		from vs2_algo import VS2Index, VS2Algo
+		algo = VS2Algo(index=VS2Index(data_points_file=args.data), query_points_file=args.query, output_file=args.output)
+		initializeAlgo = algo.initializeVS2Algo
+		runAlgo = algo.runVS2Algo
+	elif args.algo == "brute":
+		from brute_force_algo import BruteForceIndex, BruteForceAlgo
+		algo = BruteForceAlgo(index=BruteForceIndex(data_points_file=args.data), query_points_file=args.query, output_file=args.output)
+		initializeAlgo = algo.initializeBruteForceAlgo
+		runAlgo = algo.runBruteForceAlgo
+	elif args.partitions:
+		m_value = int(args.m_value) if args.m_value else 4
+		algo = B2S2Algo(data_points_file=args.data, query_points_file=args.query, output_file=args.output)
+		initializeAlgo = lambda: algo.initializePartitionedB2S2Algo(args.partitions)
+		runAlgo = lambda: algo.runPartitionedB2S2Algo(workers=args.workers, m_value=m_value)
 	else:
-		b2s2.initializeB2S2Algo()
-	# print("Data initialized")
+		m_value = int(args.m_value) if args.m_value else 4
+		if args.paged_rtree:
+			from paged_rtree import openPagedRTree
+			index = openPagedRTree(args.paged_rtree, args.data, m_value, args.buffer_pages, args.page_size)
+		else:
+			index = B2S2Index(data_points_file=args.data, m_value=m_value, bulk_load=not args.no_bulk_load, rtree_file=args.rtree_file)
+		if args.batch:
+			cache = None
+			if args.cache_entries:
+				cache = SkylineResultCache(args.cache_entries, int(args.cache_mb * 1048576), args.cache_tolerance)
+			results = runBatchQueries(index, loadQuerySetsFromFile(args.batch), workers=args.workers, cache=cache)
+			output_file = args.output if args.output else 'output.log'
+			with open(output_file, 'w') as file:
+				for i, (skyline_points, stats) in enumerate(results):
+					file.write("Query Set            \t\t\t= " + str(i) + "\n")
+					file.write("Skyline size         \t\t\t= " + str(len(skyline_points)) + "\n")
+					for key, value in stats.items():
+						file.write(str(key) + "\t\t\t= " + str(value) + "\n")
+			if args.result:
+				writePointSetsToFile([sortPoints(skyline_points) for skyline_points, _ in results], args.result)
+			print("Script Time: ", time.time() - script_start)
+			sys.exit()
+		if args.moves:
+			query_sets = loadQuerySetsFromFile(args.moves)
+			algo = B2S2Algo(index=index, query_points=query_sets[0], output_file=args.output, window=window)
+			for tick, query_points in enumerate(query_sets):
+				algo.writeToOutputFile({'Tick                  ': tick})
+				start = time.time()
+				algo.runContinuousB2S2Algo(query_points if tick else None)
+				algo.writingRemainingStatsofAlgo(abs(time.time() - start))
+			# the skyline of the last tick
+			if args.result:
+				algo.writeResultToFile(args.result)
+			if args.plot is not None:
+				algo.plotPointsOnGraph(args.plot)
+			print("Script Time: ", time.time() - script_start)
+			sys.exit()
+		algo = B2S2Algo(index=index, query_points_file=args.query, output_file=args.output,
+			epsilon=args.epsilon, quantum=args.quantum, window=window)
+		initializeAlgo = algo.initializeB2S2Algo
+		if args.stream:
+			def runAlgo():
+				with contextlib.nullcontext(sys.stdout) if args.stream == "-" else open(args.stream, 'w') as stream_file:
+					for x, y in algo.streamB2S2Algo():
+						stream_file.write("%.17g %.17g\n" % (x, y))
+						stream_file.flush()
+				return algo.skyline_points
+		else:
+			runAlgo = algo.runB2S2Algo
+
+	profiler = cProfile.Profile() if args.profile else None
+	if profiler:
+		profiler.enable()
+	initializeAlgo()
 	start = time.time()
-	# print("Runnning Algorithm")
-	skyline_points = b2s2.runB2S2Algo()
-	# print("Execution completed")
+	skyline_points = runAlgo()
 	end = time.time()
-	b2s2.writingRemainingStatsofAlgo(abs(end - start))
-	# data = {}
-	# data['Algorithm run time    '] = str(abs(end - start)) + "s"
-	# data['No, of Dominance Check'] = str(b2s2.dominance_check)
-	# data['R-tree Nodes accessed '] = str(b2s2.returnRtreeNodesAccessCount())
-	# b2s2.writeToOutputFile(data)
-	print("Script Time: ", end - script_start)
\ No newline at end of file
+	if profiler:
+		profiler.disable()
+		profiler.dump_stats(args.profile)
+		pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+	algo.writingRemainingStatsofAlgo(abs(end - start))
+	if args.result:
+		algo.writeResultToFile(args.result)
+	if args.plot is not None:
+		algo.plotPointsOnGraph(args.plot)
+
+	if args.tracemalloc:
+		current, peak = tracemalloc.get_traced_memory()
+		top_allocations = tracemalloc.take_snapshot().statistics('lineno')[:10]
+		tracemalloc.stop()
+		algo.metrics.extra['tracemalloc'] = {
+			'current MB': current / 1048576.0,
+			'peak MB': peak / 1048576.0,
+			'top allocations': [str(stat) for stat in top_allocations],
+		}
+	if args.metrics:
+		algo.metrics.writeJSON(args.metrics)
+	# keep stdout to the streamed points
+	print("Script Time: ", end - script_start, file=sys.stderr if args.stream == "-" else sys.stdout)
@@ -0,0 +1,233 @@
+import numpy as np
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from generate_data import generatePoints, DISTRIBUTIONS
+from b2s2_algo import B2S2Index, B2S2Algo
+from vs2_algo import VS2Index, VS2Algo
+from brute_force_algo import BruteForceIndex, BruteForceAlgo
+
+CASE_KEYS = ('algo', 'size', 'distribution', 'query_points', 'query_mbr', 'm_value', 'seed', 'epsilon', 'quantum')
+# keys missing from results of older runs
+CASE_DEFAULTS = {'epsilon': 0.0, 'quantum': 0.0}
+TIME_METRICS = ('build_time', 'query_time')
+COUNT_METRICS = ('dominance_checks', 'nodes_accessed', 'skyline_size')
+MEMORY_METRICS = ('peak_memory_mb',)
+# approximate cases only
+ACCURACY_METRICS = ('exact_skyline_size', 'recall', 'achieved_error', 'achieved_offset')
+
+
+def generateQueryPoints(data_points, count, mbr_percentage, rng):
+	'''
+		input:-
+		data_points - (n, 2) array
+		count - number of query points
+		mbr_percentage - area of the query MBR as a fraction of the data MBR area
+		output:-
+		(count, 2) array uniform in a box of that area around the data centroid
+	'''
+	low = data_points.min(axis=0)
+	high = data_points.max(axis=0)
+	side = (high - low) * np.sqrt(mbr_percentage)
+	box_low = np.clip(data_points.mean(axis=0) - side / 2, low, high - side)
+	return box_low + rng.uniform(0, 1, size=(count, 2)) * side
+
+
+def measureApproximation(result_points, exact_points, hull, rng, sample_size=500, block_size=1 << 22):
+	'''
+		input:-
+		result_points, exact_points - (m, 2) and (k, 2) approximate and exact skylines
+		hull - (h, 2) convex hull vertices
+		sample_size - exact skyline points left out of the result that are measured
+		output:-
+		(recall, achieved_error, achieved_offset): the share of the exact
+		skyline in the result, the smallest epsilon for which every measured
+		exact point x has a result point p with d(p,q) <= (1+epsilon) d(x,q)
+		for every vertex q, and the smallest offset with d(p,q) <= d(x,q) + offset
+	'''
+	result_keys = set(map(tuple, result_points.tolist()))
+	missing = np.array([point for point in exact_points.tolist() if tuple(point) not in result_keys]).reshape(-1, 2)
+	recall = 1.0 - len(missing) / float(max(len(exact_points), 1))
+	if len(missing) == 0:
+		return recall, 0.0, 0.0
+	if len(result_points) == 0:
+		return recall, float('inf'), float('inf')
+	if len(missing) > sample_size:
+		missing = missing[rng.choice(len(missing), sample_size, replace=False)]
+	missing_distances = np.sqrt(np.square(missing[:, None, :] - hull[None, :, :]).sum(axis=2))
+	best_ratio = np.full(len(missing), np.inf)
+	best_offset = np.full(len(missing), np.inf)
+	step = max(1, block_size // (len(missing) * len(hull)))
+	for start in range(0, len(result_points), step):
+		distances = np.sqrt(np.square(result_points[start:start + step, None, :] - hull[None, :, :]).sum(axis=2))[:, None, :]
+		best_ratio = np.minimum(best_ratio, (distances / np.maximum(missing_distances, 1e-300)).max(axis=2).min(axis=0))
+		best_offset = np.minimum(best_offset, (distances - missing_distances).max(axis=2).min(axis=0))
+	return recall, max(0.0, float(best_ratio.max()) - 1.0), max(0.0, float(best_offset.max()))
+
+
+def peakMemoryMB():
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# ru_maxrss is in kilobytes on linux and in bytes on mac
+	return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def runCase(case):
+	'''
+		input: case - dict with the CASE_KEYS
+		output: case extended with the measured metrics
+		Runs in a fresh process so that the peak memory belongs to this case only.
+	'''
+	rng = np.random.default_rng(case['seed'])
+	data_points = generatePoints(case['size'], distribution=case['distribution'], rng=rng)
+	query_points = generateQueryPoints(data_points, case['query_points'], case['query_mbr'], rng)
+
+	build_start = time.time()
+	if case['algo'] == 'vs2':
+		algo = VS2Algo(index=VS2Index(data_points=data_points), query_points=query_points, output_file=os.devnull)
+	elif case['algo'] == 'brute':
+		algo = BruteForceAlgo(index=BruteForceIndex(data_points=data_points), query_points=query_points, output_file=os.devnull)
+	else:
+		index = B2S2Index(data_points=data_points, m_value=case['m_value'])
+		algo = B2S2Algo(index=index, query_points=query_points, output_file=os.devnull,
+			epsilon=case['epsilon'], quantum=case['quantum'])
+	build_end = time.time()
+	if case['algo'] == 'vs2':
+		algo.initializeVS2Algo()
+		skyline_points = algo.runVS2Algo()
+	elif case['algo'] == 'brute':
+		algo.initializeBruteForceAlgo()
+		skyline_points = algo.runBruteForceAlgo()
+	else:
+		algo.initializeB2S2Algo()
+		skyline_points = algo.runB2S2Algo()
+	query_end = time.time()
+
+	result = dict(case)
+	result['build_time'] = build_end - build_start
+	result['query_time'] = query_end - build_end
+	result['dominance_checks'] = algo.dominance_check
+	result['nodes_accessed'] = algo.returnRtreeNodesAccessCount()
+	result['skyline_size'] = len(skyline_points)
+	result['peak_memory_mb'] = peakMemoryMB()
+	if algo.isApproximate():
+		# the exact skyline is not timed, it only measures the error
+		exact = B2S2Algo(index=index, query_points=query_points, output_file=os.devnull)
+		exact.initializeB2S2Algo()
+		exact.runB2S2Algo()
+		result['exact_skyline_size'] = len(exact.skyline_points)
+		result['recall'], result['achieved_error'], result['achieved_offset'] = measureApproximation(algo.returnSkylineArray(),
+			exact.returnSkylineArray(), exact.skyline_set.query_points, rng)
+	return result
+
+
+def buildCases(args):
+	cases = []
+	for algo, size, distribution, query_points, query_mbr, m_value, epsilon, quantum in itertools.product(args.algos,
+			args.sizes, args.distributions, args.query_points, args.query_mbr, args.m_values, args.epsilons, args.quanta):
+		if algo in ('vs2', 'brute'):
+			# VS2 and brute force have no R-tree, run them once per combination of the other parameters
+			if m_value != args.m_values[0]:
+				continue
+			m_value = None
+			# and have no approximate mode
+			if epsilon or quantum:
+				continue
+		cases.append({'algo': algo, 'size': size, 'distribution': distribution, 'query_points': query_points,
+			'query_mbr': query_mbr, 'm_value': m_value, 'seed': args.seed, 'epsilon': epsilon, 'quantum': quantum})
+	return cases
+
+
+def runBenchmark(cases, repeat=1):
+	'''
+		Every case runs repeat times, each in its own process; times and memory
+		keep the best run, the counters are deterministic for a seed.
+	'''
+	results = []
+	context = multiprocessing.get_context('spawn')
+	for case in cases:
+		runs = []
+		for _ in range(repeat):
+			with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+				runs.append(executor.submit(runCase, case).result())
+		result = runs[0]
+		for metric in TIME_METRICS + MEMORY_METRICS:
+			result[metric] = min(run[metric] for run in runs)
+		print("%-4s n=%-9d %-9s q=%-4d mbr=%-6g M=%-4s build=%.3fs query=%.3fs dominance=%d nodes=%d skyline=%d peak=%.1fMB" % (
+			result['algo'], result['size'], result['distribution'], result['query_points'], result['query_mbr'],
+			result['m_value'], result['build_time'], result['query_time'], result['dominance_checks'],
+			result['nodes_accessed'], result['skyline_size'], result['peak_memory_mb']))
+		if 'recall' in result:
+			print("     epsilon=%g quantum=%g exact skyline=%d recall=%.4f achieved error=%.4g offset=%.4g" % (result['epsilon'],
+				result['quantum'], result['exact_skyline_size'], result['recall'], result['achieved_error'], result['achieved_offset']))
+		results.append(result)
+	return results
+
+
+def caseKey(result):
+	return tuple(result.get(key, CASE_DEFAULTS.get(key)) for key in CASE_KEYS)
+
+
+def compareResults(results, baseline, tolerance):
+	'''
+		input:-
+		results, baseline - lists of result dicts
+		tolerance - allowed relative slowdown/memory growth, eg. 0.1 for 10%
+		output:-
+		list of regression messages; counters regress on any increase.
+	'''
+	baseline_by_case = dict((caseKey(result), result) for result in baseline)
+	regressions = []
+	for result in results:
+		base = baseline_by_case.get(caseKey(result))
+		if base is None:
+			continue
+		for metric in TIME_METRICS + MEMORY_METRICS:
+			if result[metric] > base[metric] * (1 + tolerance):
+				regressions.append("%s: %s %.4g -> %.4g" % (caseKey(result), metric, base[metric], result[metric]))
+		for metric in COUNT_METRICS:
+			if result[metric] > base[metric]:
+				regressions.append("%s: %s %d -> %d" % (caseKey(result), metric, base[metric], result[metric]))
+	return regressions
+
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = "sweep the skyline engines over data and query parameters")
+	parser.add_argument("--sizes", type = int, nargs = "+", default = [1000, 10000, 100000], help = "numbers of data points, up to 1e7")
+	parser.add_argument("--distributions", nargs = "+", choices = DISTRIBUTIONS, default = list(DISTRIBUTIONS))
+	parser.add_argument("--query-points", type = int, nargs = "+", default = [4, 16], help = "numbers of query points")
+	parser.add_argument("--query-mbr", type = float, nargs = "+", default = [0.01, 0.05], help = "query MBR area as a fraction of the data MBR")
+	parser.add_argument("--m-values", type = int, nargs = "+", default = [4, 16, 64], help = "R-tree M values")
+	parser.add_argument("--algos", nargs = "+", choices = ["b2s2", "vs2", "brute"], default = ["b2s2"])
+	parser.add_argument("--epsilons", type = float, nargs = "+", default = [0.0], help = "B2S2 approximation epsilons, 0 is the exact mode")
+	parser.add_argument("--quanta", type = float, nargs = "+", default = [0.0], help = "B2S2 quantization steps, 0 for none")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--repeat", type = int, default = 1, help = "runs per case, the best time is kept")
+	parser.add_argument("-O", "--output", default = "benchmark.json", help = "results file")
+	parser.add_argument("--results", help = "compare an existing results file instead of running the sweep")
+	parser.add_argument("--compare", help = "baseline results file to flag regressions against")
+	parser.add_argument("--tolerance", type = float, default = 0.1, help = "allowed relative slowdown for --compare")
+
+	args = parser.parse_args()
+	if args.results:
+		with open(args.results) as file:
+			results = json.load(file)
+	else:
+		results = runBenchmark(buildCases(args), args.repeat)
+		with open(args.output, 'w') as file:
+			json.dump(results, file, indent=1)
+
+	if args.compare:
+		with open(args.compare) as file:
+			baseline = json.load(file)
+		regressions = compareResults(results, baseline, args.tolerance)
+		for regression in regressions:
+			print("REGRESSION " + regression)
+		print("%d regressions against %s" % (len(regressions), args.compare))
+		sys.exit(1 if regressions else 0)
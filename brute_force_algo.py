@@ -0,0 +1,131 @@
+import numpy as np
+from rtreelib import Rect
+from b2s2_algo import B2S2Algo
+from convex_hull import ConvexHull
+from data_io import loadPointsFromFile
+from result_cache import newDatasetVersion
+from skyline import nonDominatedRows
+import time
+
+# above these sizes building and walking the R-tree of B2S2 is faster, see selectEngine
+BRUTE_FORCE_MAX_POINTS = 10000
+BRUTE_FORCE_MAX_DISTANCES = 3000000
+
+
+def selectEngine(data_count, query_points):
+	'''
+		input:-
+		data_count - number of data points
+		query_points - query points, only their convex hull matters
+		output:-
+		'brute' when the data x hull-vertex distance matrix is small enough to
+		beat building and walking an R-tree, 'b2s2' otherwise
+	'''
+	ch = ConvexHull(query_points)
+	ch.findConvexHull()
+	hull_size = len(ch.returnConvexHullPoints())
+	if data_count <= BRUTE_FORCE_MAX_POINTS and data_count * hull_size <= BRUTE_FORCE_MAX_DISTANCES:
+		return 'brute'
+	return 'b2s2'
+
+
+class BruteForceIndex(object):
+	"""Data points only, the brute force engine needs no index"""
+	def __init__(self, data_points=None, data_points_file=None):
+		'''
+			Constructor:
+			Input: data_points/data_points_file
+		'''
+		super(BruteForceIndex, self).__init__()
+		load_start_time = time.time()
+		if data_points is not None:
+			self.data_points = np.asarray(data_points, dtype=np.float64).reshape(-1, 2)
+		else:
+			self.data_points = np.asarray(loadPointsFromFile(data_points_file), dtype=np.float64)
+		self.load_time = abs(time.time() - load_start_time) if data_points is None else 0.0
+		self.build_time = 0.0
+		self.m_value = None
+		self.dataset_version = newDatasetVersion()
+
+	def returnDataPoints(self):
+		return self.data_points
+
+	def returnRootBoundingRect(self):
+		min_x, min_y = self.data_points.min(axis=0).tolist()
+		max_x, max_y = self.data_points.max(axis=0).tolist()
+		return Rect(min_x, min_y, max_x, max_y)
+
+	def returnTotalNodesInRTree(self):
+		return 0
+
+	def returnBuildTime(self):
+		return self.build_time
+
+	def returnLoadTime(self):
+		return self.load_time
+
+
+class BruteForceAlgo(B2S2Algo):
+	"""Brute force executor: non dominated rows of the data x hull-vertex distance matrix"""
+
+	def initializeBruteForceAlgo(self):
+		'''
+			Initialize algo elements
+			1. Convex Hull.
+			2. writing available stats of algo to output file.
+		'''
+		self.initializeQuery()
+		self.metrics.addTime('load', self.query_load_time + self.index.returnLoadTime())
+		self.writeInitialStats()
+
+	def returnDistancesToHull(self, ids):
+		'''
+			input: ids - array of data point ids
+			output: (len(ids), hull vertices) distance matrix
+		'''
+		hull = np.asarray(self.convexHullPoints, dtype=np.float64).reshape(-1, 2)
+		return np.sqrt(np.square(self.data_points[ids][:, None, :] - hull[None, :, :]).sum(axis=2))
+
+	def runBruteForceAlgo(self, block_size=1 << 22, seed_count=16):
+		'''
+			**IMPORATANT : call this method after you have called object.initializeBruteForceAlgo()
+			1. Box B is the intersection of the MBRs of the circles of the
+			   seed_count points closest to the hull centroid; a point outside the
+			   MBR of any point's circles is farther from every hull vertex.
+			2. The points inside box B are compared with the skyline of the points
+			   with a smaller distance sum, in chunks of distance rows so at most
+			   about block_size values are held at once.
+			Dominance follows B2S2, so the engine picked by selectEngine does not
+			change the answer: of points equally far from every hull vertex only
+			one is kept, points inside the hull are all kept.
+			A skyline found in the result cache skips both steps.
+		'''
+		with self.metrics.phase('traversal'):
+			if not self.lookupResultCache():
+				self.traverseBruteForce(block_size, seed_count)
+				self.storeInResultCache()
+		self.finalizeMetrics()
+		return self.skyline_points
+
+	def traverseBruteForce(self, block_size, seed_count):
+		hull = np.asarray(self.convexHullPoints, dtype=np.float64).reshape(-1, 2)
+		candidates = np.arange(len(self.data_points))
+		if len(self.data_points) > seed_count:
+			centroid_distances = np.square(self.data_points - hull.mean(axis=0)).sum(axis=1)
+			seed_ids = np.argpartition(centroid_distances, seed_count)[:seed_count]
+			radii = self.returnDistancesToHull(seed_ids)[:, :, None]
+			box_low = (hull[None, :, :] - radii).min(axis=1).max(axis=0)
+			box_high = (hull[None, :, :] + radii).max(axis=1).min(axis=0)
+			candidates = np.flatnonzero(((self.data_points >= box_low) & (self.data_points <= box_high)).all(axis=1))
+		self.metrics.increment('pruned outside box B', len(self.data_points) - len(candidates))
+
+		sums = np.empty(len(candidates))
+		step = max(1, block_size // len(hull))
+		for start in range(0, len(candidates), step):
+			sums[start:start + step] = self.returnDistancesToHull(candidates[start:start + step]).sum(axis=1)
+		inside_hull = self.ch.arePointsInsideConvexHull(self.data_points[candidates])
+		skyline_ids = candidates[nonDominatedRows(sums, lambda ids: self.returnDistancesToHull(candidates[ids]),
+			len(hull), block_size, exempt=inside_hull)]
+		self.dominance_check = len(candidates)
+		for x, y in self.data_points[skyline_ids].tolist():
+			self.addToSkyline(x, y)
@@ -1,6 +1,5 @@
 import numpy as np
 import scipy.spatial #import ConvexHull, convex_hull_plot_2d
-import matplotlib.pyplot as plt
 from rtreelib import Rect
 
 class ConvexHull(object):
@@ -15,6 +14,7 @@ class ConvexHull(object):
 		super(ConvexHull, self).__init__()
 		self.points = query_points
 		self.convexHullPoints = None
+		self.hull_array = None
 
 	def convertToPoints(self):
 		self.xpoints = np.array(self.xpoints)
@@ -34,16 +34,36 @@ class ConvexHull(object):
 
 	def findConvexHull(self):
 		try:
-			if len(self.points) > 2:
+			points = np.asarray(self.points, dtype=np.float64).reshape(-1, 2)
+			if len(points) > 2 and np.linalg.matrix_rank(points - points[0]) < 2:
+				# Qhull rejects collinear points, their hull is the segment between the end points
+				order = np.lexsort((points[:, 1], points[:, 0]))
+				self.convexHullPoints = [self.points[order[0]], self.points[order[-1]]]
+			elif len(self.points) > 2:
 				self.convexHull = scipy.spatial.ConvexHull(self.points)
 				self.convertToHullPoints()
 			else:
-				self.convexHullPoints = self.points
+				self.convexHullPoints = [point for point in self.points]
+			self.prepareContainmentTest()
 		except Exception as e:
 			print(e)
 
+	def prepareContainmentTest(self):
+		'''
+			Stores the hull vertices in counter clockwise order, both as a numpy
+			array for the batched test and as tuples for the scalar one.
+		'''
+		hull = np.array(self.convexHullPoints, dtype=np.float64).reshape(-1, 2)
+		if len(hull) > 2:
+			signed_area = np.sum(hull[:, 0] * np.roll(hull[:, 1], -1) - np.roll(hull[:, 0], -1) * hull[:, 1])
+			if signed_area < 0:
+				hull = hull[::-1]
+		self.hull_array = hull
+		self.hull_tuples = [tuple(vertex) for vertex in hull.tolist()]
+
 	def plotConvexHull(self):
 		if self.convexHullPoints:
+			import matplotlib.pyplot as plt
 			plt.plot(self.points[self.convexHull.vertices, 0], self.points[self.convexHull.vertices, 1], 'r--')
 			plt.plot(self.xpoints, self.ypoints, 'o')
 			plt.show()
@@ -91,34 +111,104 @@ class ConvexHull(object):
 		return np.degrees(angle)
 
 	def isPointInsideConvexHull(self, point):
-		point = np.array(point)
-		if self.convexHullPoints:
-			angleSum = 0
-			totalPoints = self.convexHullPointsCount()
-			for i in range(totalPoints):
-				if point[0] == self.convexHullPoints[i][0] and point[1] == self.convexHullPoints[i][1]:
-					return True
-				point1 = np.array(self.convexHullPoints[i%totalPoints])
-				point2 = np.array(self.convexHullPoints[(i+1)%totalPoints])
-				angleSum += self.returnAngle(point, point1, point2)
-			if abs(angleSum - 360) < 0.00001:
-				return True
-			else:
-				return False
-		else:
+		'''
+			Exact containment test, O(log h): binary search for the fan triangle
+			around the first hull vertex containing point, then one orientation
+			test against its outer edge. Points on the boundary are inside.
+		'''
+		if self.hull_array is None:
 			print("Points yet to be calculated\n Use below to calculate convex hull points.....\n\tobject.findConvexHull()")
 			return False
+		x = float(point[0])
+		y = float(point[1])
+		hull = self.hull_tuples
+		total = len(hull)
+		x0, y0 = hull[0]
+		if total == 1:
+			return x == x0 and y == y0
+		if total == 2:
+			x1, y1 = hull[1]
+			return (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0) == 0 and \
+				min(x0, x1) <= x <= max(x0, x1) and min(y0, y1) <= y <= max(y0, y1)
+
+		dx = x - x0
+		dy = y - y0
+		if (hull[1][0] - x0) * dy - (hull[1][1] - y0) * dx < 0:
+			return False
+		if (hull[-1][0] - x0) * dy - (hull[-1][1] - y0) * dx > 0:
+			return False
+		lo, hi = 1, total - 1
+		while hi - lo > 1:
+			mid = (lo + hi) // 2
+			if (hull[mid][0] - x0) * dy - (hull[mid][1] - y0) * dx >= 0:
+				lo = mid
+			else:
+				hi = mid
+		xa, ya = hull[lo]
+		xb, yb = hull[hi]
+		return (xb - xa) * (y - ya) - (yb - ya) * (x - xa) >= 0
+
+	def arePointsInsideConvexHull(self, points):
+		'''
+			input:-
+			points - (k, 2) array
+			output:-
+			boolean array of length k, batched version of isPointInsideConvexHull
+		'''
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		hull = self.hull_array
+		total = len(hull)
+		d = points - hull[0]
+		if total == 1:
+			return (d == 0).all(axis=1)
+		if total == 2:
+			e = hull[1] - hull[0]
+			return (e[0] * d[:, 1] - e[1] * d[:, 0] == 0) & \
+				(points >= hull.min(axis=0)).all(axis=1) & (points <= hull.max(axis=0)).all(axis=1)
+
+		fan = hull - hull[0]
+		inside = (fan[1, 0] * d[:, 1] - fan[1, 1] * d[:, 0] >= 0) & \
+			(fan[-1, 0] * d[:, 1] - fan[-1, 1] * d[:, 0] <= 0)
+		lo = np.ones(len(points), dtype=np.intp)
+		hi = np.full(len(points), total - 1, dtype=np.intp)
+		for _ in range(int(np.ceil(np.log2(total)))):
+			mid = (lo + hi) // 2
+			active = hi - lo > 1
+			left = fan[mid, 0] * d[:, 1] - fan[mid, 1] * d[:, 0] >= 0
+			lo = np.where(active & left, mid, lo)
+			hi = np.where(active & ~left, mid, hi)
+		a = hull[lo]
+		b = hull[hi]
+		inside &= (b[:, 0] - a[:, 0]) * (points[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (points[:, 0] - a[:, 0]) >= 0
+		return inside
+
+	def areRectanglesInsideConvexHull(self, bounds):
+		'''
+			input:-
+			bounds - (k, 4) array of min_x, min_y, max_x, max_y
+			output:-
+			boolean array of length k, all four corners of every rect checked in one call
+		'''
+		bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+		corners = bounds[:, [0, 1, 0, 3, 2, 1, 2, 3]].reshape(-1, 2)
+		return self.arePointsInsideConvexHull(corners).reshape(-1, 4).all(axis=1)
 
 	def isRectangleInsideConvexHull(self, rect):
 		'''
 			input: rect - Rect object
 			process: to check if all points of rect inside convex hull or not
 		'''
-		if self.convexHullPoints:
-			point1 = (rect.min_x, rect.min_y)
-			point2 = (rect.min_x, rect.max_y)
-			point3 = (rect.max_x, rect.min_y)
-			point4 = (rect.max_x, rect.max_y)
+		return self.isBoundsInsideConvexHull(rect.min_x, rect.min_y, rect.max_x, rect.max_y)
+
+	def isBoundsInsideConvexHull(self, min_x, min_y, max_x, max_y):
+		'''
+			isRectangleInsideConvexHull on plain coordinates, no Rect is needed
+		'''
+		if self.hull_array is not None:
+			point1 = (min_x, min_y)
+			point2 = (min_x, max_y)
+			point3 = (max_x, min_y)
+			point4 = (max_x, max_y)
 			if self.isPointInsideConvexHull(point1) and \
 					self.isPointInsideConvexHull(point2) and \
 					self.isPointInsideConvexHull(point3) and \
@@ -0,0 +1,241 @@
+import numpy as np
+import os
+import warnings
+
+BINARY_EXTENSIONS = ('.bin', '.f64')
+# numpy 1.23 and later parse loadtxt in C, faster than fromstring on the same text
+LOADTXT_IN_C = tuple(int(part) for part in np.__version__.split('.')[:2]) >= (1, 23)
+
+
+def isTwoTokensPerLine(chars, newlines):
+	'''
+		input:-
+		chars - uint8 array of bytes holding twice as many tokens as lines
+		newlines - positions of the newlines in chars
+		output: True when every line holds exactly two whitespace separated
+		tokens. "x y" lines, one space and no other whitespace on every line,
+		are recognized from the positions of the spaces alone; otherwise the
+		second token of line i must start before the i-th newline and the
+		first token of line i+1 after it.
+	'''
+	spaces = np.flatnonzero(chars == 32)
+	line_count = len(newlines) + int(len(chars) > 0 and chars[-1] != 10)
+	if len(spaces) == line_count and len(spaces) + len(newlines) == np.count_nonzero(chars <= 32):
+		return bool((spaces[:len(newlines)] < newlines).all() and (spaces[1:] > newlines[:len(spaces) - 1]).all())
+	blank = (chars == 32) | ((chars >= 9) & (chars <= 13))
+	starts = ~blank
+	starts[1:] &= blank[:-1]
+	token_starts = np.flatnonzero(starts)
+	if len(token_starts) != 2 * line_count:
+		return False
+	newlines = newlines[:line_count]
+	return bool((token_starts[1::2][:len(newlines)] < newlines).all() and
+		(token_starts[2::2] > newlines[:len(token_starts[2::2])]).all())
+
+
+def parseTextBlock(data, first_line_number):
+	'''
+		input:-
+		data - bytes holding complete "x y" lines
+		first_line_number - line number of the first line in data, for errors
+		output:-
+		(k, 2) float64 array
+		numpy's C parser reads the whole block, the lines are only read one by
+		one to skip blank lines and extra columns or to report a malformed line.
+	'''
+	chars = np.frombuffer(data, dtype=np.uint8)
+	newlines = np.flatnonzero(chars == 10)
+	line_count = len(newlines) + (0 if data.endswith(b'\n') else 1)
+	try:
+		with warnings.catch_warnings():
+			# older numpy returns the values before a malformed token with a warning
+			warnings.simplefilter('ignore', DeprecationWarning)
+			values = np.fromstring(data, dtype=np.float64, sep=' ')
+	except ValueError:
+		values = None
+	if values is not None and len(values) == 2 * line_count and isTwoTokensPerLine(chars, newlines):
+		return values.reshape(-1, 2)
+
+	# slow path: blank lines, extra columns or a malformed line somewhere in the block
+	points = []
+	for i, line in enumerate(data.splitlines()):
+		tokens = line.split()
+		if not tokens:
+			continue
+		try:
+			points.append((float(tokens[0]), float(tokens[1])))
+		except (IndexError, ValueError):
+			raise ValueError("Cannot read point at line number %d: %r" % (first_line_number + i, line))
+	return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+
+def loadPointsFromTextFile(filename, block_size=1 << 24):
+	'''
+		input:-
+		filename - file with one "x y" point per line
+		block_size - bytes parsed per vectorized step, bounds the temporary memory
+		output:-
+		(n, 2) float64 array
+		The whole file goes to numpy's C parser when there is one, blocks are
+		parsed with parseTextBlock otherwise or when some line is not "x y".
+	'''
+	if LOADTXT_IN_C:
+		try:
+			with warnings.catch_warnings():
+				# an empty file is not an error here
+				warnings.simplefilter('ignore', UserWarning)
+				points = np.loadtxt(filename, dtype=np.float64, comments=None, ndmin=2)
+		except ValueError:
+			# ragged or malformed lines, the blocks below read or report them
+			points = None
+		if points is not None and points.shape[1] >= 2:
+			return np.ascontiguousarray(points[:, :2])
+
+	blocks = []
+	line_number = 1
+	remainder = b''
+	with open(filename, 'rb') as file:
+		while True:
+			block = file.read(block_size)
+			data = remainder + block
+			if block:
+				cut = data.rfind(b'\n') + 1
+				data, remainder = data[:cut], data[cut:]
+			if data:
+				blocks.append(parseTextBlock(data, line_number))
+				line_number += data.count(b'\n')
+			if not block:
+				break
+	if not blocks:
+		return np.empty((0, 2))
+	return np.concatenate(blocks)
+
+
+def loadPointsFromFile(filename):
+	'''
+		input:-
+		filename - "x y" text file, .npy file or raw little endian float64
+				   file (.bin/.f64) holding x0 y0 x1 y1 ...
+		output:-
+		(n, 2) float64 array, memory mapped for the binary formats
+	'''
+	extension = os.path.splitext(filename)[1].lower()
+	if extension == '.npy':
+		points = np.load(filename, mmap_mode='r')
+		if points.ndim != 2 or points.shape[1] != 2:
+			raise ValueError("%s holds an array of shape %s, expected (n, 2)" % (filename, points.shape))
+		return points
+	if extension in BINARY_EXTENSIONS:
+		size = os.path.getsize(filename)
+		if size % 16:
+			raise ValueError("%s size is not a multiple of two float64 values" % filename)
+		if size == 0:
+			return np.empty((0, 2))
+		return np.memmap(filename, dtype='<f8', mode='r').reshape(-1, 2)
+	return loadPointsFromTextFile(filename)
+
+
+def countPointsInFile(filename):
+	'''
+		input: filename - any file loadPointsFromFile reads
+		output: number of points, for text files the number of lines, without
+		parsing them
+	'''
+	extension = os.path.splitext(filename)[1].lower()
+	if extension == '.npy' or extension in BINARY_EXTENSIONS:
+		return len(loadPointsFromFile(filename))
+	count = 0
+	last = b'\n'
+	with open(filename, 'rb') as file:
+		for block in iter(lambda: file.read(1 << 24), b''):
+			count += block.count(b'\n')
+			last = block[-1:]
+	return count + (0 if last == b'\n' else 1)
+
+
+def writePointsToFile(points, filename, block_size=1 << 16):
+	'''
+		input:-
+		points - (n, 2) array
+		filename - output file, format picked by extension like loadPointsFromFile,
+				   .csv gets an x,y header and comma separated lines
+		block_size - points formatted per step of the text formats
+		Text is formatted a block of points per string operation and goes
+		through one buffered file in a single pass.
+	'''
+	points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+	extension = os.path.splitext(filename)[1].lower()
+	if extension == '.npy':
+		np.save(filename, points)
+	elif extension in BINARY_EXTENSIONS:
+		points.astype('<f8').tofile(filename)
+	else:
+		line = '%.17g,%.17g\n' if extension == '.csv' else '%.17g %.17g\n'
+		with open(filename, 'w', buffering=1 << 20) as file:
+			if extension == '.csv':
+				file.write('x,y\n')
+			writeTextRows(file, points, line, block_size)
+
+
+def writeTextRows(file, rows, line, block_size):
+	'''
+		input: line - format of one row, rows are formatted block_size at a time
+	'''
+	for start in range(0, len(rows), block_size):
+		block = rows[start:start + block_size]
+		file.write((line * len(block)) % tuple(block.ravel().tolist()))
+
+
+def writePointSetsToFile(point_sets, filename, block_size=1 << 16):
+	'''
+		input:-
+		point_sets - list of (n, 2) arrays, e.g. the skylines of a batch
+		filename - output file, format picked by extension: .npy and .bin/.f64
+				   hold (set, x, y) rows, .csv a set,x,y header and comma separated
+				   lines, text the "x y" lines of every set with a blank line
+				   between sets, the format loadQuerySetsFromFile reads
+	'''
+	point_sets = [np.asarray(points, dtype=np.float64).reshape(-1, 2) for points in point_sets]
+	extension = os.path.splitext(filename)[1].lower()
+	if extension == '.npy' or extension in BINARY_EXTENSIONS or extension == '.csv':
+		rows = np.concatenate([np.column_stack((np.full(len(points), set_index, dtype=np.float64), points))
+			for set_index, points in enumerate(point_sets)] + [np.empty((0, 3))])
+		if extension == '.npy':
+			np.save(filename, rows)
+		elif extension == '.csv':
+			with open(filename, 'w', buffering=1 << 20) as file:
+				file.write('set,x,y\n')
+				writeTextRows(file, rows, '%d,%.17g,%.17g\n', block_size)
+		else:
+			rows.astype('<f8').tofile(filename)
+		return
+	with open(filename, 'w', buffering=1 << 20) as file:
+		for set_index, points in enumerate(point_sets):
+			if set_index:
+				file.write('\n')
+			writeTextRows(file, points, '%.17g %.17g\n', block_size)
+
+
+def loadQuerySetsFromFile(filename):
+	'''
+		input:-
+		filename - text file of query sets, each set is a block of "x y"
+				   lines and the sets are separated by blank lines
+		output:-
+		list of (k, 2) float64 arrays, in file order
+	'''
+	query_sets = []
+	block = []
+	first_line_number = 1
+	with open(filename, 'rb') as file:
+		for line_number, line in enumerate(file, 1):
+			if line.strip():
+				if not block:
+					first_line_number = line_number
+				block.append(line)
+			elif block:
+				query_sets.append(parseTextBlock(b''.join(block), first_line_number))
+				block = []
+	if block:
+		query_sets.append(parseTextBlock(b''.join(block), first_line_number))
+	return query_sets
@@ -1,9 +1,47 @@
 import numpy as np
 import sys
+from data_io import writePointsToFile
 
-numbers = np.random.uniform(low=int(sys.argv[3]), high=int(sys.argv[4]),size=(int(sys.argv[1]),2))
+DISTRIBUTIONS = ('uniform', 'clustered', 'gaussian', 'skewed')
 
-file = open(sys.argv[2], 'w')
 
-for num in numbers:
-	file.write(str(num[0]) + " " + str(num[1]) + "\n")
\ No newline at end of file
+def generatePoints(count, low=0, high=1, distribution='uniform', rng=None):
+	'''
+		input:-
+		count - number of points
+		low, high - points lie in the square [low, high] x [low, high]
+		distribution - uniform, clustered (gaussian blobs), gaussian (one blob
+					   in the middle) or skewed (heavy tailed, dense corner like
+					   real world locations)
+		output:-
+		(count, 2) array
+	'''
+	rng = rng if rng is not None else np.random.default_rng()
+	if distribution == 'clustered':
+		centers = rng.uniform(0.1, 0.9, size=(max(count // 10000, 10), 2))
+	points = np.empty((0, 2))
+	while len(points) < count:
+		missing = count - len(points)
+		if distribution == 'uniform':
+			batch = rng.uniform(0, 1, size=(missing, 2))
+		elif distribution == 'clustered':
+			batch = centers[rng.integers(0, len(centers), size=missing)] + rng.normal(0, 0.02, size=(missing, 2))
+		elif distribution == 'gaussian':
+			batch = rng.normal(0.5, 0.15, size=(missing, 2))
+		elif distribution == 'skewed':
+			batch = rng.pareto(3.0, size=(missing, 2)) / 4
+		else:
+			raise ValueError("Unknown distribution %s, expected one of %s" % (distribution, ', '.join(DISTRIBUTIONS)))
+		# points falling outside the unit square are drawn again
+		batch = batch[((batch >= 0) & (batch <= 1)).all(axis=1)]
+		points = np.concatenate((points, batch))
+	return low + points * (high - low)
+
+
+if __name__ == '__main__':
+	# usage: python generate_data.py count output_file low high [distribution]
+	# the output format follows the extension: .npy, .bin (raw float64) or text
+	distribution = sys.argv[5] if len(sys.argv) > 5 else 'uniform'
+	numbers = generatePoints(int(sys.argv[1]), int(sys.argv[3]), int(sys.argv[4]), distribution)
+
+	writePointsToFile(numbers, sys.argv[2])
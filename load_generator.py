@@ -0,0 +1,131 @@
+import numpy as np
+import argparse
+import asyncio
+import json
+from data_io import loadQuerySetsFromFile
+from skyline_server import LINE_LIMIT
+
+
+def generateQuerySets(count, query_points, query_side, bounds, rng):
+	'''
+		input:-
+		count - number of query sets
+		query_points - points per set
+		query_side - side of the square each set is drawn in, as a fraction of bounds
+		bounds - (min_x, min_y, max_x, max_y) the squares are placed in
+		output:-
+		list of (query_points, 2) arrays
+	'''
+	low = np.array(bounds[:2], dtype=np.float64)
+	side = (np.array(bounds[2:], dtype=np.float64) - low) * query_side
+	corners = low + rng.uniform(0, 1, size=(count, 2)) * (np.array(bounds[2:]) - low - side)
+	return [corner + rng.uniform(0, 1, size=(query_points, 2)) * side for corner in corners]
+
+
+async def openConnection(args):
+	if args.unix:
+		return await asyncio.open_unix_connection(args.unix, limit=LINE_LIMIT)
+	return await asyncio.open_connection(args.host, args.port, limit=LINE_LIMIT)
+
+
+async def runConnection(args, query_sets, next_request, latencies, errors, start_times):
+	'''
+		One connection sending its requests back to back (closed loop), or at
+		the times in start_times when a --rate is given (open loop).
+	'''
+	reader, writer = await openConnection(args)
+	loop = asyncio.get_running_loop()
+	try:
+		while True:
+			request_id = next(next_request, None)
+			if request_id is None:
+				break
+			if start_times is not None:
+				delay = start_times[request_id] - loop.time()
+				if delay > 0:
+					await asyncio.sleep(delay)
+			query_points = query_sets[request_id % len(query_sets)]
+			sent = loop.time() if start_times is None else start_times[request_id]
+			writer.write((json.dumps({'id': request_id, 'query': query_points.tolist()}) + "\n").encode())
+			await writer.drain()
+			response = json.loads(await reader.readline())
+			if 'error' in response:
+				errors.append(response['error'])
+			else:
+				latencies.append(loop.time() - sent)
+	finally:
+		writer.close()
+
+
+async def requestServerStats(args):
+	reader, writer = await openConnection(args)
+	try:
+		writer.write(b'{"id": 0, "op": "stats"}\n')
+		await writer.drain()
+		return json.loads(await reader.readline())['stats']
+	finally:
+		writer.close()
+
+
+async def generateLoad(args, query_sets):
+	'''
+		output: dict of the client side latencies and throughput and the
+		server side stats after the run
+	'''
+	loop = asyncio.get_running_loop()
+	latencies = []
+	errors = []
+	next_request = iter(range(args.requests))
+	start_times = None
+	start = loop.time()
+	if args.rate:
+		# poisson arrivals, latency counts from the planned send time so a slow server is not hidden
+		start_times = (start + np.cumsum(np.random.default_rng(args.seed).exponential(1.0 / args.rate, args.requests))).tolist()
+	await asyncio.gather(*[runConnection(args, query_sets, next_request, latencies, errors, start_times)
+		for _ in range(args.concurrency)])
+	wall_time = loop.time() - start
+	result = {
+		'requests': len(latencies),
+		'errors': len(errors),
+		'concurrency': args.concurrency,
+		'wall_time_s': wall_time,
+		'throughput_rps': len(latencies) / wall_time if wall_time else 0.0,
+	}
+	if latencies:
+		p50, p90, p99 = np.percentile(np.array(latencies), [50, 90, 99]).tolist()
+		result.update({'latency_p50_ms': 1000 * p50, 'latency_p90_ms': 1000 * p90,
+			'latency_p99_ms': 1000 * p99, 'latency_max_ms': 1000 * max(latencies)})
+	if errors:
+		result['first_error'] = errors[0]
+	result['server'] = await requestServerStats(args)
+	return result
+
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = "measure latency percentiles and throughput of skyline_server.py")
+	parser.add_argument("--unix", help = "Unix socket of the server")
+	parser.add_argument("--host", default = "127.0.0.1")
+	parser.add_argument("--port", type = int, default = 8765)
+	parser.add_argument("-n", "--requests", type = int, default = 1000, help = "number of requests sent")
+	parser.add_argument("-c", "--concurrency", type = int, default = 8, help = "number of connections")
+	parser.add_argument("--rate", type = float, help = "open loop: requests per second over all connections, poisson arrivals")
+	parser.add_argument("--queries", help = "file of query sets separated by blank lines, cycled through")
+	parser.add_argument("--query-points", type = int, default = 5, help = "points per generated query set")
+	parser.add_argument("--query-side", type = float, default = 0.05, help = "side of the square a generated set is drawn in, fraction of --bounds")
+	parser.add_argument("--bounds", type = float, nargs = 4, default = [0, 0, 1, 1], metavar = ("MIN_X", "MIN_Y", "MAX_X", "MAX_Y"),
+		help = "rect the generated query sets are placed in, the data MBR")
+	parser.add_argument("--distinct", type = int, default = 100, help = "number of generated query sets, cycled through")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("-O", "--output", help = "json file for the results")
+	args = parser.parse_args()
+
+	if args.queries:
+		query_sets = loadQuerySetsFromFile(args.queries)
+	else:
+		query_sets = generateQuerySets(args.distinct, args.query_points, args.query_side, args.bounds, np.random.default_rng(args.seed))
+	result = asyncio.run(generateLoad(args, query_sets))
+	print(json.dumps(result, indent=1))
+	if args.output:
+		with open(args.output, 'w') as file:
+			json.dump(result, file, indent=1)
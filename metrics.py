@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+import json
+import time
+
+
+class AlgoMetrics(object):
+	"""Per phase timers and counters of one skyline query"""
+
+	PHASES = ('load', 'hull', 'index build', 'traversal')
+	COUNTERS = ('heap pushes', 'heap pops', 'peak heap size', 'pruned outside box B', 'pruned dominated',
+		'accepted inside hull', 'dominance checks', 'nodes accessed', 'skyline size')
+
+	def __init__(self):
+		super(AlgoMetrics, self).__init__()
+		self.timers = dict((phase, 0.0) for phase in self.PHASES)
+		self.counters = dict((counter, 0) for counter in self.COUNTERS)
+		self.extra = {}
+
+	@contextmanager
+	def phase(self, name):
+		'''
+			with metrics.phase('hull'): ... adds the elapsed time to that phase
+		'''
+		start = time.time()
+		try:
+			yield
+		finally:
+			self.addTime(name, time.time() - start)
+
+	def addTime(self, name, seconds):
+		self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+	def increment(self, counter, amount=1):
+		self.counters[counter] = self.counters.get(counter, 0) + amount
+
+	def setCounter(self, counter, value):
+		self.counters[counter] = value
+
+	def updateMax(self, counter, value):
+		if value > self.counters.get(counter, 0):
+			self.counters[counter] = value
+
+	def returnCounter(self, counter):
+		return self.counters.get(counter, 0)
+
+	def returnTime(self, name):
+		return self.timers.get(name, 0.0)
+
+	def toDict(self):
+		data = {'timers': dict(self.timers), 'counters': dict(self.counters)}
+		data.update(self.extra)
+		return data
+
+	def writeJSON(self, filename):
+		with open(filename, 'w') as file:
+			json.dump(self.toDict(), file, indent=1)
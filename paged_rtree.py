@@ -0,0 +1,241 @@
+import numpy as np
+import collections
+import os
+import struct
+import time
+from rtreelib import Rect
+from rtree import RTreeInstance, fileChecksum
+from data_io import loadPointsFromFile
+from result_cache import newDatasetVersion
+
+PAGED_RTREE_MAGIC = b'B2S2PGT\0'
+PAGED_RTREE_VERSION = 1
+# magic, version, page size, max_entries, node count, point count, nodes_count stat, source checksum, root rect
+PAGED_RTREE_HEADER = struct.Struct('<8sIIIqqq32s4d')
+# is_leaf, entry count; followed by the entry ids (int64) and then their rects
+# (4 float64) for inner nodes or their coordinates (2 float64) for leaves
+PAGE_HEADER = struct.Struct('<B3xI')
+INNER_ENTRY_SIZE = 8 + 4 * 8
+PAGE_ALIGNMENT = 512
+
+
+def pageSizeForEntries(max_entries):
+	'''
+		output: smallest multiple of PAGE_ALIGNMENT that holds a full inner node
+	'''
+	needed = max(PAGE_HEADER.size + max_entries * INNER_ENTRY_SIZE, PAGED_RTREE_HEADER.size)
+	return -(-needed // PAGE_ALIGNMENT) * PAGE_ALIGNMENT
+
+
+def writePagedRTree(filename, arrays, max_entries, nodes_count, page_size=None, source_file=None):
+	'''
+		input:-
+		filename - paged R-tree file to write
+		arrays - tuple of RTreeInstance.flattenToArrays
+		max_entries - M of the tree
+		nodes_count - nodes_count stat of the tree
+		page_size - bytes per page, defaults to pageSizeForEntries(max_entries)
+		source_file - data file the points came from, its checksum is stored
+		process: page 0 holds the file header, node i is page i + 1, one node
+		per page; the points follow the last page for returnDataPoints.
+	'''
+	points, node_bounds, child_start, children, node_is_leaf = arrays
+	page_size = page_size if page_size else pageSizeForEntries(max_entries)
+	if PAGE_HEADER.size + max_entries * INNER_ENTRY_SIZE > page_size or PAGED_RTREE_HEADER.size > page_size:
+		raise ValueError("page size %d cannot hold a node of M = %d, it needs %d bytes" % (
+			page_size, max_entries, pageSizeForEntries(max_entries)))
+	checksum = fileChecksum(source_file) if source_file else b'\0' * 32
+	root_bounds = node_bounds[0].tolist()
+	header = PAGED_RTREE_HEADER.pack(PAGED_RTREE_MAGIC, PAGED_RTREE_VERSION, page_size, max_entries, len(node_bounds),
+		len(points), nodes_count, checksum, *root_bounds)
+	with open(filename, 'wb') as file:
+		file.write(header.ljust(page_size, b'\0'))
+		for node_id in range(len(node_bounds)):
+			child_ids = np.asarray(children[child_start[node_id]:child_start[node_id + 1]], dtype='<i8')
+			if node_is_leaf[node_id]:
+				entries = np.asarray(points[child_ids], dtype='<f8')
+			else:
+				entries = np.asarray(node_bounds[child_ids], dtype='<f8')
+			page = PAGE_HEADER.pack(int(node_is_leaf[node_id]), len(child_ids)) + child_ids.tobytes() + entries.tobytes()
+			file.write(page.ljust(page_size, b'\0'))
+		file.write(np.ascontiguousarray(points, dtype='<f8').tobytes())
+
+
+class BufferPool(object):
+	"""LRU pool of fixed size pages read from a file"""
+	def __init__(self, filename, page_size, capacity=1024):
+		'''
+			input:-
+			filename - paged file
+			page_size - bytes per page
+			capacity - number of pages kept in memory
+		'''
+		super(BufferPool, self).__init__()
+		self.file = open(filename, 'rb')
+		self.page_size = page_size
+		self.capacity = max(1, capacity)
+		self.pages = collections.OrderedDict()
+		self.logical_reads = 0
+		self.physical_reads = 0
+		self.evictions = 0
+
+	def readPage(self, page_id):
+		'''
+			output: bytes of the page, read from the file only when it is not in
+			the pool; that read is a physical read, the least recently used page
+			is dropped when the pool is full.
+		'''
+		self.logical_reads += 1
+		page = self.pages.get(page_id)
+		if page is not None:
+			self.pages.move_to_end(page_id)
+			return page
+		self.physical_reads += 1
+		self.file.seek(page_id * self.page_size)
+		page = self.file.read(self.page_size)
+		self.pages[page_id] = page
+		if len(self.pages) > self.capacity:
+			self.pages.popitem(last=False)
+			self.evictions += 1
+		return page
+
+	def returnHitRatio(self):
+		if not self.logical_reads:
+			return 0.0
+		return (self.logical_reads - self.physical_reads) / float(self.logical_reads)
+
+	def close(self):
+		self.pages.clear()
+		self.file.close()
+
+
+class PagedRTreeIndex(object):
+	"""R-tree kept on disk in fixed size pages, nodes are read through a BufferPool"""
+	def __init__(self, filename, buffer_pages=1024, source_file=None):
+		'''
+			Constructor:
+			Input: filename - file written by writePagedRTree
+				   buffer_pages - capacity of the buffer pool in pages
+				   source_file - if given, its checksum must match the stored one
+			Raises ValueError on a file of another format version or built from
+			different data.
+		'''
+		super(PagedRTreeIndex, self).__init__()
+		load_start_time = time.time()
+		with open(filename, 'rb') as file:
+			header = file.read(PAGED_RTREE_HEADER.size)
+		if len(header) != PAGED_RTREE_HEADER.size:
+			raise ValueError("%s is not a paged R-tree file" % filename)
+		fields = PAGED_RTREE_HEADER.unpack(header)
+		magic, version, self.page_size, self.m_value, self.node_count, point_count, self.nodes_count, checksum = fields[:8]
+		if magic != PAGED_RTREE_MAGIC:
+			raise ValueError("%s is not a paged R-tree file" % filename)
+		if version != PAGED_RTREE_VERSION:
+			raise ValueError("%s has format version %d, expected %d" % (filename, version, PAGED_RTREE_VERSION))
+		if source_file and fileChecksum(source_file) != checksum:
+			raise ValueError("%s is stale, it was not built from the current contents of %s" % (filename, source_file))
+
+		self.root_bounding_rect = Rect(*fields[8:])
+		if point_count:
+			self.data_points = np.memmap(filename, dtype='<f8', mode='r', offset=(self.node_count + 1) * self.page_size,
+				shape=(point_count, 2))
+		else:
+			self.data_points = np.empty((0, 2))
+		self.buffer_pool = BufferPool(filename, self.page_size, buffer_pages)
+		self.load_time = abs(time.time() - load_start_time)
+		self.build_time = 0.0
+		self.dataset_version = newDatasetVersion()
+
+	def returnNodeCount(self):
+		return self.node_count
+
+	def returnNodeEntries(self, node_id):
+		'''
+			output: (bounds, entry_ids) like B2S2Index.returnNodeEntries, read from
+			the page of node_id through the buffer pool
+		'''
+		page = self.buffer_pool.readPage(node_id + 1)
+		is_leaf, count = PAGE_HEADER.unpack_from(page)
+		entry_ids = np.frombuffer(page, dtype='<i8', count=count, offset=PAGE_HEADER.size)
+		offset = PAGE_HEADER.size + 8 * count
+		if is_leaf:
+			coordinates = np.frombuffer(page, dtype='<f8', count=2 * count, offset=offset).reshape(-1, 2)
+			return np.tile(coordinates, 2), entry_ids + self.node_count
+		return np.frombuffer(page, dtype='<f8', count=4 * count, offset=offset).reshape(-1, 4), entry_ids
+
+	def returnDeltaEntries(self):
+		'''
+			The paged tree is read only, it has no inserted points.
+		'''
+		return np.empty((0, 4)), np.empty(0, dtype=np.int64)
+
+	def returnDataPoints(self):
+		return self.data_points
+
+	def returnRTree(self):
+		'''
+			The tree has no in memory RTreeInstance.
+		'''
+		return None
+
+	def returnRootBoundingRect(self):
+		return self.root_bounding_rect
+
+	def returnTotalNodesInRTree(self):
+		return self.nodes_count
+
+	def returnBuildTime(self):
+		return self.build_time
+
+	def returnLoadTime(self):
+		return self.load_time
+
+	def returnIOStats(self):
+		'''
+			output: buffer pool counters since the index was opened, in the style
+			of the output file keys
+		'''
+		pool = self.buffer_pool
+		data = {}
+		data['Page size             '] = str(self.page_size) + "bytes"
+		data['Buffer pool pages     '] = pool.capacity
+		data['Logical page reads    '] = pool.logical_reads
+		data['Physical page reads   '] = pool.physical_reads
+		data['Buffer hit ratio      '] = str(pool.returnHitRatio())
+		data['Buffer pool evictions '] = pool.evictions
+		return data
+
+	def close(self):
+		self.buffer_pool.close()
+
+
+def buildPagedRTree(filename, data_points_file, m_value=4, page_size=None):
+	'''
+		STR packs the points of data_points_file and writes them as a paged R-tree.
+	'''
+	rtree = RTreeInstance(points=loadPointsFromFile(data_points_file), max_entries=m_value)
+	rtree.bulkLoadDataIntoRTree()
+	writePagedRTree(filename, rtree.flattenToArrays(), m_value, rtree.returnNodesCount(), page_size, data_points_file)
+
+
+def openPagedRTree(filename, data_points_file, m_value=4, buffer_pages=1024, page_size=None):
+	'''
+		output: PagedRTreeIndex on filename, which is built from data_points_file
+		first when it is missing, stale or built with another M or page size
+	'''
+	if os.path.exists(filename):
+		try:
+			index = PagedRTreeIndex(filename, buffer_pages, source_file=data_points_file)
+		except ValueError as e:
+			print(e)
+		else:
+			if index.m_value == m_value and (not page_size or index.page_size == page_size):
+				return index
+			print("%s was built with M = %d and %d byte pages, rebuilding" % (filename, index.m_value, index.page_size))
+			index.close()
+	build_start_time = time.time()
+	buildPagedRTree(filename, data_points_file, m_value, page_size)
+	build_time = abs(time.time() - build_start_time)
+	index = PagedRTreeIndex(filename, buffer_pages)
+	index.build_time = build_time
+	return index
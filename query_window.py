@@ -0,0 +1,134 @@
+import numpy as np
+from rtreelib import Rect
+
+# (points or rects) x edges pairs a polygon test holds in memory at once
+WINDOW_BLOCK = 1 << 20
+
+class QueryWindow(object):
+	"""Rectangle or simple polygon a query is restricted to, data points outside it are ignored"""
+
+	def __init__(self, vertices):
+		'''
+			input: vertices - (min_x, min_y, max_x, max_y) of a rectangle, or the
+			(k, 2) vertices of a simple polygon in order, k >= 3
+			Points on the border of a rectangle are inside, points on the border
+			of a polygon may fall either way.
+		'''
+		super(QueryWindow, self).__init__()
+		vertices = np.asarray(vertices, dtype=np.float64)
+		self.is_rectangle = vertices.shape == (4,)
+		if self.is_rectangle:
+			min_x, min_y, max_x, max_y = vertices.tolist()
+			if min_x > max_x or min_y > max_y:
+				raise ValueError("window rectangle needs min_x <= max_x and min_y <= max_y")
+			vertices = np.array([[min_x, min_y], [max_x, min_y], [max_x, max_y], [min_x, max_y]])
+		elif vertices.ndim != 2 or vertices.shape[1] != 2 or len(vertices) < 3:
+			raise ValueError("window polygon needs at least 3 (x, y) vertices")
+		if not np.isfinite(vertices).all():
+			raise ValueError("window vertices must be finite")
+		self.vertices = vertices
+		self.edge_start = vertices
+		self.edge_end = np.roll(vertices, -1, axis=0)
+		self.min_x, self.min_y = vertices.min(axis=0).tolist()
+		self.max_x, self.max_y = vertices.max(axis=0).tolist()
+
+	def returnBoundingRect(self):
+		return Rect(self.min_x, self.min_y, self.max_x, self.max_y)
+
+	def returnArea(self):
+		'''
+			output: area of the window, shoelace formula
+		'''
+		x = self.edge_start[:, 0]
+		y = self.edge_start[:, 1]
+		return abs(float(np.sum(x * self.edge_end[:, 1] - self.edge_end[:, 0] * y))) / 2.0
+
+	def isPointInside(self, x, y):
+		return bool(self.arePointsInside(np.array([[x, y]]))[0])
+
+	def arePointsInside(self, points):
+		'''
+			input:-
+			points - (k, 2) array
+			output:-
+			boolean array of length k; polygons count the edges crossed by a ray
+			to +x, only for the points inside the bounding rect
+		'''
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		inside = (points[:, 0] >= self.min_x) & (points[:, 0] <= self.max_x) & \
+			(points[:, 1] >= self.min_y) & (points[:, 1] <= self.max_y)
+		if self.is_rectangle:
+			return inside
+		candidates = np.flatnonzero(inside)
+		a = self.edge_start
+		b = self.edge_end
+		step = max(1, WINDOW_BLOCK // len(a))
+		for start in range(0, len(candidates), step):
+			rows = candidates[start:start + step]
+			x = points[rows, 0][:, None]
+			y = points[rows, 1][:, None]
+			straddles = (a[:, 1] > y) != (b[:, 1] > y)
+			with np.errstate(divide='ignore', invalid='ignore'):
+				crossing_x = a[:, 0] + (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+			inside[rows] = (np.count_nonzero(straddles & (x < crossing_x), axis=1) % 2) == 1
+		return inside
+
+	def areRectanglesMeeting(self, bounds):
+		'''
+			input:-
+			bounds - (k, 4) array of min_x, min_y, max_x, max_y
+			output:-
+			boolean array of length k, True when the rect shares a point with the
+			window: an edge of the polygon meets it, or it lies inside the polygon,
+			or the polygon inside it
+		'''
+		bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+		meets = ~((self.min_x > bounds[:, 2]) | (bounds[:, 0] > self.max_x) |
+			(self.min_y > bounds[:, 3]) | (bounds[:, 1] > self.max_y))
+		if self.is_rectangle:
+			return meets
+		candidates = np.flatnonzero(meets)
+		bounds = bounds[candidates]
+		first = self.vertices[0]
+		meets[candidates] = self.areEdgesMeeting(bounds).any(axis=1) | self.arePointsInside(bounds[:, :2]) | \
+			((bounds[:, 0] <= first[0]) & (first[0] <= bounds[:, 2]) & (bounds[:, 1] <= first[1]) & (first[1] <= bounds[:, 3]))
+		return meets
+
+	def areRectanglesInside(self, bounds):
+		'''
+			input:-
+			bounds - (k, 4) array of min_x, min_y, max_x, max_y
+			output:-
+			boolean array of length k, True when all of the rect is inside the
+			window: its corners are inside and no edge of the polygon meets it
+		'''
+		bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+		inside = (bounds[:, 0] >= self.min_x) & (bounds[:, 2] <= self.max_x) & \
+			(bounds[:, 1] >= self.min_y) & (bounds[:, 3] <= self.max_y)
+		if self.is_rectangle:
+			return inside
+		candidates = np.flatnonzero(inside)
+		bounds = bounds[candidates]
+		corners = bounds[:, [0, 1, 0, 3, 2, 1, 2, 3]].reshape(-1, 2)
+		inside[candidates] = self.arePointsInside(corners).reshape(-1, 4).all(axis=1) & \
+			~self.areEdgesMeeting(bounds).any(axis=1)
+		return inside
+
+	def areEdgesMeeting(self, bounds):
+		'''
+			input: bounds - (k, 4) array of rects
+			output: (k, edges) bool array, an edge meets a rect when their MBRs
+			overlap and the corners of the rect are not all on one side of it
+		'''
+		a = self.edge_start
+		b = self.edge_end
+		result = np.zeros((len(bounds), len(a)), dtype=bool)
+		step = max(1, WINDOW_BLOCK // (4 * len(a)))
+		for start in range(0, len(bounds), step):
+			block = bounds[start:start + step]
+			overlap = (np.minimum(a[:, 0], b[:, 0]) <= block[:, 2:3]) & (np.maximum(a[:, 0], b[:, 0]) >= block[:, 0:1]) & \
+				(np.minimum(a[:, 1], b[:, 1]) <= block[:, 3:4]) & (np.maximum(a[:, 1], b[:, 1]) >= block[:, 1:2])
+			corners = block[:, [0, 1, 0, 3, 2, 1, 2, 3]].reshape(-1, 4, 1, 2)
+			sides = (b[:, 0] - a[:, 0]) * (corners[..., 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (corners[..., 0] - a[:, 0])
+			result[start:start + step] = overlap & (sides.min(axis=1) <= 0) & (sides.max(axis=1) >= 0)
+		return result
@@ -0,0 +1,109 @@
+import numpy as np
+import collections
+import itertools
+
+# every index gets a fresh version, a mutated index takes a new one
+dataset_versions = itertools.count(1)
+
+
+def newDatasetVersion():
+	return next(dataset_versions)
+
+
+class SkylineResultCache(object):
+	"""LRU cache of skylines keyed by the canonical convex hull of the query and the dataset version"""
+
+	# bytes charged per entry on top of its arrays, for the dict, key and tuple objects
+	ENTRY_OVERHEAD = 256
+
+	def __init__(self, max_entries=128, max_bytes=64 << 20, tolerance=1e-9):
+		'''
+			input:-
+			max_entries - number of skylines kept
+			max_bytes - memory kept for the skylines and their keys
+			tolerance - hull vertices are rounded to multiples of it, hulls equal
+			after rounding share their skyline
+		'''
+		super(SkylineResultCache, self).__init__()
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self.tolerance = tolerance
+		self.entries = collections.OrderedDict()
+		self.bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def makeKey(self, hull_points, dataset_version, window=None):
+		'''
+			input:-
+			hull_points - convex hull vertices of the query, in any order
+			dataset_version - version of the index the skyline is computed on
+			window - QueryWindow of the query or None, its vertices are kept in order
+			output:-
+			hashable key, the same for any query with that hull on that data
+		'''
+		hull = np.asarray(hull_points, dtype=np.float64).reshape(-1, 2)
+		rounded = np.round(hull / self.tolerance).astype(np.int64)
+		rounded = rounded[np.lexsort((rounded[:, 1], rounded[:, 0]))]
+		if window is None:
+			return (dataset_version, rounded.tobytes())
+		return (dataset_version, rounded.tobytes(), np.round(window.vertices / self.tolerance).astype(np.int64).tobytes())
+
+	def get(self, key):
+		'''
+			output: (k, 2) array of the skyline points or None, counts the hit/miss
+		'''
+		points = self.entries.get(key)
+		if points is None:
+			self.misses += 1
+			return None
+		self.entries.move_to_end(key)
+		self.hits += 1
+		return points
+
+	def put(self, key, points):
+		'''
+			input:-
+			key - from makeKey
+			points - (k, 2) skyline points, copied
+			process: least recently used skylines are evicted until both the
+			entry and the memory limits hold, a skyline larger than the whole
+			memory limit is not kept.
+		'''
+		points = np.array(points, dtype=np.float64).reshape(-1, 2)
+		size = self.entrySize(key, points)
+		if key in self.entries:
+			self.bytes -= self.entrySize(key, self.entries.pop(key))
+		if size > self.max_bytes or self.max_entries <= 0:
+			return
+		self.entries[key] = points
+		self.bytes += size
+		while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+			old_key, old_points = self.entries.popitem(last=False)
+			self.bytes -= self.entrySize(old_key, old_points)
+			self.evictions += 1
+
+	def entrySize(self, key, points):
+		return points.nbytes + len(key[1]) + self.ENTRY_OVERHEAD
+
+	def clear(self):
+		self.entries.clear()
+		self.bytes = 0
+
+	def returnStats(self):
+		'''
+			output: dict of the counters, in the style of the output file keys
+		'''
+		lookups = self.hits + self.misses
+		data = {}
+		data['Result cache hits     '] = self.hits
+		data['Result cache misses   '] = self.misses
+		data['Result cache evictions'] = self.evictions
+		data['Result cache hit ratio'] = str(self.hits / float(lookups) if lookups else 0.0)
+		data['Result cache entries  '] = len(self.entries)
+		data['Result cache size     '] = str(self.bytes) + "bytes"
+		return data
@@ -1,8 +1,60 @@
 from rtreelib import RTree, Rect
-from rtreelib.diagram import create_rtree_diagram
+from rtreelib.rtree import RTreeEntry
+import os
 import sys
+import struct
+import hashlib
 import numpy as np
 import rtreelib
+from data_io import loadPointsFromFile
+
+RTREE_FILE_MAGIC = b'B2S2RTR\0'
+RTREE_FILE_VERSION = 1
+# magic, version, max_entries, node count, child count, point count, nodes_count stat, source checksum
+RTREE_FILE_HEADER = struct.Struct('<8sIIqqqq32s')
+
+
+def fileChecksum(filename):
+	'''
+		input: filename - data file the R-tree was built from
+		output: sha256 digest of the file contents
+	'''
+	digest = hashlib.sha256()
+	with open(filename, 'rb') as file:
+		for block in iter(lambda: file.read(1 << 20), b''):
+			digest.update(block)
+	return digest.digest()
+
+
+class MappedRTreeNode(object):
+	"""R-tree node read lazily from the arrays of a loaded R-tree file"""
+	def __init__(self, tree, node_id):
+		super(MappedRTreeNode, self).__init__()
+		self.tree = tree
+		self.node_id = node_id
+		self.parent = None
+		self._entries = None
+
+	@property
+	def is_leaf(self):
+		return bool(self.tree.node_is_leaf[self.node_id])
+
+	@property
+	def entries(self):
+		if self._entries is None:
+			start = self.tree.node_child_start[self.node_id]
+			end = self.tree.node_child_start[self.node_id + 1]
+			children = self.tree.node_children[start:end].tolist()
+			if self.is_leaf:
+				coords = self.tree.points[children].tolist()
+				self._entries = [RTreeEntry(Rect(x, y, x, y), data=i) for i, (x, y) in zip(children, coords)]
+			else:
+				bounds = self.tree.node_bounds[children].tolist()
+				self._entries = [RTreeEntry(Rect(*b), child=MappedRTreeNode(self.tree, i)) for i, b in zip(children, bounds)]
+		return self._entries
+
+	def get_bounding_rect(self):
+		return Rect(*self.tree.node_bounds[self.node_id].tolist())
 
 class RTreeInstance(RTree):
 	"""docstring for RTreeInstance"""
@@ -20,24 +72,188 @@ class RTreeInstance(RTree):
 			y = point[1]
 			self.insert(i, Rect(x, y, x, y))
 
+	def strPackOrder(self, center_x, center_y):
+		'''
+			input:-
+			center_x, center_y - numpy arrays with the centers of the entries to pack
+			output:-
+			permutation of the entries in Sort-Tile-Recursive order, consecutive
+			runs of max_entries in it form one node.
+		'''
+		n = len(center_x)
+		leaf_count = int(np.ceil(n / float(self.max_entries)))
+		slice_count = int(np.ceil(np.sqrt(leaf_count)))
+		slice_size = slice_count * self.max_entries
+		x_order = np.argsort(center_x, kind='mergesort')
+		slice_ids = np.arange(n) // slice_size
+		return x_order[np.lexsort((center_y[x_order], slice_ids))]
+
+	def bulkLoadDataIntoRTree(self):
+		'''
+			process: builds the RTreeInstance bottom up with Sort-Tile-Recursive
+			packing, every node except the last one of a level is full.
+			Runs in O(n log n) and replaces insertDataIntoRTree. The packed tree is
+			kept only as the flat arrays of packToArrays, no node objects are built.
+		'''
+		arrays = self.packToArrays()
+		self.loadFromArrays(arrays, self.max_entries, len(arrays[1]) + len(arrays[0]))
+
+	def packToArrays(self):
+		'''
+			output:-
+			STR packed tree in the layout of flattenToArrays, root is node 0 and
+			the levels follow each other top down.
+		'''
+		points = np.asarray(self.points, dtype=np.float64).reshape(-1, 2)
+		if len(points) == 0:
+			return (points, np.array([[np.inf, np.inf, -np.inf, -np.inf]]), np.zeros(2, dtype=np.int64),
+				np.zeros(0, dtype=np.int64), np.ones(1, dtype=np.uint8))
+
+		M = self.max_entries
+		# levels bottom up, each one as (children in packed order, group starts, bounds)
+		levels = []
+		order = self.strPackOrder(points[:, 0], points[:, 1])
+		starts = np.arange(0, len(order), M)
+		min_xy = np.minimum.reduceat(points[order], starts, axis=0)
+		max_xy = np.maximum.reduceat(points[order], starts, axis=0)
+		levels.append((order, starts, np.hstack((min_xy, max_xy))))
+		while len(starts) > 1:
+			order = self.strPackOrder((min_xy[:, 0] + max_xy[:, 0]) / 2, (min_xy[:, 1] + max_xy[:, 1]) / 2)
+			starts = np.arange(0, len(order), M)
+			min_xy = np.minimum.reduceat(min_xy[order], starts, axis=0)
+			max_xy = np.maximum.reduceat(max_xy[order], starts, axis=0)
+			levels.append((order, starts, np.hstack((min_xy, max_xy))))
+
+		levels.reverse()
+		level_base = np.cumsum([0] + [len(starts) for _, starts, _ in levels])
+		node_bounds = np.concatenate([bounds for _, _, bounds in levels])
+		children = []
+		child_counts = []
+		for level, (order, starts, _) in enumerate(levels):
+			if level == len(levels) - 1:
+				children.append(order)
+			else:
+				children.append(order + level_base[level + 1])
+			child_counts.append(np.diff(np.append(starts, len(order))))
+		child_start = np.concatenate(([0], np.cumsum(np.concatenate(child_counts))))
+		node_is_leaf = np.zeros(len(node_bounds), dtype=np.uint8)
+		node_is_leaf[level_base[-2]:] = 1
+		return (points, node_bounds, child_start.astype(np.int64), np.concatenate(children).astype(np.int64), node_is_leaf)
+
+	def flattenToArrays(self):
+		'''
+			process: flattens the tree in level order.
+			output:-
+			(points, node_bounds, node_child_start, node_children, node_is_leaf)
+			node_bounds - (nodes, 4) min_x, min_y, max_x, max_y per node
+			node_child_start - offsets into node_children, node i owns
+			node_children[node_child_start[i]:node_child_start[i+1]], which are
+			node ids for inner nodes and point ids for leaves.
+		'''
+		if isinstance(self.root, MappedRTreeNode):
+			return (self.points, self.node_bounds, self.node_child_start, self.node_children, self.node_is_leaf)
+
+		points = np.asarray(self.points, dtype=np.float64).reshape(-1, 2)
+		nodes = [self.root]
+		node_bounds = []
+		node_is_leaf = []
+		child_start = [0]
+		children = []
+		i = 0
+		while i < len(nodes):
+			node = nodes[i]
+			i += 1
+			if node.entries:
+				rect = node.get_bounding_rect()
+				node_bounds.append((rect.min_x, rect.min_y, rect.max_x, rect.max_y))
+			else:
+				node_bounds.append((np.inf, np.inf, -np.inf, -np.inf))
+			node_is_leaf.append(node.is_leaf)
+			for entry in node.entries:
+				if node.is_leaf:
+					children.append(entry.data)
+				else:
+					children.append(len(nodes))
+					nodes.append(entry.child)
+			child_start.append(len(children))
+
+		return (points, np.array(node_bounds, dtype=np.float64).reshape(-1, 4), np.array(child_start, dtype=np.int64),
+			np.array(children, dtype=np.int64), np.array(node_is_leaf, dtype=np.uint8))
+
+	def loadFromArrays(self, arrays, max_entries, nodes_count):
+		'''
+			input:-
+			arrays - tuple returned by flattenToArrays, may be memory mapped or
+			backed by shared memory
+			process: the tree reads its nodes lazily from those arrays.
+		'''
+		self.points, self.node_bounds, self.node_child_start, self.node_children, self.node_is_leaf = arrays
+		self.max_entries = max_entries
+		self.nodes_count = nodes_count
+		self.root = MappedRTreeNode(self, 0)
+
+	def saveToFile(self, filename, source_file=None):
+		'''
+			input:-
+			filename - R-tree file to write
+			source_file - data file the points came from, its checksum is stored
+			process: writes the arrays of flattenToArrays behind a versioned header.
+		'''
+		arrays = self.flattenToArrays()
+		points, node_bounds, child_start, children, node_is_leaf = arrays
+		checksum = fileChecksum(source_file) if source_file else b'\0' * 32
+		header = RTREE_FILE_HEADER.pack(RTREE_FILE_MAGIC, RTREE_FILE_VERSION, self.max_entries, len(node_bounds),
+			len(children), len(points), self.nodes_count, checksum)
+		with open(filename, 'wb') as file:
+			file.write(header)
+			for array in arrays:
+				file.write(np.ascontiguousarray(array).tobytes())
+
+	def loadFromFile(self, filename, source_file=None):
+		'''
+			input:-
+			filename - R-tree file written by saveToFile
+			source_file - if given, its checksum must match the stored one
+			process: memory maps the arrays of the file, nodes are materialized
+			lazily while they are traversed. Raises ValueError on a file of
+			another format version, of the wrong size or built from different data.
+		'''
+		with open(filename, 'rb') as file:
+			header = file.read(RTREE_FILE_HEADER.size)
+		if len(header) != RTREE_FILE_HEADER.size:
+			raise ValueError("%s is not an R-tree file" % filename)
+		magic, version, max_entries, node_count, child_count, point_count, nodes_count, checksum = \
+			RTREE_FILE_HEADER.unpack(header)
+		if magic != RTREE_FILE_MAGIC:
+			raise ValueError("%s is not an R-tree file" % filename)
+		if version != RTREE_FILE_VERSION:
+			raise ValueError("%s has format version %d, expected %d" % (filename, version, RTREE_FILE_VERSION))
+		if source_file and fileChecksum(source_file) != checksum:
+			raise ValueError("%s is stale, it was not built from the current contents of %s" % (filename, source_file))
+
+		layout = ((np.float64, (point_count, 2)), (np.float64, (node_count, 4)),
+			(np.int64, (node_count + 1,)), (np.int64, (child_count,)), (np.uint8, (node_count,)))
+		size = RTREE_FILE_HEADER.size + sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for dtype, shape in layout)
+		if os.path.getsize(filename) != size:
+			raise ValueError("%s is truncated or corrupted, expected %d bytes" % (filename, size))
+
+		offset = RTREE_FILE_HEADER.size
+		arrays = []
+		for dtype, shape in layout:
+			if np.prod(shape) == 0:
+				arrays.append(np.zeros(shape, dtype=dtype))
+			else:
+				arrays.append(np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape))
+			offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+		self.loadFromArrays(tuple(arrays), max_entries, nodes_count)
+
 	def readDataFromFile(self, filename):
 		'''
 			param: filename - name of the file to take input from.
-			processs: constructs the RTreeInstance from given file.
+			processs: reads the points the RTreeInstance is built from.
 		'''
-		self.points = []
 		print("Opening file %s and reading data from: " % filename)
-		file =  open(filename, 'r')
-		for i, line in enumerate(file):
-			try:
-				tokens = line.strip().split()
-				x = float(tokens[0])
-				y = float(tokens[1])
-				self.points.append(np.array([x,y]))
-				# self.insert(i, Rect(x, y, x, y))
-			except:
-				print("Cannot Insert data at line Number %s Please verify" % i+1)
-
+		self.points = loadPointsFromFile(filename)
 		print("Task Completed")
 
 	def dfs(self, node):
@@ -63,6 +279,8 @@ class RTreeInstance(RTree):
 			self.nodes_count += 1
 
 	def createRTreeDiagram(self):
+		# rtreelib.diagram loads matplotlib, only the diagram needs it
+		from rtreelib.diagram import create_rtree_diagram
 		create_rtree_diagram(self)
 
 if __name__ == '__main__':
@@ -78,4 +296,4 @@ if __name__ == '__main__':
 	print(type(t.root) == rtreelib.rtree.RTreeNode)
 	print(t.root.get_bounding_rect())
 	# Create a diagram of the R-tree structure
-	create_rtree_diagram(t)
\ No newline at end of file
+	t.createRTreeDiagram()
\ No newline at end of file
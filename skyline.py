@@ -1,12 +1,19 @@
 import numpy as np
 from rtreelib import Rect
 
+# below this many rows sorted by x, dominance tests scan every row
+SORTED_ROWS_MIN = 256
+
 class SkylinePoint(object):
 	"""docstring for SkylinePoint"""
+	# skylines can hold millions of points, no per instance __dict__
+	__slots__ = ('point', 'circle', 'mbr')
 
 	def __init__(self, point):
 		super(SkylinePoint, self).__init__()
 		self.point = point
+		self.circle = None
+		self.mbr = None
 		
 	def findDistanceBetweenPoints(self, point1, point2):
 		if point1 is not None and point2 is not None:
@@ -179,6 +186,297 @@ class SkylinePoint(object):
 			return None
 
 
+class SkylinePointSet(object):
+	"""Skyline points kept as numpy arrays for vectorized dominance tests"""
+
+	def __init__(self, query_points, capacity=64, slack=1.0):
+		'''
+			input:-
+			query_points - convex hull vertices the distances are taken to
+			capacity - initial number of rows allocated, grows by doubling
+			slack - 1 + epsilon of the approximate mode: a rect counts as
+			dominated by a point when its MINDIST times slack is no less than
+			the distances of the point, and the MBRs of the circles are taken
+			with the radii divided by slack
+		'''
+		super(SkylinePointSet, self).__init__()
+		self.query_points = np.asarray(query_points, dtype=np.float64).reshape(-1, 2)
+		self.slack = slack
+		self.size = 0
+		self.coordinates = np.empty((capacity, 2))
+		self.distances = np.empty((capacity, len(self.query_points)))
+		# data point id of every row, -1 when the point came without one
+		self.ids = np.empty(capacity, dtype=np.int64)
+		# rows [0, sorted_count) are in increasing x, see returnCandidateRows
+		self.sorted_count = 0
+
+	def __len__(self):
+		return self.size
+
+	def returnPoints(self):
+		return self.coordinates[:self.size]
+
+	def returnDistances(self):
+		'''
+			output:-
+			skyline x hull-vertex distance matrix, row i holds the circle radii of point i
+		'''
+		return self.distances[:self.size]
+
+	def returnIds(self):
+		return self.ids[:self.size]
+
+	def addPoint(self, point, point_id=-1):
+		'''
+			output: (min_x, min_y, max_x, max_y) MBR of the circles of the point,
+			the same rect SkylinePoint.calculateMBR finds
+		'''
+		if self.size == len(self.coordinates):
+			self.coordinates = np.concatenate((self.coordinates, np.empty_like(self.coordinates)))
+			self.distances = np.concatenate((self.distances, np.empty_like(self.distances)))
+			self.ids = np.concatenate((self.ids, np.empty_like(self.ids)))
+		self.coordinates[self.size] = point
+		self.ids[self.size] = point_id
+		radii = np.sqrt(np.square(self.query_points - point).sum(axis=1))
+		self.distances[self.size] = radii
+		self.size += 1
+		radii = radii / self.slack
+		min_x, min_y = (self.query_points - radii[:, None]).min(axis=0).tolist()
+		max_x, max_y = (self.query_points + radii[:, None]).max(axis=0).tolist()
+		return (min_x, min_y, max_x, max_y)
+
+	def addPoints(self, points, point_ids):
+		'''
+			input:-
+			points - (k, 2) array
+			point_ids - (k,) data point ids
+			output: (min_x, min_y, max_x, max_y) intersection of the MBRs of the
+			circles of the points, the box B they leave
+		'''
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		point_ids = np.asarray(point_ids, dtype=np.int64)
+		if self.size == 0:
+			order = np.argsort(points[:, 0], kind='stable')
+			points = points[order]
+			point_ids = point_ids[order]
+			self.sorted_count = len(points)
+		end = self.size + len(points)
+		if end > len(self.coordinates):
+			capacity = max(end, 2 * len(self.coordinates))
+			self.coordinates = np.resize(self.coordinates, (capacity, 2))
+			self.distances = np.resize(self.distances, (capacity, len(self.query_points)))
+			self.ids = np.resize(self.ids, capacity)
+		radii = np.sqrt(np.square(points[:, None, :] - self.query_points[None, :, :]).sum(axis=2))
+		self.coordinates[self.size:end] = points
+		self.distances[self.size:end] = radii
+		self.ids[self.size:end] = point_ids
+		self.size = end
+		radii = radii / self.slack
+		min_x, min_y = (self.query_points[None, :, :] - radii[:, :, None]).min(axis=1).max(axis=0).tolist()
+		max_x, max_y = (self.query_points[None, :, :] + radii[:, :, None]).max(axis=1).min(axis=0).tolist()
+		return (min_x, min_y, max_x, max_y)
+
+	def removeRows(self, removed):
+		'''
+			input: removed - (size,) bool array, the rows to drop
+			process: the kept rows move up in their order
+		'''
+		kept = np.flatnonzero(~removed)
+		self.sorted_count -= int(removed[:self.sorted_count].sum())
+		self.coordinates[:len(kept)] = self.coordinates[kept]
+		self.distances[:len(kept)] = self.distances[kept]
+		self.ids[:len(kept)] = self.ids[kept]
+		self.size = len(kept)
+
+	def mindistToQueryPoints(self, rect):
+		'''
+			input:-
+			rect - Rect instance, a point is a degenerate rect
+			output:-
+			minimum distance between rect and every hull vertex
+		'''
+		return self.mindistBoundsToQueryPoints(rect.min_x, rect.min_y, rect.max_x, rect.max_y)
+
+	def mindistBoundsToQueryPoints(self, min_x, min_y, max_x, max_y):
+		qp = self.query_points
+		dx = np.maximum(np.maximum(min_x - qp[:, 0], qp[:, 0] - max_x), 0)
+		dy = np.maximum(np.maximum(min_y - qp[:, 1], qp[:, 1] - max_y), 0)
+		return np.sqrt(dx * dx + dy * dy)
+
+	def mindistRectanglesToQueryPoints(self, bounds):
+		'''
+			input: bounds - (k, 4) array of min_x, min_y, max_x, max_y rows
+			output: (k, hull vertices) minimum distances
+		'''
+		qp = self.query_points
+		dx = np.maximum(np.maximum(bounds[:, 0, None] - qp[:, 0], qp[:, 0] - bounds[:, 2, None]), 0)
+		dy = np.maximum(np.maximum(bounds[:, 1, None] - qp[:, 1], qp[:, 1] - bounds[:, 3, None]), 0)
+		return np.sqrt(dx * dx + dy * dy)
+
+	def maxdistBoundsToQueryPoints(self, min_x, min_y, max_x, max_y):
+		'''
+			output: distance from every hull vertex to the farthest corner of the rect
+		'''
+		qp = self.query_points
+		dx = np.maximum(np.abs(qp[:, 0] - min_x), np.abs(qp[:, 0] - max_x))
+		dy = np.maximum(np.abs(qp[:, 1] - min_y), np.abs(qp[:, 1] - max_y))
+		return np.sqrt(dx * dx + dy * dy)
+
+	def maxdistRectanglesToQueryPoints(self, bounds):
+		'''
+			input: bounds - (k, 4) array of min_x, min_y, max_x, max_y rows
+			output: (k, hull vertices) maximum distances
+		'''
+		qp = self.query_points
+		dx = np.maximum(np.abs(qp[:, 0] - bounds[:, 0, None]), np.abs(qp[:, 0] - bounds[:, 2, None]))
+		dy = np.maximum(np.abs(qp[:, 1] - bounds[:, 1, None]), np.abs(qp[:, 1] - bounds[:, 3, None]))
+		return np.sqrt(dx * dx + dy * dy)
+
+	def areRectanglesDominated(self, bounds, block_size=1 << 22):
+		'''
+			input:-
+			bounds - (k, 4) array of min_x, min_y, max_x, max_y rows
+			block_size - bound on the elements compared at once
+			output: (k,) bool array, isRectangleDominated of every row
+		'''
+		dominated = np.zeros(len(bounds), dtype=bool)
+		if self.size == 0 or len(bounds) == 0:
+			return dominated
+		mindist = self.mindistRectanglesToQueryPoints(bounds) * self.slack
+		rows = self.returnCandidateRows(mindist)
+		# the points nearest to the rects are the likely dominators, they go first
+		center = (bounds[:, :2] + bounds[:, 2:]).mean(axis=0) / 2
+		rows = rows[np.argsort(np.square(self.coordinates[rows] - center).sum(axis=1))]
+		# rows dominated by one block are not compared with the next ones; the
+		# blocks start small and double, bounded by block_size
+		undecided = np.arange(len(bounds))
+		start = 0
+		step = 16
+		while start < len(rows) and len(undecided):
+			step = max(1, min(2 * step, block_size // (len(undecided) * len(self.query_points))))
+			distances = self.distances[rows[start:start + step]]
+			hit = (distances[:, None, :] <= mindist[undecided][None, :, :]).all(axis=2).any(axis=0)
+			dominated[undecided[hit]] = True
+			undecided = undecided[~hit]
+			start += step
+		return dominated
+
+	def isRectangleDominated(self, rect):
+		'''
+			A rect is dominated by a skyline point when it does not intersect any of
+			the circles around the hull vertices through that point, i.e. its MINDIST
+			to every hull vertex is at least the point's own distance.
+		'''
+		return self.isBoundsDominated(rect.min_x, rect.min_y, rect.max_x, rect.max_y)
+
+	def isBoundsDominated(self, min_x, min_y, max_x, max_y):
+		if self.size == 0:
+			return False
+		mindist = self.mindistBoundsToQueryPoints(min_x, min_y, max_x, max_y) * self.slack
+		return bool((self.distances[self.returnCandidateRows(mindist[None, :])] <= mindist).all(axis=1).any())
+
+	def returnCandidateRows(self, mindist):
+		'''
+			input: mindist - (k, h) MINDIST of k rects to the h hull vertices
+			output: rows of the skyline points that may dominate one of the rects.
+			A dominator is within mindist of every hull vertex, so in the
+			intersection of the squares around them: the sorted rows are cut to
+			its x range by binary search and to its y range by a mask, the rows
+			after them are all kept.
+		'''
+		if self.sorted_count < SORTED_ROWS_MIN:
+			return np.arange(self.size)
+		qp = self.query_points[None, :, :]
+		low = (qp - mindist[:, :, None]).max(axis=1).min(axis=0)
+		high = (qp + mindist[:, :, None]).min(axis=1).max(axis=0)
+		# a rounding margin, the distances are compared after a square root
+		margin = 1e-9 * (1.0 + np.maximum(np.abs(low), np.abs(high)))
+		low -= margin
+		high += margin
+		x = self.coordinates[:self.sorted_count, 0]
+		start = np.searchsorted(x, low[0], 'left')
+		end = np.searchsorted(x, high[0], 'right')
+		y = self.coordinates[start:end, 1]
+		rows = np.flatnonzero((y >= low[1]) & (y <= high[1])) + start
+		return np.concatenate((rows, np.arange(self.sorted_count, self.size)))
+
+	def isPointDominated(self, point):
+		if self.size == 0:
+			return False
+		dist = np.sqrt(np.square(self.query_points - np.asarray(point, dtype=np.float64)).sum(axis=1))
+		return bool((self.distances[:self.size] <= dist).all(axis=1).any())
+
+
+def dominatedByAny(dominators, distances, block_size=1 << 22, ties=False):
+	'''
+		input:-
+		dominators, distances - (m, h) and (k, h) distances to the h hull vertices
+		block_size - bound on the elements compared at once
+		ties - an equal dominator row dominates too, the rule of B2S2
+		output: (k,) bool, True for the rows some dominator row is <= on every
+		vertex and < on at least one
+	'''
+	dominated = np.zeros(len(distances), dtype=bool)
+	if len(dominators) == 0 or len(distances) == 0:
+		return dominated
+	step = max(1, block_size // (len(distances) * distances.shape[1]))
+	for start in range(0, len(dominators), step):
+		block = dominators[start:start + step]
+		# <= everywhere is rarely an exact tie, the strict part is checked on those pairs only
+		i, j = np.nonzero((block[:, None, :] <= distances[None, :, :]).all(axis=2))
+		dominated[j if ties else j[(block[i] < distances[j]).any(axis=1)]] = True
+	return dominated
+
+
+def nonDominatedRows(sums, rowDistances, hull_size, block_size=1 << 22, exempt=None):
+	'''
+		input:-
+		sums - (n,) distance sum of every row
+		rowDistances - function from an array of row ids to their (k, hull_size) distances
+		block_size - bound on the elements compared at once
+		exempt - (n,) bool or None; given, the rule of B2S2 applies: of rows
+				 equal on every vertex only the first in increasing sum is kept,
+				 and the exempt rows, the points inside the hull, are always kept
+		output: ids of the rows no other row dominates, in increasing sum
+		Rows are visited in increasing distance sum, a row can only be dominated
+		by rows with a smaller sum, so every chunk is checked against the
+		skyline of the chunks before it and against itself. Only one chunk of
+		distances exists at a time.
+	'''
+	order = np.argsort(sums, kind='stable')
+	chunk = max(1, int(np.sqrt(block_size // max(hull_size, 1))))
+	skyline_ids = [np.zeros(0, dtype=np.int64)]
+	skyline = np.empty((0, hull_size))
+	for start in range(0, len(order), chunk):
+		ids = order[start:start + chunk]
+		block = rowDistances(ids)
+		alive = ~dominatedByAny(skyline, block, block_size, ties=exempt is not None)
+		if exempt is not None:
+			alive |= exempt[ids]
+		ids = ids[alive]
+		block = block[alive]
+		alive = ~dominatedByAny(block, block, block_size)
+		if exempt is not None:
+			first = np.zeros(len(block), dtype=bool)
+			first[np.unique(block, axis=0, return_index=True)[1]] = True
+			alive = (alive & first) | exempt[ids]
+		skyline_ids.append(ids[alive])
+		skyline = np.concatenate((skyline, block[alive]))
+	return np.concatenate(skyline_ids)
+
+
+def nonDominatedMask(distances, block_size=1 << 22, exempt=None):
+	'''
+		input:-
+		distances - (n, h) distances of n points to the h hull vertices
+		block_size - bound on the elements compared at once
+		exempt - (n,) bool or None, see nonDominatedRows
+		output: (n,) bool, True for the rows no other row dominates
+	'''
+	keep = np.zeros(len(distances), dtype=bool)
+	keep[nonDominatedRows(distances.sum(axis=1), lambda ids: distances[ids], distances.shape[1], block_size, exempt)] = True
+	return keep
+
 if __name__ == '__main__':
 	points = np.array([[1,1], [2,0], [1,5], [2.5,4], [3,1]])
 	sp = SkylinePoint((2,3))
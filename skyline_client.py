@@ -0,0 +1,83 @@
+import argparse
+import itertools
+import json
+import socket
+import sys
+from data_io import loadPointsFromFile
+
+
+class SkylineClient(object):
+	"""Blocking client of skyline_server.py, one request at a time"""
+
+	def __init__(self, host="127.0.0.1", port=8765, unix_path=None, timeout=None):
+		'''
+			input: unix_path - Unix socket of the server, else host and port
+		'''
+		super(SkylineClient, self).__init__()
+		if unix_path:
+			self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			self.sock.settimeout(timeout)
+			self.sock.connect(unix_path)
+		else:
+			self.sock = socket.create_connection((host, port), timeout)
+		self.file = self.sock.makefile('rwb')
+		self.ids = itertools.count()
+
+	def close(self):
+		self.file.close()
+		self.sock.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def request(self, request):
+		'''
+			input: request - dict, an id is added
+			output: response dict, raises RuntimeError on an error response
+		'''
+		request = dict(request, id=next(self.ids))
+		self.file.write((json.dumps(request) + "\n").encode())
+		self.file.flush()
+		line = self.file.readline()
+		if not line:
+			raise ConnectionError("server closed the connection")
+		response = json.loads(line)
+		if 'error' in response:
+			raise RuntimeError(response['error'])
+		return response
+
+	def query(self, query_points):
+		'''
+			input: query_points - (k, 2) array or list of (x, y)
+			output: response with the skyline as a list of [x, y], the stats of
+			the query and its latency on the server
+		'''
+		return self.request({'query': [[float(x), float(y)] for x, y in query_points]})
+
+	def stats(self):
+		return self.request({'op': 'stats'})['stats']
+
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = "send one query to skyline_server.py, or ask it for its stats")
+	parser.add_argument("-q", "--query", help = "query points file, the skyline is written as x y lines")
+	parser.add_argument("--stats", action = "store_true", help = "print the server stats")
+	parser.add_argument("--unix", help = "Unix socket of the server")
+	parser.add_argument("--host", default = "127.0.0.1")
+	parser.add_argument("--port", type = int, default = 8765)
+	args = parser.parse_args()
+	if not (args.query or args.stats):
+		raise Exception("Please Supply Proper arguments\nuse --help/-h to see options")
+
+	with SkylineClient(args.host, args.port, args.unix) as client:
+		if args.query:
+			response = client.query(loadPointsFromFile(args.query))
+			for x, y in response['skyline']:
+				sys.stdout.write("%.17g %.17g\n" % (x, y))
+			print("latency %.3fms queue %.3fms" % (response['latency_ms'], response['queue_ms']), file=sys.stderr)
+		if args.stats:
+			print(json.dumps(client.stats(), indent=1))
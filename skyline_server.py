@@ -0,0 +1,266 @@
+import numpy as np
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from b2s2_algo import B2S2Index, createSharedArrays, batchWorkerInit, batchWorkerRunMany
+from result_cache import SkylineResultCache
+
+# longest request or response line, a skyline can hold millions of points
+LINE_LIMIT = 1 << 26
+# latencies kept for the percentiles of the stats request
+LATENCY_WINDOW = 100000
+
+
+class SkylineServer(object):
+	"""Long running skyline query service over one loaded B2S2Index"""
+
+	def __init__(self, index, workers=None, max_batch=32, max_wait=0.002, cache=None):
+		'''
+			input:-
+			index - B2S2Index answering every request
+			workers - number of worker processes, defaults to the cpu count
+			max_batch - most requests sent to a worker at once
+			max_wait - seconds a batch waits for more requests after its first one
+			cache - SkylineResultCache, every worker starts from a copy of it
+		'''
+		super(SkylineServer, self).__init__()
+		self.index = index
+		self.workers = workers or os.cpu_count() or 1
+		self.max_batch = max_batch
+		self.max_wait = max_wait
+		self.cache = cache
+		self.executor = None
+		self.shared_blocks = []
+		self.queue = None
+		self.started = time.time()
+		self.request_count = 0
+		self.error_count = 0
+		self.batch_count = 0
+		self.batched_requests = 0
+		self.max_queue_depth = 0
+		self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+		self.queue_waits = collections.deque(maxlen=LATENCY_WINDOW)
+
+	def startWorkers(self):
+		'''
+			The R-tree goes to shared memory once and every worker maps it, as
+			runBatchQueries does for --batch.
+		'''
+		rtree = self.index.returnPackedRTree()
+		self.shared_blocks, specs = createSharedArrays(rtree.flattenToArrays())
+		self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=batchWorkerInit,
+			initargs=(specs, rtree.max_entries, rtree.returnNodesCount(), self.index.m_value, self.index.dataset_version, self.cache))
+
+	def stopWorkers(self):
+		if self.executor is not None:
+			self.executor.shutdown(wait=True)
+			self.executor = None
+		for block in self.shared_blocks:
+			block.close()
+			block.unlink()
+		self.shared_blocks = []
+
+	async def serve(self, host=None, port=None, unix_path=None):
+		'''
+			Serves until the task is cancelled or SIGINT/SIGTERM arrives.
+			input: unix_path - Unix socket to listen on, else host and port
+		'''
+		self.queue = asyncio.Queue()
+		self.startWorkers()
+		loop = asyncio.get_running_loop()
+		stop = loop.create_future()
+		for signal_number in (signal.SIGINT, signal.SIGTERM):
+			loop.add_signal_handler(signal_number, lambda: stop.done() or stop.set_result(None))
+		try:
+			if unix_path:
+				server = await asyncio.start_unix_server(self.handleClient, path=unix_path, limit=LINE_LIMIT)
+			else:
+				server = await asyncio.start_server(self.handleClient, host=host, port=port, limit=LINE_LIMIT)
+			batcher = asyncio.ensure_future(self.runBatcher())
+			print("serving on %s" % (unix_path or ", ".join(str(sock.getsockname()) for sock in server.sockets)), flush=True)
+			async with server:
+				await stop
+			batcher.cancel()
+		finally:
+			for signal_number in (signal.SIGINT, signal.SIGTERM):
+				loop.remove_signal_handler(signal_number)
+			self.stopWorkers()
+			if unix_path and os.path.exists(unix_path):
+				os.unlink(unix_path)
+
+	async def handleClient(self, reader, writer):
+		'''
+			One JSON object per line in both directions:
+				{"id": 1, "query": [[x, y], ...]}	->	{"id": 1, "skyline": [[x, y], ...], "stats": {...},
+														 "latency_ms": ..., "queue_ms": ...}
+				{"id": 2, "op": "stats"}			->	{"id": 2, "stats": {...}}
+			A bad request gets {"id": ..., "error": "..."}, the connection stays open.
+			Requests of one connection are answered in any order, match them by id.
+		'''
+		lock = asyncio.Lock()
+		pending = set()
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				if not line.strip():
+					continue
+				task = asyncio.ensure_future(self.answerRequest(line, writer, lock))
+				pending.add(task)
+				task.add_done_callback(pending.discard)
+		except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+			pass
+		finally:
+			if pending:
+				await asyncio.gather(*pending, return_exceptions=True)
+			writer.close()
+
+	async def answerRequest(self, line, writer, lock):
+		received = time.time()
+		request_id = None
+		try:
+			request = json.loads(line)
+			if not isinstance(request, dict):
+				raise ValueError("a request is a JSON object")
+			request_id = request.get('id')
+			if request.get('op', 'query') == 'stats':
+				response = {'stats': self.returnStats()}
+			elif request.get('op', 'query') == 'query':
+				response = await self.submitQuery(parseQueryPoints(request.get('query')), received)
+			else:
+				raise ValueError("unknown op %r" % (request.get('op'),))
+		except (ValueError, TypeError) as error:
+			self.error_count += 1
+			response = {'error': "%s: %s" % (type(error).__name__, error)}
+		response['id'] = request_id
+		data = (json.dumps(response) + "\n").encode()
+		async with lock:
+			writer.write(data)
+			try:
+				await writer.drain()
+			except ConnectionError:
+				pass
+
+	async def submitQuery(self, query_points, received):
+		'''
+			output: response dict of the query, queued for the batcher
+		'''
+		future = asyncio.get_running_loop().create_future()
+		await self.queue.put((query_points, received, future))
+		self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+		skyline, stats, dispatched = await future
+		if skyline is None:
+			raise ValueError(stats)
+		done = time.time()
+		self.request_count += 1
+		self.latencies.append(done - received)
+		self.queue_waits.append(dispatched - received)
+		return {'skyline': skyline, 'stats': stats, 'latency_ms': 1000 * (done - received),
+			'queue_ms': 1000 * (dispatched - received)}
+
+	async def runBatcher(self):
+		'''
+			Micro-batching: at most one batch per worker is in flight. A batch
+			starts with the oldest queued request, takes whatever else is queued
+			up to max_batch and waits at most max_wait for more, so under load
+			the batches grow while the workers are busy and an idle server
+			answers a lone request after max_wait.
+		'''
+		loop = asyncio.get_running_loop()
+		slots = asyncio.Semaphore(self.workers)
+		while True:
+			await slots.acquire()
+			batch = [await self.queue.get()]
+			deadline = loop.time() + self.max_wait
+			while len(batch) < self.max_batch:
+				if self.queue.empty():
+					timeout = deadline - loop.time()
+					if timeout <= 0:
+						break
+					try:
+						batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+					except asyncio.TimeoutError:
+						break
+				else:
+					batch.append(self.queue.get_nowait())
+			self.batch_count += 1
+			self.batched_requests += len(batch)
+			task = asyncio.ensure_future(self.runBatch(batch))
+			task.add_done_callback(lambda _: slots.release())
+
+	async def runBatch(self, batch):
+		dispatched = time.time()
+		try:
+			results = await asyncio.get_running_loop().run_in_executor(self.executor, batchWorkerRunMany,
+				[query_points for query_points, _, _ in batch])
+		except Exception as error:
+			results = [(None, "%s: %s" % (type(error).__name__, error))] * len(batch)
+		for (_, _, future), (skyline, stats) in zip(batch, results):
+			if not future.done():
+				future.set_result((skyline, stats, dispatched))
+
+	def returnStats(self):
+		'''
+			output: request, batch and latency counters of the server, the
+			percentiles are over the last LATENCY_WINDOW answered requests
+		'''
+		stats = {
+			'uptime_s': time.time() - self.started,
+			'requests': self.request_count,
+			'errors': self.error_count,
+			'batches': self.batch_count,
+			'mean_batch_size': self.batched_requests / float(self.batch_count) if self.batch_count else 0.0,
+			'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+			'max_queue_depth': self.max_queue_depth,
+			'workers': self.workers,
+		}
+		for name, values in (('latency', self.latencies), ('queue', self.queue_waits)):
+			if values:
+				p50, p99 = np.percentile(np.array(values), [50, 99]).tolist()
+				stats[name + '_p50_ms'] = 1000 * p50
+				stats[name + '_p99_ms'] = 1000 * p99
+		return stats
+
+
+def parseQueryPoints(query):
+	'''
+		input: query - list of [x, y] pairs from a request
+		output: (k, 2) float64 array
+	'''
+	if not query:
+		raise ValueError("query needs at least one [x, y] point")
+	points = np.asarray(query, dtype=np.float64)
+	if points.ndim != 2 or points.shape[1] != 2:
+		raise ValueError("query must be a list of [x, y] points")
+	if not np.isfinite(points).all():
+		raise ValueError("query points must be finite")
+	return points
+
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = "keep a data set and its R-tree loaded and answer JSON lines skyline requests")
+	parser.add_argument("-d", "--data", required = True, help = "file containing data points, any format b2s2_algo.py reads")
+	parser.add_argument("-M", "--m-value", type = int, default = 4, help = "M value of the R-tree")
+	parser.add_argument("--rtree-file", help = "saved R-tree to load, rebuilt and saved there when missing or stale")
+	parser.add_argument("--unix", help = "Unix socket path to listen on")
+	parser.add_argument("--host", default = "127.0.0.1", help = "TCP host when --unix is not given")
+	parser.add_argument("--port", type = int, default = 8765, help = "TCP port when --unix is not given")
+	parser.add_argument("--workers", type = int, help = "number of worker processes, defaults to the cpu count")
+	parser.add_argument("--max-batch", type = int, default = 32, help = "most requests sent to a worker at once")
+	parser.add_argument("--max-wait-ms", type = float, default = 2.0, help = "time a batch waits for more requests after its first one")
+	parser.add_argument("--cache-entries", type = int, help = "keep the skylines of up to this many distinct hulls per worker")
+	parser.add_argument("--cache-mb", type = float, default = 64, help = "memory limit of the --cache-entries result cache")
+	args = parser.parse_args()
+
+	index = B2S2Index(data_points_file=args.data, m_value=args.m_value, rtree_file=args.rtree_file)
+	print("index of %d points built in %.3fs" % (len(index.returnDataPoints()), index.returnBuildTime() + index.returnLoadTime()), flush=True)
+	cache = SkylineResultCache(args.cache_entries, int(args.cache_mb * 1048576)) if args.cache_entries else None
+	server = SkylineServer(index, workers=args.workers, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0, cache=cache)
+	asyncio.run(server.serve(host=args.host, port=args.port, unix_path=args.unix))
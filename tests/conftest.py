@@ -0,0 +1,34 @@
+import os
+import sys
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from b2s2_algo import B2S2Index, B2S2Algo
+from brute_force_algo import BruteForceIndex, BruteForceAlgo
+
+
+def sortedSkyline(algo):
+	return sorted(tuple(sp.point) for sp in algo.skyline_points)
+
+
+def runB2S2(data, query, index=None, **kwargs):
+	'''
+		output: sorted skyline points of B2S2, a new index over data unless
+		index is given; kwargs go to B2S2Algo
+	'''
+	if index is None:
+		index = B2S2Index(data_points=np.asarray(data, dtype=np.float64))
+	algo = B2S2Algo(index=index, query_points=query, output_file=os.devnull, **kwargs)
+	algo.initializeB2S2Algo()
+	algo.runB2S2Algo()
+	return sortedSkyline(algo)
+
+
+def runBruteForce(data, query, block_size=1 << 22):
+	algo = BruteForceAlgo(index=BruteForceIndex(data_points=np.asarray(data, dtype=np.float64)), query_points=query,
+		output_file=os.devnull)
+	algo.initializeBruteForceAlgo()
+	algo.runBruteForceAlgo(block_size=block_size)
+	return sortedSkyline(algo)
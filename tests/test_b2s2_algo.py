@@ -0,0 +1,160 @@
+import os
+import time
+import numpy as np
+from b2s2_algo import B2S2Index, B2S2Algo, runBatchQueries
+from conftest import runB2S2, sortedSkyline
+
+
+def test_stream_yields_before_the_prepass_ends():
+	rng = np.random.default_rng(0)
+	index = B2S2Index(data_points=rng.random((50000, 2)), m_value=4)
+	angles = np.linspace(0, 2 * np.pi, 40, endpoint=False)
+	query = 0.5 + 0.3 * np.column_stack((np.cos(angles), np.sin(angles)))
+	algo = B2S2Algo(index=index, query_points=query, output_file=os.devnull)
+	algo.initializeB2S2Algo()
+	stream = algo.streamB2S2Algo()
+	first = next(stream)
+	assert not algo.inside_hull_emitted
+	assert algo.count_rtree_nodes_accessed < index.returnNodeCount() // 4
+	streamed = [first] + list(stream)
+
+	assert sorted(map(tuple, streamed)) == runB2S2(None, query, index=index)
+	assert len(streamed) > 10000
+
+
+def test_batch_workers_see_inserted_and_deleted_points():
+	rng = np.random.default_rng(1)
+	data = rng.random((2000, 2))
+	index = B2S2Index(data_points=data, m_value=4)
+	query = np.array([[0.2, 0.2], [0.4, 0.25], [0.3, 0.4]])
+	before = B2S2Algo(index=index, query_points=query, output_file=os.devnull)
+	before.initializeB2S2Algo()
+	before.runB2S2Algo()
+	point_ids = {tuple(point): point_id for point_id, point in enumerate(data.tolist())}
+	for sp in list(before.skyline_points)[:5]:
+		index.deletePoint(point_ids[tuple(sp.point)])
+	index.insertPoint((0.3, 0.28))
+	index.insertPoint((0.9, 0.9))
+
+	batch_skyline, _ = runBatchQueries(index, [query], workers=1)[0]
+	assert sorted(map(tuple, batch_skyline)) == runB2S2(index.returnDataPoints(), query)
+
+
+def runPartitioned(data, query, grid_size):
+	algo = B2S2Algo(data_points=data, query_points=query, output_file=os.devnull)
+	algo.initializePartitionedB2S2Algo(grid_size)
+	algo.runPartitionedB2S2Algo(workers=1)
+	return sortedSkyline(algo)
+
+
+def distanceRows(points, query):
+	# mirrored points tie on every distance, either one of them is a valid answer
+	points = np.array(points)
+	return sorted(map(tuple, np.linalg.norm(points[:, None, :] - query[None, :, :], axis=2).round(9).tolist()))
+
+
+def test_partitioned_merge_breaks_ties_like_b2s2():
+	rng = np.random.default_rng(2)
+	queries = [np.array([[10.0, 10.0]]), np.array([[6.0, 10.0], [14.0, 10.0]]),
+		np.array([[4.0, 4.0], [10.0, 10.0], [16.0, 16.0]]), np.array([[10.0, 3.0], [10.0, 9.0], [10.0, 17.0]])]
+	for trial in range(12):
+		data = rng.integers(0, 21, (int(rng.integers(50, 600)), 2)).astype(np.float64)
+		query = queries[trial % len(queries)]
+		b2s2 = runB2S2(data, query)
+		partitioned = runPartitioned(data, query, grid_size=int(rng.integers(2, 6)))
+		assert len(partitioned) == len(b2s2)
+		assert distanceRows(partitioned, query) == distanceRows(b2s2, query)
+
+
+def test_partitioned_matches_b2s2():
+	rng = np.random.default_rng(3)
+	for grid_size in (1, 3, 8):
+		data = rng.random((3000, 2))
+		query = rng.random((5, 2)) * 0.4 + 0.3
+		assert runPartitioned(data, query, grid_size) == runB2S2(data, query)
+
+
+def test_approximate_skyline_stays_within_the_error_bound():
+	rng = np.random.default_rng(4)
+	data = rng.random((4000, 2))
+	index = B2S2Index(data_points=data, m_value=8)
+	query = rng.random((6, 2)) * 0.3 + 0.35
+	exact = runB2S2(None, query, index=index)
+	for epsilon, quantum in ((0.0, 0.0), (0.01, 0.0), (0.2, 0.0), (0.0, 0.02), (0.05, 0.05)):
+		algo = B2S2Algo(index=index, query_points=query, output_file=os.devnull, epsilon=epsilon, quantum=quantum)
+		algo.initializeB2S2Algo()
+		algo.runB2S2Algo()
+		result = algo.returnSkylineArray()
+		factor, additive = algo.returnErrorBound()
+		assert (factor, additive) == (1 + epsilon, quantum * np.sqrt(2))
+		hull = algo.skyline_set.query_points
+		result_distances = np.linalg.norm(result[:, None, :] - hull[None, :, :], axis=2)
+		data_distances = np.linalg.norm(data[:, None, :] - hull[None, :, :], axis=2)
+		# every data point has a result point within the bound on every hull vertex
+		covered = (result_distances[:, None, :] <= factor * data_distances[None, :, :] + additive + 1e-12).all(axis=2)
+		assert covered.any(axis=0).all()
+		assert set(map(tuple, result.tolist())) <= set(map(tuple, data.tolist()))
+		if epsilon == quantum == 0:
+			assert sorted(map(tuple, result.tolist())) == exact
+		else:
+			assert len(result) < len(exact)
+
+
+def test_registered_skyline_follows_deletes():
+	rng = np.random.default_rng(5)
+	data = rng.random((3000, 2))
+	index = B2S2Index(data_points=data)
+	query = np.array([[0.4, 0.4], [0.6, 0.45], [0.5, 0.6]])
+	algo = B2S2Algo(index=index, query_points=query, output_file=os.devnull)
+	algo.initializeB2S2Algo()
+	algo.runB2S2Algo()
+	algo.registerForUpdates()
+	live = np.ones(len(data), dtype=bool)
+	for _ in range(10):
+		point_id = int(rng.choice(algo.skyline_set.returnIds()))
+		result = list(algo.skyline_points)
+		index.deletePoint(point_id)
+		live[point_id] = False
+		assert sortedSkyline(algo) == runB2S2(data[live], query)
+		# the points of an earlier result, the deleted one too, are not written to
+		assert all(sp.circle is None for sp in result)
+
+
+def test_wrapped_and_mapped_trees_report_no_build_time(tmp_path):
+	rng = np.random.default_rng(3)
+	data_file = str(tmp_path / "points.txt")
+	np.savetxt(data_file, rng.random((20000, 2)))
+	rtree_file = str(tmp_path / "points.rtree")
+	built = B2S2Index(data_points_file=data_file, rtree_file=rtree_file)
+	assert built.returnBuildTime() > 0
+	mapped = B2S2Index(data_points_file=data_file, rtree_file=rtree_file)
+	assert mapped.returnBuildTime() == 0.0
+	wrapped = B2S2Index(rtree=built.returnRTree())
+	assert wrapped.returnBuildTime() == 0.0
+
+	query = np.array([[0.2, 0.2], [0.4, 0.25], [0.3, 0.4]])
+	_, stats = runBatchQueries(built, [query], workers=1)[0]
+	assert stats['RTree build time     '] == '0.0s'
+
+
+def test_stream_traversal_time_excludes_the_consumer():
+	rng = np.random.default_rng(4)
+	index = B2S2Index(data_points=rng.random((2000, 2)), m_value=4)
+	query = np.array([[0.2, 0.2], [0.6, 0.25], [0.4, 0.6]])
+	algo = B2S2Algo(index=index, query_points=query, output_file=os.devnull)
+	algo.initializeB2S2Algo()
+	streamed = []
+	for point in algo.streamB2S2Algo():
+		streamed.append(point)
+		if len(streamed) <= 5:
+			time.sleep(0.1)
+	assert sorted(streamed) == runB2S2(None, query, index=index)
+	assert algo.metrics.returnTime('traversal') < 0.25
+
+	# a stream closed while the consumer holds a point stops the timer at the yield
+	algo.initializeB2S2Algo()
+	stream = algo.streamB2S2Algo()
+	next(stream)
+	time.sleep(0.3)
+	stream.close()
+	assert algo.metrics.returnTime('traversal') < 0.25
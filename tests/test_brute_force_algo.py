@@ -0,0 +1,22 @@
+import numpy as np
+from conftest import runB2S2, runBruteForce
+
+
+def test_duplicates_follow_b2s2():
+	# (3, 0) twice outside the hull is one skyline point, (1, 1) twice inside it two
+	data = np.array([[3, 0], [3, 0], [1, 1], [1, 1], [5, 5], [0, 3]], dtype=np.float64)
+	query = np.array([[0, 0], [2, 0], [0, 2]], dtype=np.float64)
+	brute = runBruteForce(data, query)
+	assert brute == runB2S2(data, query)
+	assert brute.count((3.0, 0.0)) == 1
+	assert brute.count((1.0, 1.0)) == 2
+
+
+def test_integer_grid_parity():
+	rng = np.random.default_rng(1)
+	for trial in range(30):
+		data = rng.integers(0, 30, (int(rng.integers(20, 2000)), 2)).astype(np.float64)
+		query = rng.integers(0, 30, (int(rng.integers(3, 7)), 2)).astype(np.float64)
+		if np.linalg.matrix_rank(query - query[0]) < 2:
+			continue
+		assert runBruteForce(data, query, block_size=[64, 4096, 1 << 22][trial % 3]) == runB2S2(data, query)
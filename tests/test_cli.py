@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from conftest import runB2S2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def runScript(script, *args, cwd):
+	return subprocess.run([sys.executable, os.path.join(ROOT, script)] + list(args), cwd=cwd,
+		capture_output=True, text=True, check=True)
+
+
+def test_stream_stdout_holds_only_points(tmp_path):
+	rng = np.random.default_rng(0)
+	np.savetxt(tmp_path / "data.txt", rng.random((500, 2)))
+	np.savetxt(tmp_path / "query.txt", rng.random((4, 2)) * 0.2 + 0.4)
+	result = runScript("b2s2_algo.py", "-d", "data.txt", "-q", "query.txt", "--stream", "-O", "out.log", cwd=tmp_path)
+	lines = result.stdout.splitlines()
+	assert lines
+	points = np.array([[float(value) for value in line.split()] for line in lines])
+	assert points.shape[1] == 2
+	assert "--algo auto picked" in result.stderr
+
+
+def test_batch_result_holds_every_skyline(tmp_path):
+	from data_io import loadQuerySetsFromFile, writePointSetsToFile
+	rng = np.random.default_rng(1)
+	data = rng.random((400, 2))
+	np.savetxt(tmp_path / "data.txt", data)
+	query_sets = [rng.random((k, 2)) * 0.3 + 0.3 for k in (3, 5, 4)]
+	writePointSetsToFile(query_sets, str(tmp_path / "queries.txt"))
+	runScript("b2s2_algo.py", "-d", "data.txt", "--batch", "queries.txt", "--workers", "1", "--result", "skylines.txt",
+		"-O", "out.log", cwd=tmp_path)
+	results = loadQuerySetsFromFile(str(tmp_path / "skylines.txt"))
+	assert len(results) == len(query_sets)
+	for result, query in zip(results, query_sets):
+		assert [tuple(point) for point in result.tolist()] == runB2S2(data, query)
+	runScript("b2s2_algo.py", "-d", "data.txt", "--batch", "queries.txt", "--workers", "1", "--result", "skylines.npy",
+		"-O", "out.log", cwd=tmp_path)
+	rows = np.load(tmp_path / "skylines.npy")
+	assert rows[:, 0].tolist() == sorted(rows[:, 0].tolist())
+	assert len(rows) == sum(len(result) for result in results)
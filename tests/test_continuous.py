@@ -0,0 +1,25 @@
+import os
+import numpy as np
+from b2s2_algo import B2S2Index, B2S2Algo
+from conftest import runBruteForce, sortedSkyline
+
+
+def test_data_change_without_new_query_points():
+	rng = np.random.default_rng(0)
+	data = rng.random((2000, 2))
+	index = B2S2Index(data_points=data)
+	query = rng.random((4, 2)) * 0.2 + 0.4
+	algo = B2S2Algo(index=index, query_points=query, output_file=os.devnull)
+	algo.runContinuousB2S2Algo()
+	live = [tuple(point) for point in data.tolist()]
+	for tick in range(4):
+		# a point near the hull changes the skyline, the query points stay
+		point = tuple((query.mean(axis=0) + rng.normal(0, 0.05, 2)).tolist())
+		index.insertPoint(point)
+		live.append(point)
+		if tick % 2:
+			query = query + rng.normal(0, 0.02, query.shape)
+			algo.runContinuousB2S2Algo(query)
+		else:
+			algo.runContinuousB2S2Algo()
+		assert sortedSkyline(algo) == runBruteForce(np.array(live), query)
@@ -0,0 +1,57 @@
+import numpy as np
+from convex_hull import ConvexHull
+
+
+def angleSumInside(hull, point):
+	# the angle-sum test the orientation search replaced: the edges seen from a
+	# point inside the hull, or on its border, add up to 360 degrees
+	hull = np.asarray(hull, dtype=np.float64)
+	if (hull == point).all(axis=1).any():
+		return True
+	a = hull - point
+	b = np.roll(hull, -1, axis=0) - point
+	angles = np.arctan2(np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]), (a * b).sum(axis=1))
+	return abs(np.degrees(angles.sum()) - 360) < 1e-5
+
+
+def makeHull(query_points):
+	ch = ConvexHull(np.asarray(query_points, dtype=np.float64))
+	ch.findConvexHull()
+	return ch
+
+
+def test_orientation_search_agrees_with_angle_sum():
+	rng = np.random.default_rng(0)
+	for _ in range(30):
+		ch = makeHull(rng.random((int(rng.integers(3, 40)), 2)))
+		points = rng.random((300, 2)) * 1.4 - 0.2
+		expected = [angleSumInside(ch.hull_array, point) for point in points]
+		assert ch.arePointsInsideConvexHull(points).tolist() == expected
+		assert [ch.isPointInsideConvexHull(point) for point in points.tolist()] == expected
+
+
+def test_vertices_and_edges_are_inside():
+	ch = makeHull([[0, 0], [8, 0], [8, 4], [4, 8], [0, 6], [2, 2], [6, 2]])
+	hull = ch.hull_array
+	border = np.concatenate((hull, (hull + np.roll(hull, -1, axis=0)) / 2))
+	outside = np.array([[-1, 0], [9, 4], [4, 9], [8, 8], [0, 7], [-0.5, 3]])
+	for point in border:
+		assert angleSumInside(hull, point)
+	assert ch.arePointsInsideConvexHull(border).all()
+	assert all(ch.isPointInsideConvexHull(point) for point in border.tolist())
+	assert not ch.arePointsInsideConvexHull(outside).any()
+	assert not any(ch.isPointInsideConvexHull(point) for point in outside.tolist())
+
+
+def test_rectangles_and_degenerate_hulls():
+	ch = makeHull([[0, 0], [8, 0], [8, 4], [4, 8], [0, 6]])
+	bounds = np.array([[1, 1, 3, 3], [0, 0, 8, 4], [6, 5, 8, 6], [-1, 1, 2, 2]], dtype=np.float64)
+	assert ch.areRectanglesInsideConvexHull(bounds).tolist() == [True, True, False, False]
+	assert [ch.isBoundsInsideConvexHull(*row) for row in bounds.tolist()] == [True, True, False, False]
+	# collinear query points reduce to the segment between the end points
+	segment = makeHull([[1, 1], [3, 3], [2, 2]])
+	assert sorted(map(tuple, segment.hull_array.tolist())) == [(1.0, 1.0), (3.0, 3.0)]
+	assert segment.arePointsInsideConvexHull([[2, 2], [1.5, 1.5], [3, 3], [4, 4], [2, 2.5]]).tolist() == \
+		[True, True, True, False, False]
+	single = makeHull([[2, 3]])
+	assert single.arePointsInsideConvexHull([[2, 3], [2, 3.5]]).tolist() == [True, False]
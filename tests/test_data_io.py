@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from data_io import loadPointsFromTextFile, parseTextBlock
+
+
+def test_misaligned_lines_raise():
+	# as many tokens as two per line, but not two on every line
+	with pytest.raises(ValueError, match="line number 2"):
+		parseTextBlock(b"1 2 3\n4\n5 6", 1)
+	with pytest.raises(ValueError, match="line number 1"):
+		parseTextBlock(b"1\n2 3 4\n", 1)
+
+
+def test_text_file_blocks(tmp_path):
+	points = np.random.default_rng(0).random((1000, 2))
+	np.savetxt(tmp_path / "points.txt", points)
+	# blocks smaller than the file split it mid line
+	assert np.array_equal(loadPointsFromTextFile(str(tmp_path / "points.txt"), block_size=333), points)
+	# a line with an extra column sends the file through the blocks
+	lines = (tmp_path / "points.txt").read_bytes().splitlines(True)
+	lines[500] = lines[500].rstrip() + b" 7\n"
+	(tmp_path / "ragged.txt").write_bytes(b"".join(lines))
+	assert np.array_equal(loadPointsFromTextFile(str(tmp_path / "ragged.txt"), block_size=333), points)
+
+
+def test_blank_lines_and_extra_columns():
+	assert parseTextBlock(b"1 2\n\n3 4 5\r\n", 1).tolist() == [[1.0, 2.0], [3.0, 4.0]]
+	assert parseTextBlock(b" 1\t2\n3   4 \n5 6", 1).tolist() == [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]
+	# as many values as two per line, but "1-2" holds two of them
+	with pytest.raises(ValueError, match="line number 1"):
+		parseTextBlock(b"1-2 5\n3\n", 1)
+
+
+def test_malformed_line_in_file(tmp_path):
+	(tmp_path / "points.txt").write_bytes(b"1 2\n3 4\n5 x\n")
+	with pytest.raises(ValueError, match="line number 3"):
+		loadPointsFromTextFile(str(tmp_path / "points.txt"))
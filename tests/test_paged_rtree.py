@@ -0,0 +1,61 @@
+import numpy as np
+from b2s2_algo import B2S2Index
+from paged_rtree import BufferPool, openPagedRTree
+from conftest import runB2S2
+
+
+def test_buffer_pool_counts_lru_reads(tmp_path):
+	(tmp_path / "pages").write_bytes(b"".join(bytes([page]) * 512 for page in range(4)))
+	pool = BufferPool(str(tmp_path / "pages"), 512, capacity=2)
+	pages = [pool.readPage(page) for page in (1, 2, 1, 3, 2)]
+	assert [page[0] for page in pages] == [1, 2, 1, 3, 2]
+	# 1 is a hit; 3 evicts 2, the least recently used, and 2 is read again evicting 1
+	assert (pool.logical_reads, pool.physical_reads, pool.evictions) == (5, 4, 2)
+	assert pool.returnHitRatio() == 0.2
+	pool.close()
+
+
+def test_paged_index_results_and_io_counters(tmp_path):
+	rng = np.random.default_rng(0)
+	data = rng.random((5000, 2))
+	np.savetxt(tmp_path / "data.txt", data)
+	data = np.loadtxt(tmp_path / "data.txt")
+	tree_file = str(tmp_path / "data.pgt")
+	index = openPagedRTree(tree_file, str(tmp_path / "data.txt"), m_value=8, buffer_pages=4096)
+	memory = B2S2Index(data_points=data, m_value=8)
+	assert index.returnNodeCount() == memory.returnNodeCount()
+	for node_id in range(0, memory.returnNodeCount(), 7):
+		for paged, mapped in zip(index.returnNodeEntries(node_id), memory.returnNodeEntries(node_id)):
+			assert np.array_equal(paged, mapped)
+	index.buffer_pool.logical_reads = index.buffer_pool.physical_reads = 0
+
+	query = rng.random((5, 2)) * 0.3 + 0.35
+	assert runB2S2(None, query, index=index) == runB2S2(data, query)
+	pool = index.buffer_pool
+	first_logical, first_physical = pool.logical_reads, pool.physical_reads
+	assert 0 < first_physical <= first_logical < index.returnNodeCount()
+	# the second run finds every page in the pool
+	assert runB2S2(None, query, index=index) == runB2S2(data, query)
+	assert pool.logical_reads == 2 * first_logical and pool.physical_reads == first_physical
+	assert index.returnIOStats()['Physical page reads   '] == first_physical
+	index.close()
+
+	small = openPagedRTree(tree_file, str(tmp_path / "data.txt"), m_value=8, buffer_pages=2)
+	assert runB2S2(None, query, index=small) == runB2S2(data, query)
+	assert small.buffer_pool.logical_reads == first_logical
+	assert small.buffer_pool.physical_reads > first_physical and small.buffer_pool.evictions > 0
+	small.close()
+
+
+def test_stale_or_other_m_files_are_rebuilt(tmp_path):
+	data = np.random.default_rng(1).random((300, 2))
+	np.savetxt(tmp_path / "data.txt", data)
+	tree_file = str(tmp_path / "data.pgt")
+	openPagedRTree(tree_file, str(tmp_path / "data.txt"), m_value=4).close()
+	index = openPagedRTree(tree_file, str(tmp_path / "data.txt"), m_value=6)
+	assert index.m_value == 6
+	index.close()
+	np.savetxt(tmp_path / "data.txt", data[:100])
+	index = openPagedRTree(tree_file, str(tmp_path / "data.txt"), m_value=6)
+	assert len(index.returnDataPoints()) == 100
+	index.close()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from query_window import QueryWindow
+from result_cache import SkylineResultCache
+from b2s2_algo import B2S2Index
+from conftest import runB2S2, runBruteForce
+
+# an L shaped polygon, concave at (0.5, 0.5)
+L_SHAPE = [[0.1, 0.1], [0.9, 0.1], [0.9, 0.5], [0.5, 0.5], [0.5, 0.9], [0.1, 0.9]]
+
+
+def test_rectangle_and_polygon_containment():
+	rectangle = QueryWindow((0, 0, 2, 1))
+	assert rectangle.arePointsInside([[0, 0], [2, 1], [1, 0.5], [2.1, 0.5]]).tolist() == [True, True, True, False]
+	assert rectangle.returnArea() == 2
+	polygon = QueryWindow(L_SHAPE)
+	assert polygon.arePointsInside([[0.3, 0.3], [0.7, 0.3], [0.3, 0.7], [0.7, 0.7], [0.95, 0.3]]).tolist() == \
+		[True, True, True, False, False]
+	assert abs(polygon.returnArea() - 0.48) < 1e-12
+	bounds = np.array([[0.2, 0.2, 0.4, 0.4], [0.6, 0.6, 0.8, 0.8], [0.4, 0.4, 0.6, 0.6], [0.0, 0.0, 1.0, 1.0]])
+	assert polygon.areRectanglesInside(bounds).tolist() == [True, False, False, False]
+	assert polygon.areRectanglesMeeting(bounds).tolist() == [True, False, True, True]
+	with pytest.raises(ValueError):
+		QueryWindow((1, 0, 0, 1))
+	with pytest.raises(ValueError):
+		QueryWindow([[0, 0], [1, 1]])
+
+
+def test_window_skylines_match_the_skyline_of_the_points_inside():
+	rng = np.random.default_rng(0)
+	data = rng.random((5000, 2))
+	index = B2S2Index(data_points=data, m_value=8)
+	windows = [QueryWindow((0.2, 0.3, 0.6, 0.8)), QueryWindow(L_SHAPE), QueryWindow((0.6, 0.6, 0.95, 0.95))]
+	for window in windows:
+		inside = data[window.arePointsInside(data)]
+		for query in (np.array([[0.3, 0.3], [0.45, 0.35], [0.35, 0.5]]), np.array([[0.75, 0.75], [0.8, 0.85], [0.7, 0.9]])):
+			# the second hull lies outside the L, its skyline comes from the points around it
+			assert runB2S2(None, query, index=index, window=window) == runBruteForce(inside, query)
+
+
+def test_windows_get_their_own_cache_entries():
+	cache = SkylineResultCache()
+	hull = [[0, 0], [1, 0], [0, 1]]
+	keys = {cache.makeKey(hull, 1), cache.makeKey(hull, 1, QueryWindow((0, 0, 1, 1))),
+		cache.makeKey(hull, 1, QueryWindow(L_SHAPE))}
+	assert len(keys) == 3
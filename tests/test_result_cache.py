@@ -0,0 +1,66 @@
+import os
+import numpy as np
+from b2s2_algo import B2S2Index, B2S2Algo
+from result_cache import SkylineResultCache
+from conftest import runB2S2, sortedSkyline
+
+
+def test_hit_miss_and_canonical_keys():
+	cache = SkylineResultCache()
+	hull = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+	key = cache.makeKey(hull, 1)
+	assert cache.get(key) is None
+	cache.put(key, [(0.5, 0.5)])
+	# any vertex order, and rounding below the tolerance, give the same key
+	assert cache.makeKey(hull[::-1] + 1e-12, 1) == key
+	assert cache.get(cache.makeKey(hull[[1, 2, 0]], 1)).tolist() == [[0.5, 0.5]]
+	assert cache.makeKey(hull, 2) != key
+	assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+	cache = SkylineResultCache(max_entries=2)
+	keys = [cache.makeKey([[i, 0], [0, i], [i, i]], 1) for i in range(1, 4)]
+	cache.put(keys[0], [(1, 1)])
+	cache.put(keys[1], [(2, 2)])
+	cache.get(keys[0])
+	cache.put(keys[2], [(3, 3)])
+	assert cache.get(keys[1]) is None
+	assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+	assert cache.evictions == 1 and len(cache) == 2
+
+	points = np.zeros((1000, 2))
+	small = SkylineResultCache(max_bytes=cache.entrySize(keys[0], points) + 100)
+	small.put(keys[0], points)
+	small.put(keys[1], points[:10])
+	assert small.get(keys[0]) is None and small.evictions == 1
+	small.put(keys[2], np.zeros((5000, 2)))
+	assert small.get(keys[2]) is None and small.bytes <= small.max_bytes
+
+
+def test_queries_reuse_the_cache_until_the_data_changes():
+	rng = np.random.default_rng(0)
+	data = rng.random((3000, 2))
+	index = B2S2Index(data_points=data)
+	cache = SkylineResultCache()
+	query = np.array([[0.3, 0.3], [0.7, 0.3], [0.5, 0.7]])
+
+	def run(query_points):
+		algo = B2S2Algo(index=index, query_points=query_points, output_file=os.devnull, cache=cache)
+		algo.initializeB2S2Algo()
+		algo.runB2S2Algo()
+		return algo
+
+	first = run(query)
+	assert not first.cache_hit
+	# a point inside the hull does not change the hull, the skyline is reused
+	second = run(np.concatenate((query[::-1], [[0.5, 0.4]])))
+	assert second.cache_hit
+	assert sortedSkyline(second) == sortedSkyline(first) == runB2S2(data, query)
+
+	index.insertPoint((0.5, 0.45))
+	third = run(query)
+	assert not third.cache_hit
+	assert (0.5, 0.45) in sortedSkyline(third)
+	assert sortedSkyline(third) == runB2S2(index.returnDataPoints(), query)
+	assert cache.hits == 1 and cache.misses == 2
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from b2s2_algo import B2S2Index
+from rtree import RTreeInstance
+from conftest import runB2S2
+
+
+def test_str_packing_covers_every_point_once():
+	points = np.random.default_rng(0).random((1000, 2))
+	rtree = RTreeInstance(points=points, max_entries=5)
+	rtree.bulkLoadDataIntoRTree()
+	_, node_bounds, child_start, children, node_is_leaf = rtree.flattenToArrays()
+	assert np.all(np.diff(child_start) <= 5)
+	leaf_points = np.concatenate([children[child_start[i]:child_start[i + 1]] for i in np.flatnonzero(node_is_leaf)])
+	assert sorted(leaf_points.tolist()) == list(range(len(points)))
+	for node in range(len(node_bounds)):
+		child_ids = children[child_start[node]:child_start[node + 1]]
+		if node_is_leaf[node]:
+			child_bounds = np.tile(points[child_ids], 2)
+		else:
+			child_bounds = node_bounds[child_ids]
+		assert (child_bounds[:, :2] >= node_bounds[node, :2]).all() and (child_bounds[:, 2:] <= node_bounds[node, 2:]).all()
+
+
+def test_str_packing_gives_the_skylines_of_insertion():
+	rng = np.random.default_rng(1)
+	for m_value in (4, 9):
+		data = rng.random((int(rng.integers(1, 3000)), 2))
+		packed = B2S2Index(data_points=data, m_value=m_value)
+		inserted = B2S2Index(data_points=data, m_value=m_value, bulk_load=False)
+		for _ in range(5):
+			query = rng.random((int(rng.integers(1, 7)), 2))
+			assert runB2S2(None, query, index=packed) == runB2S2(None, query, index=inserted)
+
+
+def savedTree(tmp_path, points):
+	np.savetxt(tmp_path / "data.txt", points)
+	rtree = RTreeInstance(points=np.loadtxt(tmp_path / "data.txt"), max_entries=4)
+	rtree.bulkLoadDataIntoRTree()
+	rtree.saveToFile(str(tmp_path / "data.rtree"), source_file=str(tmp_path / "data.txt"))
+	return rtree
+
+
+def test_saved_tree_round_trips(tmp_path):
+	rtree = savedTree(tmp_path, np.random.default_rng(2).random((700, 2)))
+	loaded = RTreeInstance()
+	loaded.loadFromFile(str(tmp_path / "data.rtree"), source_file=str(tmp_path / "data.txt"))
+	assert loaded.max_entries == rtree.max_entries
+	assert loaded.returnNodesCount() == rtree.returnNodesCount()
+	for saved, mapped in zip(rtree.flattenToArrays(), loaded.flattenToArrays()):
+		assert isinstance(mapped, np.memmap)
+		assert np.array_equal(saved, mapped)
+
+	query = np.array([[0.3, 0.3], [0.6, 0.35], [0.5, 0.7]])
+	index = B2S2Index(data_points_file=str(tmp_path / "data.txt"), rtree_file=str(tmp_path / "data.rtree"))
+	assert isinstance(index.returnTreeArrays()[1], np.memmap)
+	assert runB2S2(None, query, index=index) == runB2S2(rtree.returnPoints(), query)
+
+
+def test_stale_and_corrupted_files_are_rejected(tmp_path):
+	points = np.random.default_rng(3).random((500, 2))
+	savedTree(tmp_path, points)
+	tree_file = str(tmp_path / "data.rtree")
+	contents = (tmp_path / "data.rtree").read_bytes()
+
+	# the checksum of the data file no longer matches
+	np.savetxt(tmp_path / "data.txt", points[::-1])
+	with pytest.raises(ValueError, match="stale"):
+		RTreeInstance().loadFromFile(tree_file, source_file=str(tmp_path / "data.txt"))
+	index = B2S2Index(data_points_file=str(tmp_path / "data.txt"), rtree_file=tree_file)
+	assert not isinstance(index.returnTreeArrays()[1], np.memmap)
+	assert np.array_equal(index.returnDataPoints(), np.loadtxt(tmp_path / "data.txt"))
+	RTreeInstance().loadFromFile(tree_file, source_file=str(tmp_path / "data.txt"))
+
+	(tmp_path / "data.rtree").write_bytes(contents[:-40])
+	with pytest.raises(ValueError, match="truncated"):
+		RTreeInstance().loadFromFile(tree_file)
+	(tmp_path / "data.rtree").write_bytes(b"X" + contents[1:])
+	with pytest.raises(ValueError, match="not an R-tree file"):
+		RTreeInstance().loadFromFile(tree_file)
+	(tmp_path / "data.rtree").write_bytes(contents[:8] + (99).to_bytes(4, 'little') + contents[12:])
+	with pytest.raises(ValueError, match="format version 99"):
+		RTreeInstance().loadFromFile(tree_file)
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+from vs2_algo import VS2Index, VS2Algo
+from conftest import runB2S2, sortedSkyline
+
+
+def runVS2(data, query):
+	algo = VS2Algo(index=VS2Index(data_points=data), query_points=query, output_file=os.devnull)
+	algo.initializeVS2Algo()
+	algo.runVS2Algo()
+	return sortedSkyline(algo)
+
+
+def test_duplicates_are_reached():
+	# Delaunay leaves the second (2, 4) out, the walk must still expand past it
+	data = np.array([[2, 4], [2, 4], [3, 2], [4, 2], [1, 4], [7, 4], [4, 4]], dtype=np.float64)
+	query = np.array([[7, 3], [3, 4], [4, 7]], dtype=np.float64)
+	index = VS2Index(data_points=data)
+	coplanar = index.delaunay.coplanar[:, 0]
+	assert len(coplanar)
+	for point_id in coplanar.tolist():
+		assert index.returnNearestNeighbour(data[point_id]) not in coplanar
+	assert runVS2(data, query) == runB2S2(data, query) == [(4.0, 4.0), (7.0, 4.0)]
+
+
+def test_integer_grid_matches_b2s2():
+	rng = np.random.default_rng(0)
+	for _ in range(40):
+		data = rng.integers(0, 25, (int(rng.integers(20, 300)), 2)).astype(np.float64)
+		query = rng.integers(0, 25, (int(rng.integers(3, 6)), 2)).astype(np.float64)
+		if np.linalg.matrix_rank(query - query[0]) < 2:
+			# mirrored points tie on a collinear hull, either one is a valid answer
+			continue
+		assert runVS2(data, query) == runB2S2(data, query)
+
+
+def test_out_of_order_removal_keeps_skyline_set_in_step():
+	# this draw accepts a point before its dominator is reached, the dominated
+	# row must leave the skyline set and the records along with the result
+	rng = np.random.default_rng(2)
+	data = rng.integers(0, 25, (int(rng.integers(20, 300)), 2)).astype(np.float64)
+	query = rng.integers(0, 25, (int(rng.integers(3, 6)), 2)).astype(np.float64)
+	algo = VS2Algo(index=VS2Index(data_points=data), query_points=query, output_file=os.devnull)
+	algo.initializeVS2Algo()
+	algo.runVS2Algo()
+	assert algo.skyline_set.size == len(algo.skyline_records) == len(algo.skyline_points)
+	assert set(algo.skyline_records) == algo.skyline_points
+	assert sorted(map(tuple, algo.skyline_set.returnPoints().tolist())) == sortedSkyline(algo)
+	assert sortedSkyline(algo) == runB2S2(data, query)
@@ -0,0 +1,217 @@
+import numpy as np
+import scipy.spatial
+from rtreelib import Rect
+from b2s2_algo import B2S2Algo
+from data_io import loadPointsFromFile
+from result_cache import newDatasetVersion
+import heapq
+import time
+
+
+class VS2Index(object):
+	"""Delaunay graph, Voronoi cell bounds and nearest neighbour tree of the data points, built once"""
+	def __init__(self, data_points=None, data_points_file=None):
+		'''
+			Constructor:
+			Input: data_points/data_points_file
+		'''
+		super(VS2Index, self).__init__()
+		load_start_time = time.time()
+		if data_points is not None:
+			self.data_points = np.asarray(data_points, dtype=np.float64).reshape(-1, 2)
+		else:
+			self.data_points = np.asarray(loadPointsFromFile(data_points_file), dtype=np.float64)
+		self.load_time = abs(time.time() - load_start_time) if data_points is None else 0.0
+		build_start_time = time.time()
+		self.delaunay = scipy.spatial.Delaunay(self.data_points)
+		# duplicates are left out of the triangulation as coplanar points, each
+		# one is attached to the vertex it coincides with
+		self.vertex_of = np.arange(len(self.data_points))
+		self.vertex_of[self.delaunay.coplanar[:, 0]] = self.delaunay.coplanar[:, 2]
+		self.neighbour_start, self.neighbours = self.attachCoplanarPoints(*self.delaunay.vertex_neighbor_vertices)
+		self.kdtree = scipy.spatial.cKDTree(self.data_points)
+		self.cell_bounds = self.computeVoronoiCellBounds()
+		self.build_time = abs(time.time() - build_start_time)
+		self.m_value = None
+		self.dataset_version = newDatasetVersion()
+
+	def attachCoplanarPoints(self, neighbour_start, neighbours):
+		'''
+			output: (neighbour_start, neighbours) of the Delaunay graph where every
+			coplanar point is a neighbour of its vertex and has the vertex and its
+			neighbours as its own, so the walk reaches it like any other point
+		'''
+		coplanar = self.delaunay.coplanar
+		if not len(coplanar):
+			return neighbour_start, neighbours
+		points = coplanar[:, 0]
+		vertices = coplanar[:, 2]
+		counts = np.diff(neighbour_start)
+		sources = [np.repeat(np.arange(len(counts)), counts), points, vertices, np.repeat(points, counts[vertices])]
+		targets = [neighbours, vertices, points,
+			np.concatenate([neighbours[neighbour_start[v]:neighbour_start[v + 1]] for v in vertices.tolist()])]
+		sources = np.concatenate(sources)
+		order = np.argsort(sources, kind='stable')
+		neighbour_start = np.zeros(len(counts) + 1, dtype=np.intp)
+		np.cumsum(np.bincount(sources, minlength=len(counts)), out=neighbour_start[1:])
+		return neighbour_start, np.concatenate(targets)[order]
+
+	def computeVoronoiCellBounds(self):
+		'''
+			output:-
+			(n, 4) array with the bounding rect of every point's Voronoi cell,
+			unbounded cells get an infinite rect.
+			The Voronoi vertices around a point are the circumcenters of its
+			Delaunay triangles, so no separate Voronoi diagram is built.
+		'''
+		simplices = self.delaunay.simplices
+		a, b, c = (self.data_points[simplices[:, k]] for k in range(3))
+		b = b - a
+		c = c - a
+		d = 2 * (b[:, 0] * c[:, 1] - b[:, 1] * c[:, 0])
+		b_norm = np.square(b).sum(axis=1)
+		c_norm = np.square(c).sum(axis=1)
+		centers = np.empty((len(simplices), 2))
+		centers[:, 0] = a[:, 0] + (c[:, 1] * b_norm - b[:, 1] * c_norm) / d
+		centers[:, 1] = a[:, 1] + (b[:, 0] * c_norm - c[:, 0] * b_norm) / d
+
+		bounds = np.empty((len(self.data_points), 4))
+		bounds[:, :2] = np.inf
+		bounds[:, 2:] = -np.inf
+		for k in range(3):
+			np.minimum.at(bounds[:, 0], simplices[:, k], centers[:, 0])
+			np.minimum.at(bounds[:, 1], simplices[:, k], centers[:, 1])
+			np.maximum.at(bounds[:, 2], simplices[:, k], centers[:, 0])
+			np.maximum.at(bounds[:, 3], simplices[:, k], centers[:, 1])
+		# cells of the points on the convex hull of the data are unbounded
+		unbounded = np.unique(self.delaunay.convex_hull)
+		bounds[unbounded, :2] = -np.inf
+		bounds[unbounded, 2:] = np.inf
+		# a coplanar point shares the cell of its vertex
+		points = self.delaunay.coplanar[:, 0]
+		vertex_bounds = bounds[self.delaunay.coplanar[:, 2]]
+		bounds[points, :2] = np.minimum(vertex_bounds[:, :2], self.data_points[points])
+		bounds[points, 2:] = np.maximum(vertex_bounds[:, 2:], self.data_points[points])
+		return bounds
+
+	def returnCellBoundingRect(self, point_id):
+		return Rect(*self.cell_bounds[point_id].tolist())
+
+	def returnDataPoints(self):
+		return self.data_points
+
+	def returnNeighbours(self, point_id):
+		'''
+			output: ids of the points whose Voronoi cells share an edge with point_id's
+		'''
+		return self.neighbours[self.neighbour_start[point_id]:self.neighbour_start[point_id + 1]]
+
+	def returnNearestNeighbour(self, point):
+		'''
+			output: id of the triangulated vertex nearest to point
+		'''
+		return int(self.vertex_of[self.kdtree.query(point)[1]])
+
+	def returnRootBoundingRect(self):
+		min_x, min_y = self.data_points.min(axis=0).tolist()
+		max_x, max_y = self.data_points.max(axis=0).tolist()
+		return Rect(min_x, min_y, max_x, max_y)
+
+	def returnTotalNodesInRTree(self):
+		'''
+			VS2 has no R-tree, its index nodes are the Voronoi cells.
+		'''
+		return len(self.data_points)
+
+	def returnBuildTime(self):
+		return self.build_time
+
+	def returnLoadTime(self):
+		return self.load_time
+
+
+class VS2Algo(B2S2Algo):
+	"""VS2 executor: best first walk over the Delaunay graph of a VS2Index"""
+
+	def initializeVS2Algo(self):
+		'''
+			Initialize algo elements
+			1. Convex Hull.
+			2. Heap, seeded with the nearest neighbour of a query point which is
+			   always a skyline point.
+			3. writing available stats of algo to output file.
+		'''
+		self.initializeQuery()
+		self.metrics.addTime('load', self.query_load_time + self.index.returnLoadTime())
+		self.metrics.addTime('index build', self.index.returnBuildTime())
+		self.visited = np.zeros(len(self.data_points), dtype=bool)
+		seed = self.index.returnNearestNeighbour(self.convexHullPoints[0])
+		self.insertPointIntoHeap(seed)
+		self.writeInitialStats()
+
+	def insertPointIntoHeap(self, point_id):
+		point = self.data_points[point_id]
+		key = self.mindistPointandSet(point, self.convexHullPoints)
+		heapq.heappush(self.minheap, (key, point_id))
+		self.visited[point_id] = True
+		self.metrics.increment('heap pushes')
+		self.metrics.updateMax('peak heap size', len(self.minheap))
+
+	def runVS2Algo(self):
+		'''
+			**IMPORATANT : call this method after you have called object.initializeVS2Algo()
+			Points are popped in increasing sum of distances to the hull vertices.
+			A popped point is a skyline point when it lies inside the hull or no
+			skyline point found so far dominates it. Its Delaunay neighbours are
+			visited only when its Voronoi cell may hold non dominated points: the
+			non dominated region is connected to the hull, so every skyline point
+			is reached through such cells. "R-tree Nodes accessed" counts the
+			Voronoi cells expanded.
+		'''
+		with self.metrics.phase('traversal'):
+			if not self.lookupResultCache():
+				self.traverseVS2()
+				self.storeInResultCache()
+		self.finalizeMetrics()
+		return self.skyline_points
+
+	def traverseVS2(self):
+		self.count_rtree_nodes_accessed = 0
+		max_popped_key = -np.inf
+		out_of_order_points = []
+		while self.minheap:
+			key, point_id = self.popFromHeap()
+			x, y = self.data_points[point_id].tolist()
+			entry = Rect(x, y, x, y)
+			is_inside_hull = self.ch.isPointInsideConvexHull((x, y))
+			if is_inside_hull:
+				self.metrics.increment('accepted inside hull')
+			if is_inside_hull or not self.isEntryDominated(entry):
+				self.addToSkyline(x, y)
+				if key < max_popped_key:
+					out_of_order_points.append((x, y))
+			elif self.isEntryDominated(self.index.returnCellBoundingRect(point_id)):
+				continue
+			max_popped_key = max(max_popped_key, key)
+			self.count_rtree_nodes_accessed += 1
+			for neighbour in self.index.returnNeighbours(point_id).tolist():
+				if not self.visited[neighbour]:
+					self.insertPointIntoHeap(neighbour)
+
+		self.removeDominatedSkylinePoints(out_of_order_points)
+
+	def removeDominatedSkylinePoints(self, out_of_order_points):
+		'''
+			A point can be accepted before its dominator is reached through the
+			graph. Such a dominator is popped with a smaller key than an earlier
+			pop, so only those out of order points are checked against the skyline.
+		'''
+		if not out_of_order_points:
+			return
+		distances = self.skyline_set.returnDistances()
+		dominated = np.zeros(len(distances), dtype=bool)
+		for point in out_of_order_points:
+			point_distances = np.sqrt(np.square(self.convexHullPoints - point).sum(axis=1))
+			dominated |= (distances >= point_distances).all(axis=1) & (distances > point_distances).any(axis=1)
+		if dominated.any():
+			self.removeFromSkyline(dominated)